@@ -37,6 +37,7 @@ MODES = __enum(
     AUTH_DL='auth_dl', RESET_DL='reset_dl', AUTH_UB='auth_ub', RESET_UB='reset_ub',
     AUTH_CL='auth_cl', RESET_CL='reset_cl',
     RESET_CACHE='reset_cache',
+    TELEMETRY_REPORT='telemetry_report', RESET_TELEMETRY='reset_telemetry',
     CLEAN_SETTINGS='clean_settings'
 )
 
@@ -145,6 +146,19 @@ def reset_cache():
         kodi.notify(msg=kodi.i18n('cache_reset_failed'))
 
 
+@url_dispatcher.register(MODES.TELEMETRY_REPORT)
+def telemetry_report():
+    from resolveurl.lib import telemetry
+    kodi.textviewer(kodi.i18n('telemetry_report'), telemetry.report())
+
+
+@url_dispatcher.register(MODES.RESET_TELEMETRY)
+def reset_telemetry():
+    from resolveurl.lib import telemetry
+    telemetry.reset()
+    kodi.notify(msg=kodi.i18n('telemetry_reset'))
+
+
 @url_dispatcher.register(MODES.AUTH_LS)
 def auth_ls():
     kodi.close_all()
@@ -26,42 +26,113 @@ For most cases you probably want to use :func:`resolveurl.resolve` or
 
 
 """
+import os
 import re
+import time
+import hashlib
+import collections
+import threading
 from six.moves import urllib_parse
 import six
 import sys
 from kodi_six import xbmcvfs, xbmcgui
 from resolveurl import common
-from resolveurl.hmf import HostedMediaFile
+from resolveurl import manifest
+from resolveurl.hmf import HostedMediaFile, resolver_cache, top_domain
 from resolveurl.resolver import ResolveUrl
 from resolveurl.plugins.__resolve_generic__ import ResolveGeneric
-from resolveurl.plugins import *  # NOQA
+from resolveurl.lib.domain_index import DomainIndex
+from resolveurl.lib import telemetry
+from resolveurl.lib.workers import futures
 
-common.logger.log_debug('Initializing ResolveURL version: %s' % common.addon_version)
+common.logger.log_debug('Initializing ResolveURL version: %s', common.addon_version)
 MAX_SETTINGS = 60
+NETLOC = re.compile(r'(?:[a-zA-Z][a-zA-Z0-9+.\-]*:)?//([^/?#]+)')
+SETTINGS_STAMP_FILE = os.path.join(common.profile_path, 'settings_xml.fingerprint')
 
 PLUGIN_DIRS = []
 host_cache = {}
+# (domain, include_universal, include_popups) -> resolvers that may handle links of domain, see _get_link_resolvers
+_link_resolvers = {}
+_link_resolvers_version = None
+_domain_index = None
+_plugin_entries = []
+_external_entries = {}
+# plugin dir -> (mtime of the dir when it was last scanned, files imported from it)
+_scanned_plugin_dirs = {}
 
 
 def add_plugin_dirs(dirs):
     global PLUGIN_DIRS
     if isinstance(dirs, six.string_types):
-        PLUGIN_DIRS.append(dirs)
-    else:
-        PLUGIN_DIRS += dirs
+        dirs = [dirs]
+    PLUGIN_DIRS += [d for d in dirs if d not in PLUGIN_DIRS]
+
+
+def _dir_mtime(d):
+    try:
+        return os.stat(d).st_mtime
+    except OSError:
+        return None
 
 
 def load_external_plugins():
+    """
+    Imports the resolver modules in PLUGIN_DIRS. A dir is only listed again
+    when its mtime changed since the last scan, and then only the new files
+    are imported, so calling this for every HostedMediaFile is cheap.
+    """
     for d in PLUGIN_DIRS:
-        common.logger.log_debug('Adding plugin path: %s' % d)
-        sys.path.insert(0, d)
+        mtime = _dir_mtime(d)
+        if d in _scanned_plugin_dirs and _scanned_plugin_dirs[d][0] == mtime:
+            continue
+        loaded = _scanned_plugin_dirs[d][1] if d in _scanned_plugin_dirs else set()
+        if d not in sys.path:
+            common.logger.log_debug('Adding plugin path: %s', d)
+            sys.path.insert(0, d)
         for filename in xbmcvfs.listdir(d)[1]:
-            if not filename.startswith('__') and filename.endswith('.py'):
+            if not filename.startswith('__') and filename.endswith('.py') and filename not in loaded:
                 mod_name = filename[:-3]
-                imp = __import__(mod_name, globals(), locals())
+                try:
+                    imp = __import__(mod_name, globals(), locals())
+                except Exception as e:
+                    common.logger.log_warning('Failed to load %s from %s: %s' % (filename, d, e))
+                    continue
                 sys.modules[mod_name] = imp
-                common.logger.log_debug('Loaded %s as %s from %s' % (imp, mod_name, filename))
+                loaded.add(filename)
+                common.logger.log_debug('Loaded %s as %s from %s', imp, mod_name, filename)
+        _scanned_plugin_dirs[d] = (mtime, loaded)
+
+
+def _get_plugin_entries():
+    """
+    Returns the manifest entries of the built-in resolvers followed by
+    entries for any resolver classes loaded from elsewhere (e.g. external
+    plugin dirs).
+    """
+    global _plugin_entries
+    known = manifest.get_modules()
+    for klass in ResolveUrl.__class__.__subclasses__(ResolveUrl) + ResolveUrl.__class__.__subclasses__(ResolveGeneric):
+        if klass.__module__ not in known and klass not in _external_entries:
+            _external_entries[klass] = manifest.PluginEntry.from_class(klass)
+            _plugin_entries = []
+    if not _plugin_entries:
+        _plugin_entries = manifest.get_entries() + list(_external_entries.values())
+    return _plugin_entries
+
+
+def _get_domain_index(entries):
+    """
+    Returns the :class:`DomainIndex` of all plugin entries, rebuilding it
+    only when new entries (e.g. external plugins) have been added.
+    """
+    global _domain_index
+    if _domain_index is None or _domain_index.size != len(entries):
+        index = DomainIndex()
+        for entry in entries:
+            index.add(entry, entry.domains)
+        _domain_index = index
+    return _domain_index
 
 
 def relevant_resolvers(domain=None, include_universal=None, include_popups=None, include_external=False, include_disabled=False, order_matters=False):
@@ -79,26 +150,34 @@ def relevant_resolvers(domain=None, include_universal=None, include_popups=None,
     if include_popups is False:
         common.logger.log_debug('Resolvers that require popups have been disabled')
 
-    classes = ResolveUrl.__class__.__subclasses__(ResolveUrl) + ResolveUrl.__class__.__subclasses__(ResolveGeneric)
-    relevant = []
-    for resolver in classes:
-        if include_disabled or resolver._is_enabled():
-            if (include_universal or not resolver.isUniversal()) and (include_popups or not resolver.isPopup()):
-                if domain is None or ((domain and any(domain in res_domain.lower() for res_domain in resolver.domains)) or '*' in resolver.domains):
-                    relevant.append(resolver)
+    entries = _get_plugin_entries()
+    if domain is not None:
+        entries = _get_domain_index(entries).lookup(domain)
 
-    if order_matters:
-        relevant.sort(key=lambda x: x._get_priority())
+    # only the plugin modules that survive the domain, universal, popup and enabled checks get imported
+    relevant = []
+    for entry in entries:
+        if (include_universal or not entry.universal) and (include_popups or not entry.popup) and (include_disabled or entry.is_enabled()):
+            try:
+                relevant.append(entry.load())
+            except Exception as e:
+                common.logger.log_warning('Failed to load %s: %s' % (entry, e))
 
     # Add attribute priority
     for i in relevant:
         i.priority = i._get_priority()
 
-    common.logger.log_debug('Relevant Resolvers: %s' % relevant)
+    if order_matters:
+        if telemetry.adaptive():
+            relevant.sort(key=telemetry.order_key)
+        else:
+            relevant.sort(key=lambda x: x.priority)
+
+    common.logger.log_debug('Relevant Resolvers: %s', relevant)
     return relevant
 
 
-def resolve(web_url, return_all=False, subs=False):
+def resolve(web_url, return_all=False, subs=False, unrestrict=False):
     """
     Resolve a web page to a media stream.
 
@@ -123,6 +202,9 @@ def resolve(web_url, return_all=False, subs=False):
     Args:
         web_url (str): A URL to a web page associated with a piece of media
         content.
+        unrestrict (bool): with ``return_all``, resolve every file of a
+        debrid result to a stream url as well (see
+        :meth:`ResolveUrl.unrestrict_all`).
 
     Returns:
         If the ``web_url`` could be resolved, a string containing the direct
@@ -131,30 +213,183 @@ def resolve(web_url, return_all=False, subs=False):
     if subs:
         source = HostedMediaFile(url=web_url, subs=subs)
     elif return_all:
-        source = HostedMediaFile(url=web_url, return_all=return_all)
+        source = HostedMediaFile(url=web_url, return_all=return_all, unrestrict=unrestrict)
     else:
         source = HostedMediaFile(url=web_url)
     return source.resolve()
 
 
-def filter_source_list(source_list):
+def resolve_many(urls, max_workers=4, per_host_limit=2, deadline=None, callback=None, return_all=False, subs=False):
+    """
+    Resolve a list of web pages concurrently.
+
+    Identical URLs are only resolved once. At most ``max_workers`` URLs are
+    resolved at a time and at most ``per_host_limit`` of them on the same
+    host; calls into each debrid API are capped as well (see
+    :data:`resolveurl.lib.workers.API_LIMIT`). Results are yielded as they complete::
+
+        for item in resolveurl.resolve_many(web_urls, deadline=15):
+            if item['result']:
+                print(item['url'], item['result'], item['elapsed'])
+
+    Args:
+        urls (list): web page URLs, as passed to :func:`resolve`.
+        max_workers (int): number of URLs resolved at the same time.
+        per_host_limit (int): number of URLs of the same host resolved at the same time.
+        deadline (float): optional time budget in seconds. URLs not resolved
+        by then are reported with the error ``'Timeout'``.
+        callback (callable): optional function called with each result as
+        it is yielded.
+
+    Yields:
+        A dict per unique URL with the keys ``url``, ``result`` (what
+        :func:`resolve` returned, or ``False``), ``error`` (``None`` or a
+        ``'ExceptionName: message'`` string) and ``elapsed`` (seconds).
+
+    Raises:
+        ValueError: if ``max_workers`` or ``per_host_limit`` is less than 1.
+    """
+    # checked here rather than in the generator, so that bad arguments fail at the call
+    if max_workers < 1 or per_host_limit < 1:
+        raise ValueError('max_workers and per_host_limit must be at least 1')
+    return _resolve_many(urls, max_workers, per_host_limit, deadline, callback, return_all, subs)
+
+
+def _resolve_many(urls, max_workers, per_host_limit, deadline, callback, return_all, subs):
+    unique = []
+    seen = set()
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            unique.append(url)
+
+    start = time.time()
+    end = start + deadline if deadline else None
+    queue = [(url, urllib_parse.urlparse(url).hostname or '') for url in unique]
+
+    def _report(result):
+        if callback is not None:
+            callback(result)
+        return result
+
+    if futures is None:
+        for url, _host in queue:
+            if end is not None and time.time() >= end:
+                yield _report({'url': url, 'result': False, 'error': 'Timeout', 'elapsed': time.time() - start})
+            else:
+                yield _report(_resolve_one(url, return_all, subs))
+        return
+
+    executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    running = {}
+    host_count = collections.defaultdict(int)
+    try:
+        while queue or running:
+            # start as many queued URLs as the worker and per host limits allow
+            waiting = []
+            for url, host in queue:
+                if len(running) < max_workers and host_count[host] < per_host_limit:
+                    host_count[host] += 1
+                    running[executor.submit(_resolve_one, url, return_all, subs)] = (url, host)
+                else:
+                    waiting.append((url, host))
+            queue = waiting
+
+            timeout = None if end is None else end - time.time()
+            if timeout is not None and timeout <= 0:
+                break
+            done, _ = futures.wait(list(running), timeout=timeout, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                url, host = running.pop(future)
+                host_count[host] -= 1
+                yield _report(future.result())
+
+        for url, _host in list(running.values()) + queue:
+            yield _report({'url': url, 'result': False, 'error': 'Timeout', 'elapsed': time.time() - start})
+    finally:
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _resolve_one(web_url, return_all=False, subs=False):
+    start = time.time()
+    result = {'url': web_url, 'result': False, 'error': None}
+    try:
+        result['result'] = resolve(web_url, return_all=return_all, subs=subs)
+    except Exception as e:
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+    result['elapsed'] = time.time() - start
+    return result
+
+
+def check_cached(hashes):
+    """
+    Asks every enabled universal resolver which of ``hashes`` it can stream
+    right away, so that a list of magnets can be annotated before one of
+    them is picked.
+
+    Example::
+
+        status = resolveurl.check_cached([magnet1, magnet2])
+        # {'<info hash 1>': {'Premiumize.me': True, 'TorBox': False}, '<info hash 2>': {...}}
+
+    Args:
+        hashes (list): info hashes or magnet links
+
+    Returns:
+        A dict mapping each lower case info hash to a dict of resolver name ->
+        True/False, with an entry for every resolver that could answer.
+    """
+    status = {}
+    include_popups = common.get_setting('allow_popups') == "true"
+    # only the universal plugin modules are imported, and their instances are shared with HostedMediaFile
+    for entry in _get_plugin_entries():
+        if not (entry.universal and (include_popups or not entry.popup) and entry.is_enabled()):
+            continue
+        try:
+            resolver = _get_resolver(entry.load())
+            answers = resolver.check_cached(hashes)
+        except Exception as e:
+            common.logger.log_warning('%s: cache check failed: %s' % (entry.name, e))
+            continue
+        for _hash, cached in answers.items():
+            status.setdefault(_hash, {})[entry.name] = cached
+    return status
+
+
+def filter_source_list(source_list, skip_unavailable=False):
     """
     Takes a list of :class:`HostedMediaFile`s representing web pages that are
     thought to be associated with media content. If no resolver plugins exist
     to resolve a :class:`HostedMediaFile` to a link to a media file it is
-    removed from the list.
+    removed from the list. Sources whose host is currently considered down
+    (see :meth:`HostedMediaFile.is_available`) are moved to the end.
 
     Args:
         source_list (list of :class:`HostedMediaFile`): A list of
         :class:`HostedMediaFiles` representing web pages that are thought to be
         associated with media content.
 
+        skip_unavailable (bool): remove the sources whose host is down
+        instead of moving them to the end.
+
     Returns:
         The same list of :class:`HostedMediaFile` but with any that can't be
         resolved by a resolver plugin removed.
 
     """
-    return [source for source in source_list if source]
+    available = []
+    unavailable = []
+    for source in source_list:
+        if source:
+            if source.is_available():
+                available.append(source)
+            else:
+                unavailable.append(source)
+    if unavailable:
+        common.logger.log_debug('%d sources on hosts that are down' % len(unavailable))
+    return available if skip_unavailable else available + unavailable
 
 
 def choose_source(sources):
@@ -179,6 +414,8 @@ def choose_source(sources):
         sources (list): A list of :class:`HostedMediaFile` representing web
         pages that are thought to be associated with media content.
 
+    Sources whose host is currently down are listed last, greyed out.
+
     Returns:
         The chosen :class:`HostedMediaFile` or ``False`` if the dialog is
         cancelled or none of the :class:`HostedMediaFile` are resolvable.
@@ -192,14 +429,86 @@ def choose_source(sources):
         return sources[0]
     else:
         dialog = xbmcgui.Dialog()
-        index = dialog.select('Choose your stream', [source.title for source in sources])
+        titles = [source.title if source.is_available() else '[COLOR gray]%s[/COLOR]' % source.title for source in sources]
+        index = dialog.select('Choose your stream', titles)
         if index > -1:
             return sources[index]
         else:
             return False
 
 
-def scrape_supported(html, regex=None, host_only=False):
+def _expire_link_caches():
+    """Forgets the link validation results once the plugins or settings changed."""
+    global _link_resolvers_version
+    version = (len(_get_plugin_entries()), common.get_settings_version())
+    if version != _link_resolvers_version:
+        _link_resolvers.clear()
+        host_cache.clear()
+        _link_resolvers_version = version
+
+
+def _get_link_resolvers(domain, include_universal, include_popups):
+    """
+    Returns the resolver instances that may handle links of ``domain``, in
+    no particular order, memoized until :func:`_expire_link_caches` sees a
+    change.
+    """
+    key = (domain, include_universal, include_popups)
+    if key not in _link_resolvers:
+        _link_resolvers[key] = [_get_resolver(klass) for klass in relevant_resolvers(domain, include_universal=include_universal, include_popups=include_popups)]
+    return _link_resolvers[key]
+
+
+def _get_resolver(klass):
+    """Returns the shared instance of the resolver class ``klass`` (see ``hmf.resolver_cache``)."""
+    if klass not in resolver_cache:
+        resolver_cache[klass] = klass()
+    return resolver_cache[klass]
+
+
+def _is_supported(url, domain, resolvers):
+    for resolver in resolvers:
+        try:
+            if resolver.valid_url(url, domain):
+                return True
+        except:
+            continue
+    return False
+
+
+def _preresolve(links, per_host):
+    """
+    Resolves the first ``per_host`` links of each host in a daemon thread,
+    only to fill the stream cache. Only host resolvers without popups are
+    used: a debrid service would add the links to the user's cloud and show
+    its transfer dialogs. The thread ends with the calling add-on's
+    invocation, so this only pays off for callers that stay around (e.g.
+    while a list of sources is shown).
+    """
+    count = collections.defaultdict(int)
+    selected = []
+    for url in links:
+        web_url = 'http:%s' % url if url.startswith('//') else url
+        domain = top_domain(web_url)
+        if count[domain] < per_host and _is_supported(web_url, domain, _get_link_resolvers(domain, False, False)):
+            count[domain] += 1
+            selected.append(url)
+
+    def _run():
+        for url in selected:
+            try:
+                result = HostedMediaFile(url=url, include_universal=False, include_popups=False).resolve(include_universal=False, allow_popups=False, race=False)
+            except Exception as e:
+                result = '%s: %s' % (type(e).__name__, e)
+            common.logger.log_debug('Pre-resolved %s: %s', url, result)
+
+    if selected:
+        worker = threading.Thread(target=_run)
+        worker.daemon = True
+        worker.start()
+
+
+def scrape_supported(html, regex=None, host_only=False, preresolve=0):
     """
     returns a list of links scraped from the html that are supported by resolveurl
 
@@ -207,6 +516,8 @@ def scrape_supported(html, regex=None, host_only=False):
         html: the html to be scraped
         regex: an optional argument to override the default regex which is: href *= *["']([^'"]+
         host_only: an optional argument if true to do only host validation vs full url validation (default False)
+        preresolve: an optional number of links per host to resolve in the background right away with the
+        host resolvers (never debrid or popup ones), so that playing them later is served from the stream cache (default 0)
 
     Returns:
         a list of links scraped from the html that passed validation
@@ -214,27 +525,49 @@ def scrape_supported(html, regex=None, host_only=False):
     """
     if regex is None:
         regex = r'''href\s*=\s*['"]([^'"]+)'''
+    load_external_plugins()
+    _expire_link_caches()
+    include_universal = common.get_setting('allow_universal') == "true"
+    include_popups = common.get_setting('allow_popups') == "true"
+
     links = []
-    for match in re.finditer(regex, html):
-        stream_url = match.group(1)
-        host = urllib_parse.urlparse(stream_url).hostname
-        if host_only:
+    if host_only:
+        hosts = {}
+        for match in re.finditer(regex, html):
+            stream_url = match.group(1)
+            netloc = NETLOC.match(stream_url)
+            key = netloc.group(1) if netloc else stream_url
+            if key not in hosts:
+                hosts[key] = urllib_parse.urlparse(stream_url).hostname
+            host = hosts[key]
             if host is None:
                 continue
-
-            if host in host_cache:
-                if host_cache[host]:
-                    links.append(stream_url)
-                continue
-            else:
-                hmf = HostedMediaFile(host=host, media_id='dummy')  # use dummy media_id to allow host validation
-        else:
-            hmf = HostedMediaFile(url=stream_url)
-
-        is_valid = hmf.valid_url()
-        host_cache[host] = is_valid
-        if is_valid:
-            links.append(stream_url)
+            if host not in host_cache:
+                host_cache[host] = HostedMediaFile(host=host, media_id='dummy').valid_url()  # use dummy media_id to allow host validation
+            if host_cache[host]:
+                links.append(stream_url)
+    else:
+        # group the unique links by domain, then check each group against the resolvers of its domain only
+        urls = [match.group(1) for match in re.finditer(regex, html)]
+        groups = collections.defaultdict(set)
+        domains = {}  # the domain only depends on the netloc, so urlparse is only needed once per netloc
+        for stream_url in set(urls):
+            netloc = NETLOC.match(stream_url)
+            netloc = netloc.group(1) if netloc else None
+            domain = domains.get(netloc) if netloc else None
+            if domain is None:
+                domain = top_domain('http:%s' % stream_url if stream_url.startswith('//') else stream_url)
+                if netloc:
+                    domains[netloc] = domain
+            groups[domain].add(stream_url)
+        supported = set()
+        for domain, group in groups.items():
+            resolvers = _get_link_resolvers(domain, include_universal, include_popups)
+            supported.update(url for url in group if _is_supported('http:%s' % url if url.startswith('//') else url, domain, resolvers))
+        links = [stream_url for stream_url in urls if stream_url in supported]
+
+    if preresolve and links:
+        _preresolve(links, preresolve)
     return links
 
 
@@ -260,8 +593,7 @@ def cleanup_settings():
 
     if xbmcvfs.exists(settings_file):
         # get list of supported resolvers
-        supp_resolvers = relevant_resolvers(include_universal=True, include_popups=True, include_disabled=True)
-        supp_resolvers = [i.__name__ for i in supp_resolvers]
+        supp_resolvers = set(entry.class_name for entry in _get_plugin_entries())
 
         if six.PY3:
             with open(settings_file, 'r', encoding='utf-8') as f:
@@ -270,27 +602,68 @@ def cleanup_settings():
             with open(settings_file, 'r') as f:
                 settings_xml = f.read()
 
-        resolvers = set(re.findall(r'id="([A-Z][^"_]+)', settings_xml))
-        for resolver in resolvers:
-            if resolver not in supp_resolvers:
-                settings_xml = re.sub(r'\s{{4}}<setting\s*id="{0}.*\n'.format(resolver), '', settings_xml)
+        # single pass over the user settings, dropping the lines of resolvers that no longer exist
+        setting_id = re.compile(r'\s*<setting\s*id="([A-Z][^"_]+)')
+        lines = []
+        for line in settings_xml.splitlines(True):
+            match = setting_id.match(line)
+            if match is None or match.group(1) in supp_resolvers:
+                lines.append(line)
+        new_settings_xml = ''.join(lines)
 
-        if six.PY3:
-            with open(settings_file, 'w', encoding='utf-8') as f:
-                f.write(settings_xml)
-        else:
-            with open(settings_file, 'w') as f:
-                f.write(settings_xml.encode('utf8'))
+        if new_settings_xml != settings_xml:
+            if six.PY3:
+                with open(settings_file, 'w', encoding='utf-8') as f:
+                    f.write(new_settings_xml)
+            else:
+                with open(settings_file, 'w') as f:
+                    f.write(new_settings_xml.encode('utf8'))
         return True
 
     return False
 
 
-def _update_settings_xml():
+def _settings_fingerprint():
+    """
+    Returns a hash of everything the generated ``resources/settings.xml``
+    depends on: the plugin manifest fingerprint (plugin files, add-on version
+    and language), this module (which defines the global settings), the
+    ``allow_popups`` setting and any external resolvers.
+    """
+    fingerprint = [manifest.get_fingerprint(), common.get_setting('allow_popups'), str(os.stat(__file__).st_mtime)]
+    fingerprint += sorted('%s.%s' % (klass.__module__, klass.__name__) for klass in _external_entries)
+    return hashlib.md5(six.b('|'.join(fingerprint))).hexdigest()
+
+
+def _read_settings_stamp():
+    try:
+        with open(SETTINGS_STAMP_FILE, 'r') as f:
+            return f.read().strip()
+    except:
+        return ''
+
+
+def _write_settings_stamp(fingerprint):
+    try:
+        with open(SETTINGS_STAMP_FILE, 'w') as f:
+            f.write(fingerprint)
+    except Exception as e:
+        common.logger.log_warning('Failed to write settings stamp: %s' % (e))
+
+
+def _update_settings_xml(force=False):
     """
     This function writes a new ``resources/settings.xml`` file which contains
     all settings for this addon and its plugins.
+
+    The file is only rebuilt when its fingerprint differs from the one
+    recorded the last time it was written, or when ``force`` is True.
     """
+    fingerprint = _settings_fingerprint()
+    if not force and fingerprint == _read_settings_stamp() and xbmcvfs.exists(common.settings_file):
+        common.logger.log_debug('No Settings Update Needed')
+        return
+
     try:
         xbmcvfs.mkdirs(common.settings_path)
     except OSError:
@@ -303,7 +676,15 @@ def _update_settings_xml():
         '\t\t<setting default="true" id="allow_universal" label="%s" type="bool"/>' % (common.i18n('enable_universal')),
         '\t\t<setting default="true" id="allow_popups" label="%s" type="bool"/>' % (common.i18n('enable_popups')),
         '\t\t<setting default="true" id="auto_pick" label="%s" type="bool"/>' % (common.i18n('auto_pick')),
+        '\t\t<setting default="false" id="auto_fastest" label="%s" type="bool" enable="eq(-1,true)"/>' % (common.i18n('auto_fastest')),
         '\t\t<setting default="true" id="use_cache" label="%s" type="bool"/>' % (common.i18n('use_function_cache')),
+        '\t\t<setting default="true" id="cache_streams" label="%s" type="bool" enable="eq(-1,true)"/>' % (common.i18n('cache_streams')),
+        '\t\t<setting default="false" id="race_resolvers" label="%s" type="bool"/>' % (common.i18n('race_resolvers')),
+        '\t\t<setting default="3" id="race_workers" label="%s" type="slider" range="2,1,6" option="int" enable="eq(-1,true)"/>' % (common.i18n('race_workers')),
+        '\t\t<setting default="true" id="telemetry" label="%s" type="bool"/>' % (common.i18n('telemetry')),
+        '\t\t<setting default="false" id="adaptive_order" label="%s" type="bool" enable="eq(-1,true)"/>' % (common.i18n('adaptive_order')),
+        '\t\t<setting id="telemetry_report" type="action" label="%s" action="RunPlugin(plugin://script.module.resolveurl/?mode=telemetry_report)"/>' % (common.i18n('telemetry_report')),
+        '\t\t<setting id="reset_telemetry" type="action" label="%s" action="RunPlugin(plugin://script.module.resolveurl/?mode=reset_telemetry)"/>' % (common.i18n('reset_telemetry')),
         '\t\t<setting id="reset_cache" type="action" label="%s" action="RunPlugin(plugin://script.module.resolveurl/?mode=reset_cache)"/>' % (common.i18n('reset_function_cache')),
         '\t\t<setting id="personal_nid" label="Your NID" type="text" visible="false" default=""/>',
         '\t\t<setting id="last_ua_create" label="last_ua_create" type="number" visible="false" default="0"/>',
@@ -315,12 +696,13 @@ def _update_settings_xml():
 
     i = 0
     cat_count = 2
-    resolvers = relevant_resolvers(include_universal=True, include_disabled=True)
+    include_popups = common.get_setting('allow_popups') == "true"
+    resolvers = [entry for entry in _get_plugin_entries() if include_popups or not entry.popup]
     resolvers = sorted(resolvers, key=lambda x: x.name.upper())
     for resolver in resolvers:
-        if resolver.isUniversal():
+        if resolver.universal:
             new_xml.append('\t\t<setting label="%s" type="lsep"/>' % resolver.name)
-            new_xml += ['\t\t' + line for line in resolver.get_settings_xml()]
+            new_xml += ['\t\t' + line for line in resolver.settings]
             i += 1
         if i > 4:
             new_xml.append('\t</category>')
@@ -333,14 +715,14 @@ def _update_settings_xml():
     i = 0
     cat_count = 2
     for resolver in resolvers:
-        if not resolver.isUniversal():
+        if not resolver.universal:
             if i > MAX_SETTINGS:
                 new_xml.append('\t</category>')
                 new_xml.append('\t<category label="%s %s">' % (common.i18n('resolvers'), cat_count))
                 cat_count += 1
                 i = 0
             new_xml.append('\t\t<setting label="%s" type="lsep"/>' % resolver.name)
-            res_xml = resolver.get_settings_xml()
+            res_xml = resolver.settings
             new_xml += ['\t\t' + line for line in res_xml]
             i += len(res_xml) + 1
 
@@ -372,9 +754,11 @@ def _update_settings_xml():
             raise
         if cleanup_settings():
             common.logger.log_debug('Cleaned User Settings XML')
+        common.invalidate_settings()
 
     else:
         common.logger.log_debug('No Settings Update Needed')
+    _write_settings_stamp(fingerprint)
 
 
 _update_settings_xml()
@@ -21,7 +21,7 @@ from resolveurl.lib import log_utils
 from resolveurl.lib.net import Net, get_ua  # @UnusedImport  # NOQA
 from resolveurl.lib import cache  # @UnusedImport  # NOQA
 from resolveurl.lib import kodi
-from resolveurl.lib import pyaes
+from resolveurl.lib import crypto
 from random import choice
 
 logger = log_utils.Logger.get_logger()
@@ -35,6 +35,8 @@ addon_version = kodi.get_version()
 kodi_version = kodi.kodi_version()
 get_setting = kodi.get_setting
 set_setting = kodi.set_setting
+invalidate_settings = kodi.invalidate_settings
+get_settings_version = kodi.get_settings_version
 open_settings = kodi.open_settings
 has_addon = kodi.has_addon
 i18n = kodi.i18n
@@ -87,9 +89,7 @@ def decrypt_py(cipher_text, key):
         try:
             scraper_key = hashlib.sha256(key).digest()
             IV = '\0' * 16
-            decrypter = pyaes.Decrypter(pyaes.AESModeOfOperationCBC(scraper_key, IV))
-            plain_text = decrypter.feed(cipher_text)
-            plain_text += decrypter.feed()
+            plain_text = crypto.aes_cbc_decrypt(scraper_key, IV, cipher_text)
             if 'import' not in plain_text:
                 plain_text = ''
         except Exception as e:
@@ -106,9 +106,7 @@ def encrypt_py(plain_text, key):
         try:
             scraper_key = hashlib.sha256(key).digest()
             IV = '\0' * 16
-            decrypter = pyaes.Encrypter(pyaes.AESModeOfOperationCBC(scraper_key, IV))
-            cipher_text = decrypter.feed(plain_text)
-            cipher_text += decrypter.feed()
+            cipher_text = crypto.aes_cbc_encrypt(scraper_key, IV, plain_text)
         except Exception as e:
             logger.log_warning('Exception during Py Encrypt: %s' % (e))
             cipher_text = ''
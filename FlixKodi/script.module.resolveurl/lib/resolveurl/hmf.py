@@ -17,12 +17,38 @@
 """
 import re
 import six
-from six.moves import urllib_error, urllib_request, urllib_parse
+import time
+from six.moves import urllib_parse
 import inspect
 import resolveurl
 from resolveurl import common
+from resolveurl.lib import kodi
+from resolveurl.lib import stream_cache, telemetry
+from resolveurl.lib.circuit_breaker import breaker, CircuitOpenError, is_host_failure, get_failure, save_failure
+from resolveurl.lib.stream_probe import prober
+from resolveurl.lib.workers import futures, api_limiter
+from resolveurl.resolver import ResolverError
 
 resolver_cache = {}
+RACE_WORKERS = 3
+RACE_GRACE = 1.5
+TOP_DOMAIN = re.compile(r"(?:www\.)?([\w\-]*\.[\w\-]{2,5}(?:\.[\w\-]{2,5})?)$")
+
+
+def top_domain(url):
+    """
+    Returns the lower case domain that resolvers are looked up by, e.g.
+    ``example.com`` for ``http://www.example.com/embed/123``.
+    """
+    elements = urllib_parse.urlparse(url)
+    domain = elements.netloc or elements.path
+    domain = domain.split('@')[-1].split(':')[0]
+    res = TOP_DOMAIN.search(domain)
+    if res:
+        # domain = res.group(1)
+        domain = '.'.join(res.group(1).split('.')[-2:])
+    domain = domain.lower()
+    return domain
 
 
 class HostedMediaFile:
@@ -62,13 +88,15 @@ class HostedMediaFile:
         must pass either ``url`` or ``host`` AND ``media_id``.
     """
 
-    def __init__(self, url='', host='', media_id='', title='', include_disabled=False, include_universal=None, include_popups=None, return_all=False, subs=False, content_type=False):
+    def __init__(self, url='', host='', media_id='', title='', include_disabled=False, include_universal=None, include_popups=None, return_all=False, subs=False, content_type=False, unrestrict=False):
         """
         Args:
             url (str): a URL to a web page that represents a piece of media.
             host (str): the host of the media to be represented.
             media_id (str): the unique ID given to the media by the host.
             return_all (boolean): return all playable files in magnets
+            unrestrict (boolean): with return_all, also resolve every returned
+            link to a stream url (concurrently); see :meth:`ResolveUrl.unrestrict_all`
             subs (boolean): return subtitles if included by the embedder
         """
         if not url and not (host and media_id) or (url and (host or media_id)):
@@ -78,8 +106,11 @@ class HostedMediaFile:
         self._media_id = media_id
         self._valid_url = None
         self._return_all = return_all
+        self._unrestrict = unrestrict
         self._subs = subs
         self._content_type = content_type
+        self._probe_latency = None
+        self.__latencies = {}
         self.title = title if title else self._host
 
         if self._url:
@@ -111,25 +142,16 @@ class HostedMediaFile:
         resolvers = []
         for klass in klasses:
             if klass in resolver_cache:
-                common.logger.log_debug('adding resolver from cache: %s' % klass)
+                common.logger.log_debug('adding resolver from cache: %s', klass)
                 resolvers.append(resolver_cache[klass])
             else:
-                common.logger.log_debug('adding resolver to cache: %s' % klass)
+                common.logger.log_debug('adding resolver to cache: %s', klass)
                 resolver_cache[klass] = klass()
                 resolvers.append(resolver_cache[klass])
         return resolvers
 
     def __top_domain(self, url):
-        elements = urllib_parse.urlparse(url)
-        domain = elements.netloc or elements.path
-        domain = domain.split('@')[-1].split(':')[0]
-        regex = r"(?:www\.)?([\w\-]*\.[\w\-]{2,5}(?:\.[\w\-]{2,5})?)$"
-        res = re.search(regex, domain)
-        if res:
-            # domain = res.group(1)
-            domain = '.'.join(res.group(1).split('.')[-2:])
-        domain = domain.lower()
-        return domain
+        return top_domain(url)
 
     def get_url(self):
         """
@@ -149,6 +171,20 @@ class HostedMediaFile:
         """
         return self._media_id
 
+    def get_probe_latency(self):
+        """
+        Returns the seconds the resolved stream took to answer its probe, or
+        None if it was not probed (e.g. it came from the stream cache).
+        """
+        return self._probe_latency
+
+    def is_available(self):
+        """
+        Returns False while the host of this :class:`HostedMediaFile` is
+        considered down (see :mod:`resolveurl.lib.circuit_breaker`).
+        """
+        return not breaker.is_open(self._domain)
+
     def get_resolvers(self, validated=False):
         """
         Returns the list of resolvers of this :class:`HostedMediaFile`.
@@ -157,7 +193,7 @@ class HostedMediaFile:
             self.valid_url()
         return self.__resolvers
 
-    def resolve(self, include_universal=True, allow_popups=True):
+    def resolve(self, include_universal=True, allow_popups=True, race=None):
         """
         Resolves this :class:`HostedMediaFile` to a media URL.
 
@@ -171,6 +207,11 @@ class HostedMediaFile:
             allow_popups: If False, then any resolver dependent on a pop-up dialog (e.g. captcha, /pair, etc) are not
             allowed to be resolvers (does not include premium or debrid hosts)
 
+            race: If True, up to ``race_workers`` host resolvers in a row that need no popups are tried
+            concurrently and the highest priority one that returns a playable stream within the grace window
+            wins; universal resolvers and magnet links are always tried one by one. Defaults to the
+            ``race_resolvers`` setting.
+
         .. note::
 
             This method currently uses just the highest priority resolver to
@@ -183,46 +224,57 @@ class HostedMediaFile:
             A direct URL to the media file that is playable by XBMC, or False
             if this was not possible.
         """
-        for resolver in self.__resolvers:
+        # whatever the result depends on besides the url
+        options = [include_universal, allow_popups, bool(self._return_all), bool(self._subs), bool(self._content_type),
+                   bool(self._unrestrict), [type(resolver).__name__ for resolver in self.__resolvers]]
+        failure = get_failure(self._url, options)
+        if failure is not None:
+            common.logger.log_debug('Skipping recently failed link: %s' % self._url)
+            self.__resolvers = []
+            self._valid_url = False
+            if failure:
+                raise ResolverError(failure)
+            return False
+
+        # a cancelled transfer (or one kept in the background) is no reason to refuse the link next time
+        cancellations = kodi.get_cancellations()
+        try:
+            result = self.__resolve(include_universal, allow_popups, race)
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError) and kodi.get_cancellations() == cancellations:
+                save_failure(self._url, str(e) or type(e).__name__, options)
+            raise
+        if not result and kodi.get_cancellations() == cancellations:
+            save_failure(self._url, options=options)
+        return result
+
+    def __resolve(self, include_universal, allow_popups, race):
+        if race is None:
+            race = common.get_setting('race_resolvers') == 'true'
+        race = race and futures is not None and not self._url.lower().startswith('magnet:')
+
+        raced = []
+        for i, resolver in enumerate(self.__resolvers):
+            if resolver in raced:
+                continue
             try:
                 if (include_universal or not resolver.isUniversal()) and (allow_popups or not resolver.isPopup()):
                     if resolver.valid_url(self._url, self._host):
+                        group = self.__race_group(i, include_universal) if race and self.__can_race(resolver) else []
+                        if len(group) > 1:
+                            raced.extend(group)
+                            won = self.__race(group)
+                            if won:
+                                return self.__accept(*won)
+                            continue
                         common.logger.log_debug('Resolving using %s plugin' % resolver.name)
-                        resolver.login()
-                        self._host, self._media_id = resolver.get_host_and_id(self._url)
-                        if six.PY3:
-                            spec = inspect.getfullargspec(resolver.get_media_url)
-                        else:
-                            spec = inspect.getargspec(resolver.get_media_url)
-                        no_subs_support = 'subs' not in spec.args
-                        subtitles = {}
-
-                        if self._return_all and resolver.isUniversal():
-                            url_list = resolver.get_media_url(self._host, self._media_id, return_all=self._return_all)
-                            self.__resolvers = [resolver]
-                            self._valid_url = True
-                            return url_list
-                        elif resolver.isUniversal() or self._subs is False or no_subs_support:
-                            stream_url = resolver.get_media_url(self._host, self._media_id)
-                        else:
-                            stream_url, subtitles = resolver.get_media_url(self._host, self._media_id, subs=self._subs)
-
-                        if stream_url and stream_url.startswith("//"):
-                            stream_url = 'http:%s' % stream_url
-                        if stream_url:
-                            status, mimetype = self.__test_stream(stream_url)
-                            if status:
-                                self.__resolvers = [resolver]  # Found a working resolver, throw out the others
-                                self._valid_url = True
-                                surl = {'url': stream_url}
-                                if self._subs:
-                                    surl.update({'subs': subtitles})
-                                if self._content_type:
-                                    surl.update({'content-type': mimetype})
-                                if self._subs or self._content_type:
-                                    return surl
-                                return stream_url
+                        attempt = self.__attempt(resolver)
+                        if attempt:
+                            return self.__accept(resolver, attempt)
             except Exception as e:
+                if resolver in raced:
+                    # already logged, a race only raises when it ran the last resolver
+                    raise
                 url = self._url.encode('utf-8') if isinstance(self._url, six.text_type) and six.PY2 else self._url
                 common.logger.log_error('%s Error - From: %s Link: %s: %s' % (type(e).__name__, resolver.name, url, e))
                 if resolver == self.__resolvers[-1]:
@@ -234,6 +286,200 @@ class HostedMediaFile:
         self._valid_url = False
         return False
 
+    def __can_race(self, resolver):
+        # universal resolvers go through debrid accounts and popup ones need the user, neither is raced
+        return not resolver.isUniversal() and not resolver.isPopup()
+
+    def __race_group(self, start, include_universal):
+        """
+        Returns the resolvers from ``start`` on that can be raced against
+        each other: up to ``race_workers`` of them, stopping at the first
+        valid resolver that has to run on its own so priorities are kept.
+        """
+        try:
+            workers = max(1, int(common.get_setting('race_workers')))
+        except ValueError:
+            workers = RACE_WORKERS
+        group = []
+        for resolver in self.__resolvers[start:]:
+            if len(group) == workers:
+                break
+            if not include_universal and resolver.isUniversal():
+                continue
+            try:
+                if not resolver.valid_url(self._url, self._host):
+                    continue
+            except Exception as e:
+                common.logger.log_error('%s Error - From: %s Link: %s: %s' % (type(e).__name__, resolver.name, self._url, e))
+                continue
+            if not self.__can_race(resolver):
+                break
+            group.append(resolver)
+        return group
+
+    def __attempt(self, resolver):
+        """
+        Runs a single resolver against this media file.
+
+        Returns a tuple of (host, media_id, result) where result is what
+        :meth:`resolve` should return, or None if the resolver did not
+        produce a playable stream.
+        """
+        # only host resolvers speak for the health of the host, universal ones go through their own service
+        guarded = not resolver.isUniversal()
+        if guarded and not breaker.allow(self._domain):
+            raise CircuitOpenError('%s is not responding, skipped for now' % self._domain)
+
+        cacheable = not (self._return_all and resolver.isUniversal())
+        options = {'subs': bool(self._subs), 'content_type': bool(self._content_type)}
+        if cacheable:
+            cached = stream_cache.get(resolver, self._url, options)
+            if cached:
+                common.logger.log_debug('Using cached stream from %s plugin' % resolver.name)
+                return cached
+
+        start = time.time()
+        try:
+            attempt = self.__fetch(resolver, cacheable, options)
+        except kodi.DialogSuppressed:
+            # not a failure, it is tried again where it can show the dialog
+            raise
+        except Exception as e:
+            telemetry.record(resolver, self._domain, False, time.time() - start, type(e).__name__)
+            if guarded:
+                if is_host_failure(e):
+                    breaker.failure(self._domain)
+                else:
+                    breaker.success(self._domain)
+            raise
+        telemetry.record(resolver, self._domain, attempt is not None, time.time() - start, None if attempt else 'NoStream')
+        if guarded:
+            # the host answered, even if it had no stream for this link
+            breaker.success(self._domain)
+        return attempt
+
+    def __fetch(self, resolver, cacheable, options):
+        host, media_id = resolver.get_host_and_id(self._url)
+        if six.PY3:
+            spec = inspect.getfullargspec(resolver.get_media_url)
+        else:
+            spec = inspect.getargspec(resolver.get_media_url)
+        no_subs_support = 'subs' not in spec.args
+        subtitles = {}
+
+        with api_limiter.slot(type(resolver).__name__ if resolver.isUniversal() else None):
+            resolver.login()
+            if self._return_all and resolver.isUniversal():
+                url_list = resolver.get_media_url(host, media_id, return_all=self._return_all)
+            elif resolver.isUniversal() or self._subs is False or no_subs_support:
+                stream_url = resolver.get_media_url(host, media_id)
+            else:
+                stream_url, subtitles = resolver.get_media_url(host, media_id, subs=self._subs)
+
+        if self._return_all and resolver.isUniversal():
+            # outside the api slot, unrestrict_all takes its own slots for every link
+            if self._unrestrict and url_list:
+                url_list = resolver.unrestrict_all(url_list)
+            return host, media_id, url_list
+
+        if stream_url and stream_url.startswith("//"):
+            stream_url = 'http:%s' % stream_url
+        if stream_url:
+            probe = prober.probe(stream_url)
+            self.__latencies[resolver] = probe.latency
+            if probe.ok:
+                surl = {'url': stream_url}
+                if self._subs:
+                    surl.update({'subs': subtitles})
+                if self._content_type:
+                    surl.update({'content-type': probe.mimetype})
+                if self._subs or self._content_type:
+                    attempt = (host, media_id, surl)
+                else:
+                    attempt = (host, media_id, stream_url)
+                if cacheable:
+                    stream_cache.save(resolver, self._url, options, attempt, stream_url, probe.headers)
+                return attempt
+        return None
+
+    def __accept(self, resolver, attempt):
+        self._host, self._media_id, result = attempt
+        self._probe_latency = self.__latencies.get(resolver)
+        self.__resolvers = [resolver]  # Found a working resolver, throw out the others
+        self._valid_url = True
+        return result
+
+    def __race(self, candidates):
+        """
+        Tries ``candidates`` (in priority order) on a thread pool and returns
+        the winning ``(resolver, attempt)``, or None.
+
+        Once a resolver succeeds, higher priority resolvers that are still
+        running get RACE_GRACE seconds to succeed as well; the highest
+        priority success wins and the remaining attempts are ignored. Raced
+        attempts cannot show dialogs, a resolver that wants one is tried
+        again on its own once no other resolver won.
+        """
+        common.logger.log_debug('Racing %s resolvers', [r.name for r in candidates])
+
+        executor = futures.ThreadPoolExecutor(max_workers=len(candidates))
+        pending = dict((executor.submit(self.__quiet_attempt, resolver), i) for i, resolver in enumerate(candidates))
+        best = None
+        deadline = None
+        error = None
+        interactive = []
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0, deadline - time.time())
+                done, _ = futures.wait(list(pending), timeout=timeout, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    try:
+                        attempt = future.result()
+                    except kodi.DialogSuppressed:
+                        interactive.append(i)
+                        continue
+                    except Exception as e:
+                        common.logger.log_error('%s Error - From: %s Link: %s: %s' % (type(e).__name__, candidates[i].name, self._url, e))
+                        if candidates[i] == self.__resolvers[-1]:
+                            error = e
+                        continue
+                    if attempt and (best is None or i < best[0]):
+                        best = (i, attempt)
+                        if deadline is None:
+                            deadline = time.time() + RACE_GRACE
+
+                if best is not None and (time.time() >= deadline or all(i > best[0] for i in pending.values())):
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        if best is not None:
+            common.logger.log_debug('Race won by %s plugin' % candidates[best[0]].name)
+            return candidates[best[0]], best[1]
+
+        for i in sorted(interactive):
+            common.logger.log_debug('Resolving using %s plugin' % candidates[i].name)
+            try:
+                attempt = self.__attempt(candidates[i])
+            except Exception as e:
+                common.logger.log_error('%s Error - From: %s Link: %s: %s' % (type(e).__name__, candidates[i].name, self._url, e))
+                if candidates[i] == self.__resolvers[-1]:
+                    error = e
+                continue
+            if attempt:
+                return candidates[i], attempt
+
+        if error is not None:
+            raise error
+        return None
+
+    def __quiet_attempt(self, resolver):
+        with kodi.QuietDialogs():
+            return self.__attempt(resolver)
+
     def valid_url(self):
         """
         Returns True if the ``HostedMediaFile`` can be resolved.
@@ -262,85 +508,6 @@ class HostedMediaFile:
             self._valid_url = True if resolvers else False
         return self._valid_url
 
-    def __test_stream(self, stream_url):
-        """
-        Returns True if the stream_url gets a non-failure http status (i.e. <400) back from the server
-        otherwise return False
-
-        Intended to catch stream urls returned by resolvers that would fail to playback
-        """
-        # parse_qsl doesn't work because it splits elements by ';' which can be in a non-quoted UA
-        if '|' in stream_url:
-            headers = dict([item.split('=') for item in (stream_url.split('|')[1]).split('&')])
-        else:
-            headers = {'User-Agent': common.FF_USER_AGENT}
-        for header in headers:
-            headers[header] = urllib_parse.unquote_plus(headers[header])
-        common.logger.log_debug('Setting Headers on UrlOpen: %s' % headers)
-
-        try:
-            import ssl
-            ssl_context = ssl._create_unverified_context()
-            ssl._create_default_https_context = ssl._create_unverified_context
-            ssl_context.set_alpn_protocols(['http/1.1'])
-            opener = urllib_request.build_opener(urllib_request.HTTPSHandler(context=ssl_context))
-            urllib_request.install_opener(opener)
-        except:
-            pass
-
-        try:
-            msg = ''
-            mimetype = ''
-            if 'verifypeer' in headers.keys():
-                headers.pop('verifypeer')
-
-            headers.update({'Accept-Encoding': 'gzip'})
-            if not any(x in stream_url for x in ['.m3u8', '/hls/', '/playlist/']):
-                headers.update({'Range': 'bytes=0-1023'})
-
-            request = urllib_request.Request(stream_url.split('|')[0], headers=headers)
-            if six.PY3:
-                #  set urlopen timeout to 15 seconds
-                with urllib_request.urlopen(request, timeout=15) as resp:
-                    http_code = resp.code
-                    mimetype = resp.headers.get('Content-Type')
-                    resp.close()
-            else:
-                resp = urllib_request.urlopen(request, timeout=15)
-                http_code = resp.getcode()
-                mimetype = resp.info().get('Content-Type')
-                resp.close()
-        except urllib_error.HTTPError as e:
-            if isinstance(e, urllib_error.HTTPError):
-                http_code = e.code
-                if http_code in [403, 405, 472]:
-                    http_code = 200
-            else:
-                http_code = 600
-        except urllib_error.URLError as e:
-            http_code = 500
-            if hasattr(e, 'reason'):
-                # treat an unhandled url type as success
-                if 'unknown url type' in str(e.reason).lower():
-                    return True
-                else:
-                    msg = e.reason
-            if not msg:
-                msg = str(e)
-
-        except Exception as e:
-            http_code = 601
-            msg = str(e)
-            if msg == "''" or 'timed out' in msg:
-                http_code = 504
-
-        # added this log line for now so that we can catch any logs on streams that are rejected due to test_stream failures
-        # we can remove it once we are sure this works reliably
-        if int(http_code) >= 400 and int(http_code) != 504:
-            common.logger.log_warning('Stream UrlOpen Failed: Url: %s HTTP Code: %s Msg: %s' % (stream_url, http_code, msg))
-
-        return (int(http_code) < 400 or int(http_code) == 504, mimetype)
-
     def __bool__(self):
         return self.__nonzero__()
 
@@ -14,19 +14,37 @@
 
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Results are kept in a single SQLite (WAL) database with created/expires
+columns and a total size cap enforced by evicting the least recently used
+rows. A small in-process LRU sits in front of the database so repeated
+lookups within one Kodi invocation never touch the disk.
 """
 import functools
 from resolveurl.lib import log_utils
 import time
 import pickle
 import hashlib
+import json
 import os
-import shutil
+import threading
+import collections
 import six
 from resolveurl.lib import kodi
 
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
 logger = log_utils.Logger.get_logger(__name__)
 
+DB_VERSION = 1
+MAX_DB_SIZE = 16 * 1024 * 1024
+MAX_MEM_ITEMS = 256
+EVICT_EVERY = 50
+ACCESS_RESOLUTION = 60
+
 try:
     cache_path = kodi.translate_path(os.path.join(kodi.get_profile(), 'cache'))
     if not os.path.exists(cache_path):
@@ -34,18 +52,75 @@ try:
 except Exception as e:
     logger.log('Failed to create cache: %s: %s' % (cache_path, e), log_utils.LOGWARNING)
 
-cache_enabled = kodi.get_setting('use_cache') == 'true'
+cache_enabled = kodi.get_setting('use_cache') == 'true' and sqlite3 is not None
+db_file = os.path.join(cache_path, 'function_cache.db')
+
+_local = threading.local()
+_lock = threading.Lock()
+_mem_cache = collections.OrderedDict()
+_writes = 0
+
+
+def _get_db():
+    db = getattr(_local, 'db', None)
+    if db is None:
+        db = sqlite3.connect(db_file, timeout=10)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        if db.execute('PRAGMA user_version').fetchone()[0] != DB_VERSION:
+            _create_db(db)
+        _local.db = db
+    return db
+
+
+def _create_db(db):
+    with db:
+        db.execute('DROP TABLE IF EXISTS function_cache')
+        db.execute('CREATE TABLE function_cache (key TEXT PRIMARY KEY, created REAL, expires REAL, accessed REAL, size INTEGER, value BLOB)')
+        db.execute('CREATE INDEX function_cache_accessed ON function_cache (accessed)')
+        db.execute('PRAGMA user_version=%d' % DB_VERSION)
+
+    # remove the pickle files left behind by the file based cache
+    for filename in os.listdir(cache_path):
+        if len(filename) == 96:
+            try:
+                os.remove(os.path.join(cache_path, filename))
+            except OSError:
+                pass
 
 
 def reset_cache():
+    with _lock:
+        _mem_cache.clear()
     try:
-        shutil.rmtree(cache_path)
+        if sqlite3 is not None and os.path.exists(db_file):
+            db = _get_db()
+            with db:
+                db.execute('DELETE FROM function_cache')
+            db.execute('VACUUM')
         return True
     except Exception as e:
         logger.log('Failed to Reset Cache: %s' % (e), log_utils.LOGWARNING)
         return False
 
 
+def _mem_get(key):
+    with _lock:
+        item = _mem_cache.get(key)
+        if item is not None:
+            del _mem_cache[key]
+            _mem_cache[key] = item
+        return item
+
+
+def _mem_put(key, item):
+    with _lock:
+        _mem_cache.pop(key, None)
+        _mem_cache[key] = item
+        while len(_mem_cache) > MAX_MEM_ITEMS:
+            _mem_cache.popitem(last=False)
+
+
 def _get_func(name, args=None, kwargs=None, cache_limit=1):
     if not cache_enabled:
         return False, None
@@ -55,45 +130,112 @@ def _get_func(name, args=None, kwargs=None, cache_limit=1):
         args = []
     if kwargs is None:
         kwargs = {}
-    full_path = os.path.join(cache_path, _get_filename(name, args, kwargs))
-    if os.path.exists(full_path):
-        mtime = os.path.getmtime(full_path)
-        if mtime >= max_age:
-            if six.PY2:
-                with open(full_path, 'r') as f:
-                    pickled_result = f.read()
-            else:
-                with open(full_path, 'rb') as f:
-                    pickled_result = f.read()
-            return True, pickle.loads(pickled_result)
+    key = _get_key(name, args, kwargs)
+    item = _mem_get(key)
+    if item is None:
+        try:
+            db = _get_db()
+            row = db.execute('SELECT created, expires, accessed, value FROM function_cache WHERE key=?', (key,)).fetchone()
+        except Exception as e:
+            logger.log('Failure during cache read: %s' % (e), log_utils.LOGWARNING)
+            return False, None
+        if row is None:
+            return False, None
+
+        created, expires, accessed, pickled_result = row
+        pickled_result = bytes(pickled_result) if six.PY3 else str(pickled_result)
+        item = (created, expires, pickled_result)
+        _mem_put(key, item)
+        if created >= max_age and expires >= now and accessed < now - ACCESS_RESOLUTION:
+            try:
+                with db:
+                    db.execute('UPDATE function_cache SET accessed=? WHERE key=?', (now, key))
+            except Exception:
+                pass
+
+    created, expires, pickled_result = item
+    if created >= max_age and expires >= now:
+        return True, pickle.loads(pickled_result)
 
     return False, None
 
 
-def _save_func(name, args=None, kwargs=None, result=None):
+def _save_func(name, args=None, kwargs=None, result=None, cache_limit=1):
+    global _writes
+    if not cache_enabled:
+        return
     try:
         if args is None:
             args = []
         if kwargs is None:
             kwargs = {}
+        now = time.time()
+        expires = now + (cache_limit * 60 * 60)
         pickled_result = pickle.dumps(result)
-        full_path = os.path.join(cache_path, _get_filename(name, args, kwargs))
-        if six.PY2:
-            with open(full_path, 'w') as f:
-                f.write(pickled_result)
-        else:
-            with open(full_path, 'wb') as f:
-                f.write(pickled_result)
+        key = _get_key(name, args, kwargs)
+        _mem_put(key, (now, expires, pickled_result))
+        db = _get_db()
+        with db:
+            db.execute('INSERT OR REPLACE INTO function_cache (key, created, expires, accessed, size, value) VALUES (?, ?, ?, ?, ?, ?)',
+                       (key, now, expires, now, len(pickled_result), sqlite3.Binary(pickled_result)))
+        _writes += 1
+        if _writes % EVICT_EVERY == 1:
+            _evict(db, now)
     except Exception as e:
         logger.log('Failure during cache write: %s' % (e), log_utils.LOGWARNING)
 
 
-def _get_filename(name, args, kwargs):
-    if six.PY2:
-        arg_hash = hashlib.md5(name).hexdigest() + hashlib.md5(str(args)).hexdigest() + hashlib.md5(str(kwargs)).hexdigest()
-    else:
-        arg_hash = hashlib.md5(name.encode('utf8')).hexdigest() + hashlib.md5(str(args).encode('utf8')).hexdigest() + hashlib.md5(str(kwargs).encode('utf8')).hexdigest()
-    return arg_hash
+def _evict(db, now):
+    """
+    Drops expired rows, then the least recently used rows until the cache is
+    back under MAX_DB_SIZE.
+    """
+    with db:
+        db.execute('DELETE FROM function_cache WHERE expires < ?', (now,))
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM function_cache').fetchone()[0]
+        if total > MAX_DB_SIZE:
+            stale = []
+            for key, size in db.execute('SELECT key, size FROM function_cache ORDER BY accessed'):
+                if total <= MAX_DB_SIZE * 3 // 4:
+                    break
+                stale.append((key,))
+                total -= size
+            db.executemany('DELETE FROM function_cache WHERE key=?', stale)
+            logger.log_debug('Evicted %d cache entries', len(stale))
+
+
+def _normalize(obj, depth=0):
+    """
+    Converts call arguments into plain JSON data so that the cache key does
+    not depend on the repr() of the objects passed.
+    """
+    if obj is None or isinstance(obj, (bool, float) + six.integer_types):
+        return obj
+    if isinstance(obj, six.text_type):
+        return obj
+    if isinstance(obj, six.binary_type):
+        return {'__bytes__': obj.decode('latin-1')}
+    if depth > 8:
+        return '<%s>' % (type(obj).__name__)
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(item, depth + 1) for item in obj]
+    if isinstance(obj, dict):
+        return {'__dict__': sorted(([_normalize(k, depth + 1), _normalize(v, depth + 1)] for k, v in obj.items()), key=_sort_key)}
+    if isinstance(obj, (set, frozenset)):
+        return {'__set__': sorted((_normalize(item, depth + 1) for item in obj), key=_sort_key)}
+    if hasattr(obj, '__dict__'):
+        return {'__object__': '%s.%s' % (type(obj).__module__, type(obj).__name__),
+                'state': _normalize(dict((k, v) for k, v in vars(obj).items() if not k.startswith('_')), depth + 1)}
+    return {'__object__': '%s.%s' % (type(obj).__module__, type(obj).__name__), 'repr': repr(obj)}
+
+
+def _sort_key(item):
+    return json.dumps(item, sort_keys=True)
+
+
+def _get_key(name, args, kwargs):
+    data = json.dumps([_normalize(list(args)), _normalize(kwargs)], sort_keys=True, separators=(',', ':'))
+    return '%s:%s' % (name, hashlib.sha1(data.encode('utf8')).hexdigest())
 
 
 def cache_method(cache_limit):
@@ -108,12 +250,13 @@ def cache_method(cache_limit):
                 real_args = args
             in_cache, result = _get_func(full_name, real_args, kwargs, cache_limit=cache_limit)
             if in_cache:
-                logger.log('Using method cache for: |%s|%s|%s| -> |%d|' % (full_name, args, kwargs, len(pickle.dumps(result))), log_utils.LOGDEBUG)
+                if logger.is_enabled_for(log_utils.LOGDEBUG):
+                    logger.log_debug('Using method cache for: |%s|%s|%s| -> |%d|', full_name, args, kwargs, len(pickle.dumps(result)))
                 return result
             else:
-                logger.log('Calling cached method: |%s|%s|%s|' % (full_name, args, kwargs), log_utils.LOGDEBUG)
+                logger.log_debug('Calling cached method: |%s|%s|%s|', full_name, args, kwargs)
                 result = func(*args, **kwargs)
-                _save_func(full_name, real_args, kwargs, result)
+                _save_func(full_name, real_args, kwargs, result, cache_limit=cache_limit)
                 return result
         return memoizer
     return wrap
@@ -127,12 +270,13 @@ def cache_function(cache_limit):
             name = func.__name__
             in_cache, result = _get_func(name, args, kwargs, cache_limit=cache_limit)
             if in_cache:
-                logger.log('Using function cache for: |%s|%s|%s| -> |%d|' % (name, args, kwargs, len(pickle.dumps(result))), log_utils.LOGDEBUG)
+                if logger.is_enabled_for(log_utils.LOGDEBUG):
+                    logger.log_debug('Using function cache for: |%s|%s|%s| -> |%d|', name, args, kwargs, len(pickle.dumps(result)))
                 return result
             else:
-                logger.log('Calling cached function: |%s|%s|%s|' % (name, args, kwargs), log_utils.LOGDEBUG)
+                logger.log_debug('Calling cached function: |%s|%s|%s|', name, args, kwargs)
                 result = func(*args, **kwargs)
-                _save_func(name, args, kwargs, result)
+                _save_func(name, args, kwargs, result, cache_limit=cache_limit)
                 return result
         return memoizer
     return wrap
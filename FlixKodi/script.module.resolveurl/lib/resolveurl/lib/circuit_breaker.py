@@ -0,0 +1,162 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Stops resolving links of hosts that are down.
+
+:data:`breaker` counts consecutive host failures (connection errors,
+timeouts and HTTP 5xx) per link domain; any other outcome resets the count. After FAILURE_THRESHOLD
+of them the circuit of that domain opens and its host resolvers are skipped
+for COOL_DOWN seconds. After that a single trial attempt is let through
+(half open): a success closes the circuit, a failure opens it again for
+twice as long, up to MAX_COOL_DOWN.
+
+Failed web URLs are also remembered for FAILURE_TTL seconds, so resolving
+the same dead link again with the same options fails without any request.
+Attempts the user cancelled are not remembered. Both are kept in the
+function cache, so they are shared between Kodi invocations and cleared by
+"reset cache".
+"""
+import socket
+import threading
+import time
+from six.moves import urllib_error
+from resolveurl.lib import cache
+from resolveurl.resolver import ResolverError
+
+FAILURE_THRESHOLD = 5
+COOL_DOWN = 60
+MAX_COOL_DOWN = 15 * 60
+# a half open circuit lets another trial through if the first one never reported back
+TRIAL_TIMEOUT = 60
+FAILURE_TTL = 5 * 60
+CIRCUIT_CACHE = 'circuit_breaker'
+FAILURE_CACHE = 'failed_url'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(ResolverError):
+    pass
+
+
+def is_host_failure(e):
+    """
+    Returns True if the exception ``e`` hints at a host that is down or
+    misbehaving: a connection error, a timeout or an HTTP 5xx. A
+    ResolverError is about the link (a removed file, a cancelled transfer,
+    ...) and does not count.
+    """
+    if isinstance(e, urllib_error.HTTPError):
+        return e.code >= 500
+    return isinstance(e, (urllib_error.URLError, socket.timeout, socket.error))
+
+
+class CircuitBreaker(object):
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cool_down=COOL_DOWN, max_cool_down=MAX_COOL_DOWN):
+        self.threshold = threshold
+        self.cool_down = cool_down
+        self.max_cool_down = max_cool_down
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def _get(self, domain):
+        circuit = self._circuits.get(domain)
+        if circuit is None:
+            in_cache, circuit = cache._get_func(CIRCUIT_CACHE, [domain], cache_limit=self.max_cool_down / 3600.0)
+            if not in_cache:
+                circuit = {'state': CLOSED, 'failures': 0, 'opened': 0, 'cool_down': self.cool_down}
+            self._circuits[domain] = circuit
+        return circuit
+
+    def _save(self, domain, circuit):
+        cache._save_func(CIRCUIT_CACHE, [domain], result=circuit, cache_limit=self.max_cool_down / 3600.0)
+
+    def state(self, domain, now=None):
+        """
+        Returns CLOSED, OPEN or HALF_OPEN, where OPEN means no attempt on
+        ``domain`` would be allowed right now.
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            circuit = self._get(domain)
+            if circuit['state'] == OPEN and now - circuit['opened'] >= circuit['cool_down']:
+                return HALF_OPEN
+            if circuit['state'] == HALF_OPEN and now - circuit['opened'] >= TRIAL_TIMEOUT:
+                return HALF_OPEN
+            return circuit['state'] if circuit['state'] == CLOSED else OPEN
+
+    def is_open(self, domain):
+        return self.state(domain) == OPEN
+
+    def allow(self, domain):
+        """
+        Returns True if a resolver may try a link of ``domain``. Once the
+        cool down of an open circuit has passed this returns True for one
+        caller, whose attempt decides whether the circuit closes again.
+        """
+        now = time.time()
+        with self._lock:
+            circuit = self._get(domain)
+            if circuit['state'] == CLOSED:
+                return True
+            if circuit['state'] == OPEN and now - circuit['opened'] < circuit['cool_down']:
+                return False
+            if circuit['state'] == HALF_OPEN and now - circuit['opened'] < TRIAL_TIMEOUT:
+                return False
+            circuit['state'] = HALF_OPEN
+            circuit['opened'] = now
+            self._save(domain, circuit)
+            return True
+
+    def success(self, domain):
+        with self._lock:
+            circuit = self._get(domain)
+            if circuit['state'] != CLOSED or circuit['failures']:
+                circuit.update({'state': CLOSED, 'failures': 0, 'opened': 0, 'cool_down': self.cool_down})
+                self._save(domain, circuit)
+
+    def failure(self, domain):
+        now = time.time()
+        with self._lock:
+            circuit = self._get(domain)
+            circuit['failures'] += 1
+            if circuit['state'] == HALF_OPEN:
+                circuit.update({'state': OPEN, 'opened': now, 'cool_down': min(circuit['cool_down'] * 2, self.max_cool_down)})
+            elif circuit['state'] == CLOSED and circuit['failures'] >= self.threshold:
+                circuit.update({'state': OPEN, 'opened': now, 'cool_down': self.cool_down})
+            self._save(domain, circuit)
+
+
+def get_failure(web_url, options=None):
+    """
+    Returns the error message of a recent failure to resolve ``web_url``
+    with the same ``options`` (a list of whatever the result depends on),
+    '' if it failed without one, or None.
+    """
+    in_cache, msg = cache._get_func(FAILURE_CACHE, [web_url, options or []], cache_limit=FAILURE_TTL / 3600.0)
+    return msg if in_cache else None
+
+
+def save_failure(web_url, msg='', options=None):
+    cache._save_func(FAILURE_CACHE, [web_url, options or []], result=msg, cache_limit=FAILURE_TTL / 3600.0)
+
+
+breaker = CircuitBreaker()
@@ -0,0 +1,335 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+AES and key derivation helpers for resolvers.
+
+The AES work is done by a native library when one is importable
+(pycryptodome as ``Cryptodome`` or ``Crypto``, or ``cryptography``) and by
+the bundled pure python :mod:`resolveurl.lib.pyaes` otherwise. Both paths
+return the same bytes; PKCS#7 padding is always handled here so that
+invalid padding is treated the same way pyaes does (left in place).
+
+    usage:
+
+    from resolveurl.lib import crypto
+    key, iv = crypto.evp_bytes_to_key(password, salt)
+    plain_text = crypto.aes_cbc_decrypt(key, iv, cipher_text)
+
+    python crypto.py  # compares the native and pyaes backends
+
+"""
+import binascii
+import hashlib
+import hmac
+import struct
+import time
+import six
+from resolveurl.lib import pyaes
+from resolveurl.lib.pyaes.util import append_PKCS7_padding, strip_PKCS7_padding
+
+
+def _to_bytes(value):
+    if isinstance(value, six.text_type):
+        return value.encode('latin-1')
+    return bytes(value)
+
+
+def _counter_block(counter):
+    if isinstance(counter, six.integer_types):
+        return struct.pack('>QQ', (counter >> 64) & 0xFFFFFFFFFFFFFFFF, counter & 0xFFFFFFFFFFFFFFFF)
+    return _to_bytes(counter)
+
+
+class _PyaesBackend(object):
+    name = 'pyaes'
+
+    def cbc_encrypt(self, key, iv, data):
+        aes = pyaes.AESModeOfOperationCBC(key, iv)
+        return b''.join(_to_bytes(aes.encrypt(data[i:i + 16])) for i in range(0, len(data), 16))
+
+    def cbc_decrypt(self, key, iv, data):
+        aes = pyaes.AESModeOfOperationCBC(key, iv)
+        return b''.join(_to_bytes(aes.decrypt(data[i:i + 16])) for i in range(0, len(data), 16))
+
+    def ctr(self, key, counter, data):
+        aes = pyaes.AESModeOfOperationCTR(key, pyaes.Counter(_PyGCM._int(counter)))
+        return _to_bytes(aes.encrypt(data))
+
+    def gcm_encrypt(self, key, nonce, data, aad):
+        return _PyGCM(key, nonce).encrypt(data, aad)
+
+    def gcm_decrypt(self, key, nonce, data, tag, aad):
+        return _PyGCM(key, nonce).decrypt(data, tag, aad)
+
+
+class _PyGCM(object):
+    """
+    AES-GCM (NIST SP 800-38D) on top of the pyaes block cipher.
+    """
+    R = 0xE1 << 120
+
+    def __init__(self, key, nonce):
+        self._aes = pyaes.AES(key)
+        self._h = self._int(self._encrypt_block(b'\0' * 16))
+        if len(nonce) == 12:
+            self._j0 = nonce + b'\0\0\0\1'
+        else:
+            self._j0 = self._ghash(b'', nonce)
+
+    def encrypt(self, data, aad):
+        cipher_text = self._ctr(data)
+        return cipher_text, self._tag(aad, cipher_text)
+
+    def decrypt(self, data, tag, aad):
+        if len(tag) < 4 or not hmac.compare_digest(self._tag(aad, data)[:len(tag)], tag):
+            raise ValueError('MAC check failed')
+        return self._ctr(data)
+
+    def _encrypt_block(self, block):
+        return _to_bytes(bytearray(self._aes.encrypt(bytearray(block))))
+
+    def _ctr(self, data):
+        prefix, counter = self._j0[:12], struct.unpack('>I', self._j0[12:])[0]
+        out = []
+        for i in range(0, len(data), 16):
+            counter = (counter + 1) & 0xFFFFFFFF
+            keystream = self._encrypt_block(prefix + struct.pack('>I', counter))
+            chunk = data[i:i + 16]
+            out.append(self._bytes(self._int(chunk) ^ (self._int(keystream[:len(chunk)])), len(chunk)))
+        return b''.join(out)
+
+    def _tag(self, aad, cipher_text):
+        s = self._ghash(aad, cipher_text)
+        return self._bytes(self._int(s) ^ self._int(self._encrypt_block(self._j0)), 16)
+
+    def _ghash(self, aad, cipher_text):
+        y = 0
+        for data in (aad, cipher_text):
+            for i in range(0, len(data), 16):
+                y = self._mult(y ^ self._int(data[i:i + 16].ljust(16, b'\0')))
+        y = self._mult(y ^ ((len(aad) * 8) << 64 | (len(cipher_text) * 8)))
+        return self._bytes(y, 16)
+
+    def _mult(self, x):
+        z, v = 0, self._h
+        for i in range(127, -1, -1):
+            if (x >> i) & 1:
+                z ^= v
+            v = (v >> 1) ^ self.R if v & 1 else v >> 1
+        return z
+
+    @staticmethod
+    def _int(data):
+        return int(binascii.hexlify(data), 16) if data else 0
+
+    @staticmethod
+    def _bytes(value, length):
+        return bytes(bytearray((value >> (8 * i)) & 0xFF for i in range(length - 1, -1, -1)))
+
+
+class _PycryptodomeBackend(object):
+    name = 'pycryptodome'
+
+    def __init__(self, AES):
+        self._AES = AES
+
+    def cbc_encrypt(self, key, iv, data):
+        return self._AES.new(key, self._AES.MODE_CBC, iv).encrypt(data)
+
+    def cbc_decrypt(self, key, iv, data):
+        return self._AES.new(key, self._AES.MODE_CBC, iv).decrypt(data)
+
+    def ctr(self, key, counter, data):
+        return self._AES.new(key, self._AES.MODE_CTR, nonce=b'', initial_value=counter).encrypt(data)
+
+    def gcm_encrypt(self, key, nonce, data, aad):
+        cipher = self._AES.new(key, self._AES.MODE_GCM, nonce=nonce)
+        cipher.update(aad)
+        return cipher.encrypt_and_digest(data)
+
+    def gcm_decrypt(self, key, nonce, data, tag, aad):
+        cipher = self._AES.new(key, self._AES.MODE_GCM, nonce=nonce, mac_len=len(tag))
+        cipher.update(aad)
+        return cipher.decrypt_and_verify(data, tag)
+
+
+class _CryptographyBackend(object):
+    name = 'cryptography'
+
+    def __init__(self, ciphers, InvalidTag):
+        self._ciphers = ciphers
+        self._InvalidTag = InvalidTag
+
+    def _crypt(self, key, mode, data, decrypt=False):
+        cipher = self._ciphers.Cipher(self._ciphers.algorithms.AES(key), mode)
+        context = cipher.decryptor() if decrypt else cipher.encryptor()
+        return context.update(data) + context.finalize()
+
+    def cbc_encrypt(self, key, iv, data):
+        return self._crypt(key, self._ciphers.modes.CBC(iv), data)
+
+    def cbc_decrypt(self, key, iv, data):
+        return self._crypt(key, self._ciphers.modes.CBC(iv), data, decrypt=True)
+
+    def ctr(self, key, counter, data):
+        return self._crypt(key, self._ciphers.modes.CTR(counter), data)
+
+    def gcm_encrypt(self, key, nonce, data, aad):
+        context = self._ciphers.Cipher(self._ciphers.algorithms.AES(key), self._ciphers.modes.GCM(nonce)).encryptor()
+        context.authenticate_additional_data(aad)
+        cipher_text = context.update(data) + context.finalize()
+        return cipher_text, context.tag
+
+    def gcm_decrypt(self, key, nonce, data, tag, aad):
+        context = self._ciphers.Cipher(self._ciphers.algorithms.AES(key), self._ciphers.modes.GCM(nonce, tag, min_tag_length=4)).decryptor()
+        context.authenticate_additional_data(aad)
+        try:
+            return context.update(data) + context.finalize()
+        except self._InvalidTag:
+            raise ValueError('MAC check failed')
+
+
+def _load_native():
+    for module in ('Cryptodome', 'Crypto'):
+        try:
+            AES = __import__('%s.Cipher.AES' % (module), fromlist=['AES'])
+            if hasattr(AES, 'MODE_GCM'):
+                return _PycryptodomeBackend(AES)
+        except ImportError:
+            pass
+    try:
+        from cryptography.hazmat.primitives import ciphers
+        from cryptography.exceptions import InvalidTag
+        return _CryptographyBackend(ciphers, InvalidTag)
+    except ImportError:
+        pass
+    return None
+
+
+fallback = _PyaesBackend()
+native = _load_native()
+backend = native or fallback
+
+
+def aes_cbc_encrypt(key, iv, data, padding=True):
+    """
+    Returns ``data`` encrypted with AES-CBC, PKCS#7 padded unless
+    ``padding`` is False (then ``data`` must be a multiple of 16 bytes).
+    """
+    data = _to_bytes(data)
+    if padding:
+        data = append_PKCS7_padding(data)
+    return backend.cbc_encrypt(_to_bytes(key), _to_bytes(iv), data)
+
+
+def aes_cbc_decrypt(key, iv, data, padding=True):
+    """
+    Returns ``data`` decrypted with AES-CBC, with the PKCS#7 padding
+    stripped unless ``padding`` is False.
+    """
+    data = backend.cbc_decrypt(_to_bytes(key), _to_bytes(iv), _to_bytes(data))
+    return strip_PKCS7_padding(data) if padding else data
+
+
+def aes_ctr(key, counter, data):
+    """
+    Encrypts or decrypts ``data`` with AES-CTR. ``counter`` is the initial
+    128 bit counter block, as 16 bytes or as an integer.
+    """
+    return backend.ctr(_to_bytes(key), _counter_block(counter), _to_bytes(data))
+
+
+aes_ctr_encrypt = aes_ctr_decrypt = aes_ctr
+
+
+def aes_gcm_encrypt(key, nonce, data, aad=b''):
+    """
+    Returns (cipher_text, tag) of ``data`` encrypted with AES-GCM.
+    """
+    return backend.gcm_encrypt(_to_bytes(key), _to_bytes(nonce), _to_bytes(data), _to_bytes(aad))
+
+
+def aes_gcm_decrypt(key, nonce, data, tag, aad=b''):
+    """
+    Returns ``data`` decrypted with AES-GCM. Raises ValueError when the tag
+    does not match.
+    """
+    return backend.gcm_decrypt(_to_bytes(key), _to_bytes(nonce), _to_bytes(data), _to_bytes(tag), _to_bytes(aad))
+
+
+def pbkdf2(password, salt, iterations, key_size, hash_name='sha1'):
+    """
+    Returns ``key_size`` bytes derived from ``password`` with PBKDF2-HMAC.
+    """
+    password, salt = _to_bytes(password), _to_bytes(salt)
+    if hasattr(hashlib, 'pbkdf2_hmac'):
+        return hashlib.pbkdf2_hmac(hash_name, password, salt, iterations, key_size)
+
+    def digest(data):
+        return hmac.new(password, data, getattr(hashlib, hash_name)).digest()
+
+    key = b''
+    block = 1
+    while len(key) < key_size:
+        u = digest(salt + struct.pack('>I', block))
+        result = bytearray(u)
+        for _ in range(iterations - 1):
+            u = digest(u)
+            result = bytearray(a ^ b for a, b in zip(result, bytearray(u)))
+        key += bytes(result)
+        block += 1
+    return key[:key_size]
+
+
+def evp_bytes_to_key(password, salt, key_size=32, iv_size=16, iterations=1, hash_name='md5'):
+    """
+    Returns (key, iv) derived with OpenSSL's EVP_BytesToKey, as used by
+    CryptoJS and ``openssl enc`` passphrases.
+    """
+    password, salt = _to_bytes(password), _to_bytes(salt or b'')
+    derived = b''
+    block = b''
+    while len(derived) < key_size + iv_size:
+        block = hashlib.new(hash_name, block + password + salt).digest()
+        for _ in range(1, iterations):
+            block = hashlib.new(hash_name, block).digest()
+        derived += block
+    return derived[:key_size], derived[key_size:key_size + iv_size]
+
+
+def benchmark(size=256 * 1024, repeat=3):
+    """
+    Times a CBC decryption of ``size`` bytes with every available backend.
+    Returns a list of (backend name, seconds).
+    """
+    key, iv = b'k' * 32, b'i' * 16
+    data = fallback.cbc_encrypt(key, iv, b'x' * size)
+    results = []
+    for candidate in [b for b in (native, fallback) if b is not None]:
+        best = None
+        for _ in range(repeat):
+            start = time.time()
+            candidate.cbc_decrypt(key, iv, data)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append((candidate.name, best))
+    return results
+
+
+if __name__ == '__main__':
+    for name, seconds in benchmark():
+        print('%-14s %.4fs' % (name, seconds))
@@ -0,0 +1,96 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Shared plumbing for the ``check_cached`` method of the debrid resolvers.
+
+A resolver supplies a lookup for one chunk of info hashes (using its
+provider's multi-hash endpoint); :func:`check` splits the request into
+chunks and keeps every answer in the function cache for CACHE_TTL seconds,
+so a source list that was annotated once does not query the provider again
+when one of its magnets is resolved.
+
+    usage:
+
+    def check_cached(self, hashes):
+        return debrid_cache.check(self, hashes, self.__check_hashes)
+
+"""
+import re
+import six
+from resolveurl import common
+from resolveurl.lib import cache
+
+CACHE_NAME = 'debrid_cached'
+CACHE_TTL = 10 * 60
+CHUNK_SIZE = 100
+_BTIH = re.compile(r'btih:([a-zA-Z0-9]+)', re.I)
+_HASH = re.compile(r'^(?:[a-fA-F0-9]{40}|[a-zA-Z2-7]{32})$')
+
+
+def info_hash(item):
+    """
+    Returns the lower case info hash of a magnet link or of a bare info hash,
+    or None.
+    """
+    if not isinstance(item, six.string_types):
+        return None
+    item = item.strip()
+    r = _BTIH.search(item)
+    if r:
+        return r.group(1).lower()
+    if _HASH.match(item):
+        return item.lower()
+    return None
+
+
+def check(resolver, hashes, lookup, chunk_size=CHUNK_SIZE, ttl=CACHE_TTL):
+    """
+    Returns {info hash: True/False} for ``hashes`` (info hashes or magnet
+    links). ``lookup(chunk)`` is called with lists of at most ``chunk_size``
+    lower case hashes that are not in the cache yet and returns a dict with
+    the answers it got; hashes missing from that dict (or from a chunk whose
+    lookup failed) are left out of the result.
+    """
+    name = type(resolver).__name__
+    result = {}
+    missing = []
+    seen = set()
+    for item in hashes:
+        _hash = info_hash(item)
+        if _hash is None or _hash in seen:
+            continue
+        seen.add(_hash)
+        in_cache, cached = cache._get_func(CACHE_NAME, [name, _hash], cache_limit=ttl / 3600.0)
+        if in_cache:
+            result[_hash] = cached
+        else:
+            missing.append(_hash)
+
+    for i in range(0, len(missing), chunk_size):
+        chunk = missing[i:i + chunk_size]
+        try:
+            answers = lookup(chunk)
+        except Exception as e:
+            common.logger.log_warning('%s: cache check failed for %d hashes: %s' % (name, len(chunk), e))
+            continue
+        for _hash in chunk:
+            if _hash in answers:
+                result[_hash] = bool(answers[_hash])
+                cache._save_func(CACHE_NAME, [name, _hash], result=result[_hash], cache_limit=ttl / 3600.0)
+
+    common.logger.log_debug('%s: %d of %d hashes cached (%d looked up)' % (name, sum(result.values()), len(result), len(missing)))
+    return result
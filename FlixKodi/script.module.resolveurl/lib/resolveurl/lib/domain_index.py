@@ -0,0 +1,83 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    usage:
+
+    index = DomainIndex()
+    index.add(resolver, resolver.domains)
+    candidates = index.lookup('filemoon.sx')
+
+"""
+
+
+class DomainIndex(object):
+    """
+    Maps host domains to the resolvers that declare them.
+
+    Every declared domain is stored under itself and under each of its
+    parent domains (``video.sibnet.ru`` is reachable from ``sibnet.ru``), so
+    looking up a top domain is a single dict access instead of a substring
+    test against every domain of every resolver. Lookups keep the order in
+    which values were added.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._values = []
+        self._suffixes = {}
+        self._wildcard = []
+        self._domains = []
+        self._memo = {}
+
+    def add(self, value, domains):
+        index = len(self._values)
+        self._values.append(value)
+        self.size += 1
+        for domain in domains:
+            domain = domain.lower()
+            if domain == '*':
+                self._wildcard.append(index)
+                continue
+
+            self._domains.append((domain, index))
+            labels = domain.split('.')
+            for i in range(len(labels) - 1):
+                self._suffixes.setdefault('.'.join(labels[i:]), set()).add(index)
+        self._memo.clear()
+
+    def lookup(self, domain):
+        """
+        Returns the values whose domains contain ``domain``, plus the
+        wildcard ("*") values, in insertion order.
+        """
+        domain = domain.lower() if domain else ''
+        try:
+            return self._memo[domain]
+        except KeyError:
+            pass
+
+        matches = set(self._wildcard)
+        if domain:
+            if '.' in domain:
+                matches.update(self._suffixes.get(domain, ()))
+            else:
+                # bare host names (e.g. HostedMediaFile(host='filemoon', ...)) keep the old substring behaviour
+                matches.update(index for res_domain, index in self._domains if domain in res_domain)
+
+        result = [self._values[index] for index in sorted(matches)]
+        self._memo[domain] = result
+        return result
@@ -20,7 +20,7 @@ import base64
 import re
 import six
 import xbmcgui
-from resolveurl.lib import jsunpack, unjuice, unjuice2
+from resolveurl.lib import jsunpack, unjuice, unjuice2, source_scanner, mirror_race
 from six.moves import urllib_parse, urllib_request, urllib_error
 from resolveurl import common
 from resolveurl.resolver import ResolverError
@@ -55,7 +55,7 @@ def get_hidden(html, form_id=None, index=None, include_submit=True):
                     if name and value:
                         hidden[name.group(1)] = value.group(1)
 
-    common.logger.log_debug('Hidden fields are: %s' % (hidden))
+    common.logger.log_debug('Hidden fields are: %s', hidden)
     return hidden
 
 
@@ -67,6 +67,8 @@ def pick_source(sources, auto_pick=None):
         return sources[0][1]
     elif len(sources) > 1:
         if auto_pick:
+            if mirror_race.enabled():
+                return mirror_race.pick_fastest(sources)
             return sources[0][1]
         else:
             result = xbmcgui.Dialog().select(common.i18n('choose_the_link'), [str(source[0]) if source[0] else 'Unknown' for source in sources])
@@ -159,12 +161,12 @@ def scrape_sources(html, result_blacklist=None, scheme='http', patterns=None, ge
     if patterns is None:
         patterns = []
 
-    def __parse_to_list(_html, regex):
+    def __parse_to_list(regex, found):
         _blacklist = ['.jpg', '.jpeg', '.gif', '.png', '.js', '.css', '.htm', '.html', '.php', '.srt', '.sub', '.xml', '.swf', '.vtt']
         _blacklist = set(_blacklist + result_blacklist)
         streams = []
         labels = []
-        for r in re.finditer(regex, _html, re.DOTALL):
+        for r in found:
             match = r.groupdict()
             stream_url = match['url']
             if not (stream_url.startswith('http') or stream_url.startswith('/')):
@@ -181,14 +183,15 @@ def scrape_sources(html, result_blacklist=None, scheme='http', patterns=None, ge
             if label is None:
                 label = file_name
             blocked = not file_name or any(item in file_name.lower() for item in _blacklist) or any(item in label for item in _blacklist)
-            if '://' not in stream_url or blocked or (stream_url in streams) or any(stream_url == t[1] for t in source_list):
+            if '://' not in stream_url or blocked or stream_url in seen:
                 continue
+            seen.add(stream_url)
             labels.append(label)
             streams.append(stream_url)
 
         matches = zip(labels, streams) if six.PY2 else list(zip(labels, streams))
         if matches:
-            common.logger.log_debug('Scrape sources |%s| found |%s|' % (regex, matches))
+            common.logger.log_debug('Scrape sources |%s| found |%s|', regex, matches)
         return matches
 
     if result_blacklist is None:
@@ -200,15 +203,12 @@ def scrape_sources(html, result_blacklist=None, scheme='http', patterns=None, ge
     html += get_packed_data(html)
 
     source_list = []
+    seen = set()
     if generic_patterns or not patterns:
-        source_list += __parse_to_list(html, r'''["']?label\s*["']?\s*[:=]\s*["']?(?P<label>[^"',]+)["']?(?:[^}\]]+)["']?\s*file\s*["']?\s*[:=,]?\s*["'](?P<url>[^"']+)''')
-        source_list += __parse_to_list(html, r'''["']?\s*(?:file|src)\s*["']?\s*[:=,]?\s*["'](?P<url>[^"']+)(?:[^}>\]]+)["']?\s*label\s*["']?\s*[:=]\s*["']?(?P<label>[^"',]+)''')
-        source_list += __parse_to_list(html, r'''video[^><]+src\s*[=:]\s*['"](?P<url>[^'"]+)''')
-        source_list += __parse_to_list(html, r'''source\s+src\s*=\s*['"](?P<url>[^'"]+)['"](?:.*?res\s*=\s*['"](?P<label>[^'"]+))?''')
-        source_list += __parse_to_list(html, r'''["'](?:file|url)["']\s*[:=]\s*["'](?P<url>[^"']+)''')
-        source_list += __parse_to_list(html, r'''param\s+name\s*=\s*"src"\s*value\s*=\s*"(?P<url>[^"]+)''')
+        for regex, found in source_scanner.generic_matches(html):
+            source_list += __parse_to_list(regex, found)
     for regex in patterns:
-        source_list += __parse_to_list(html, regex)
+        source_list += __parse_to_list(regex, re.finditer(regex, html, re.DOTALL))
 
     source_list = list(set(source_list))
 
@@ -243,7 +243,7 @@ def scrape_subtitles(html, rurl='', scheme='http', patterns=None, generic_patter
 
         matches = {lang: url for lang, url in zip(labels, subs) if len(lang) > 1}
         if matches:
-            common.logger.log_debug('Scrape sources |%s| found |%s|' % (regex, matches))
+            common.logger.log_debug('Scrape sources |%s| found |%s|', regex, matches)
         return matches
 
     html = html.replace(r"\/", "/")
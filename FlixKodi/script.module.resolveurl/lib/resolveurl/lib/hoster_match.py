@@ -0,0 +1,233 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Matchers for the hoster lists of the debrid resolvers.
+
+The lists come from the function cache, so every resolver instance gets a
+fresh copy of them. :func:`regex_set` and :func:`host_set` build their
+matcher once per distinct list and hand the same object back until the
+list changes.
+
+    usage:
+
+    self.hosters = hoster_match.regex_set(self.get_all_hosters())
+    if self.hosters.search(url): ...
+
+    self.hosts = hoster_match.host_set(self.get_hosts())
+    if self.hosts.contains(host): ...
+
+"""
+import re
+import threading
+import six
+from resolveurl import common
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+MAX_MATCHERS = 16
+MAX_MEMO = 1000
+GRAM_SIZE = 4
+# literals (nearly) every URL contains, useless for telling patterns apart
+COMMON_LITERALS = ['http', 'https', 'www.', '']
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+_lock = threading.Lock()
+_matchers = {}
+
+
+class RegexSet(object):
+    r"""
+    A list of regexes that answers "does any of them match" without trying
+    every one of them. Each pattern is indexed by a literal that any match
+    must contain (e.g. ``filemoon.sx`` in ``https?://(?:www\.)?filemoon\.sx/e/(\w+)``);
+    a URL is only searched with the patterns whose literal occurs in it.
+    Patterns without such a literal are always tried, patterns that do not
+    compile are left out.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self._always = []
+        self._grams = {}
+        for pattern in patterns:
+            try:
+                regex = re.compile(pattern) if isinstance(pattern, six.string_types) else pattern
+            except re.error as e:
+                common.logger.log_debug('Skipping invalid hoster regex %s: %s', pattern, e)
+                continue
+            index = len(self.patterns)
+            self.patterns.append(pattern)
+            pattern = regex
+            literal = _required_literal(pattern)
+            if literal is None:
+                self._always.append(pattern)
+            else:
+                ignore_case = bool(pattern.flags & re.I)
+                literal = literal.lower() if ignore_case else literal
+                self._grams.setdefault(literal[:GRAM_SIZE].lower(), []).append((index, literal, ignore_case, pattern))
+
+    def search(self, url):
+        for regex in self._always:
+            if regex.search(url):
+                return True
+
+        if _NON_ASCII.search(url):
+            # re.I folds some non ascii characters (e.g. a long s) that lower() leaves alone
+            return any(regex.search(url) for entries in self._grams.values() for _, _, _, regex in entries)
+
+        lower = url.lower()
+        tried = set()
+        for i in range(len(lower) - GRAM_SIZE + 1):
+            for index, literal, ignore_case, regex in self._grams.get(lower[i:i + GRAM_SIZE], ()):
+                if index in tried:
+                    continue
+                tried.add(index)
+                if literal in (lower if ignore_case else url) and regex.search(url):
+                    return True
+        return False
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+class HostSet(object):
+    """
+    A list of host names with the two substring tests the debrid resolvers
+    use, answered without looping over the whole list in python.
+    """
+
+    def __init__(self, hosts):
+        self.hosts = [host for host in hosts if isinstance(host, six.string_types)]
+        self._joined = '\n'.join(self.hosts)
+        self._set = set(self.hosts)
+        self._lengths = sorted(set(len(host) for host in self.hosts))
+        self._memo = {}
+
+    def contains(self, host):
+        """
+        Returns True if ``host`` is a substring of one of the hosts.
+        """
+        if not self.hosts:
+            return False
+        if host in self._set:
+            return True
+        if '\n' in host:
+            return any(host in item for item in self.hosts)
+        return host in self._joined
+
+    def within(self, host):
+        """
+        Returns True if one of the hosts is a substring of ``host``.
+        """
+        try:
+            return self._memo[host]
+        except KeyError:
+            pass
+
+        result = False
+        for length in self._lengths:
+            if length > len(host):
+                break
+            for i in range(len(host) - length + 1):
+                if host[i:i + length] in self._set:
+                    result = True
+                    break
+            if result:
+                break
+        if len(self._memo) >= MAX_MEMO:
+            self._memo.clear()
+        self._memo[host] = result
+        return result
+
+    def __iter__(self):
+        return iter(self.hosts)
+
+    def __len__(self):
+        return len(self.hosts)
+
+
+def _required_literal(regex):
+    """
+    Returns the longest ascii literal every match of ``regex`` contains, or
+    None if there is none of at least GRAM_SIZE characters.
+    """
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return None
+    runs = sorted(_literal_runs(parsed), key=lambda run: (run.strip('/:') not in COMMON_LITERALS, len(run)), reverse=True)
+    if runs and len(runs[0]) >= GRAM_SIZE:
+        return runs[0]
+    return None
+
+
+def _literal_runs(items):
+    runs = []
+    current = []
+    for op, av in items:
+        if op == sre_parse.LITERAL and av < 128:
+            current.append(chr(av))
+            continue
+        if current:
+            runs.append(''.join(current))
+            current = []
+        if op == sre_parse.SUBPATTERN:
+            # (group, add_flags, del_flags, pattern) on python 3, (group, pattern) on python 2
+            if len(av) == 2 or not (av[1] or av[2]):
+                runs.extend(_literal_runs(av[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            runs.extend(_literal_runs(av[2]))
+    if current:
+        runs.append(''.join(current))
+    return runs
+
+
+def _get(cls, key, items):
+    with _lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = cls(items)
+            if len(_matchers) >= MAX_MATCHERS:
+                _matchers.clear()
+            _matchers[key] = matcher
+        return matcher
+
+
+def regex_set(patterns):
+    """
+    Returns the :class:`RegexSet` for ``patterns`` (compiled regexes or
+    pattern strings), reusing the one built for an identical list.
+    """
+    patterns = patterns or []
+    key = ('regex', tuple((p.pattern, p.flags) if hasattr(p, 'pattern') else (p, 0) for p in patterns))
+    return _get(RegexSet, key, patterns)
+
+
+def host_set(hosts):
+    """
+    Returns the :class:`HostSet` for ``hosts``, reusing the one built for an
+    identical list.
+    """
+    hosts = hosts or []
+    key = ('host', tuple(host for host in hosts if isinstance(host, six.string_types)))
+    return _get(HostSet, key, hosts)
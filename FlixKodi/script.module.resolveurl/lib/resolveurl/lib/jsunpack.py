@@ -35,7 +35,15 @@
 
 import re
 import binascii
-from six import PY2
+import hashlib
+import threading
+from collections import OrderedDict
+from six import PY2, text_type
+
+MAX_CACHED = 32
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_unbasers = {}
 
 
 def detect(source):
@@ -49,28 +57,44 @@ def detect(source):
 
 
 def unpack(source):
-    """Unpacks P.A.C.K.E.R. packed js code."""
+    """Unpacks P.A.C.K.E.R. packed js code. Results are memoized by the hash of `source`."""
+    data = source.encode('utf-8') if isinstance(source, text_type) else source
+    key = (type(source), hashlib.sha1(data).hexdigest())
+    with _cache_lock:
+        if key in _cache:
+            _cache[key] = result = _cache.pop(key)
+            return result
+
+    result = _unpack(source)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return result
+
+
+def _unpack(source):
     payload, symtab, radix, count = _filterargs(source)
 
     if count != len(symtab):
         raise UnpackingError('Malformed p.a.c.k.e.r. symtab.')
 
     try:
-        unbase = Unbaser(radix)
+        unbase = get_unbaser(radix)
     except TypeError:
         raise UnpackingError('Unknown p.a.c.k.e.r. encoding.')
 
+    words = {}
+
     def lookup(match):
         """Look up symbols in the synthetic symtab."""
         word = match.group(0)
-        return symtab[int(word)] if radix == 1 else symtab[unbase(word)] or word
-
-    def getstring(c, a=radix):
-        foo = chr(c % a + 161)
-        if c < a:
-            return foo
-        else:
-            return getstring(int(c / a), a) + foo
+        try:
+            return words[word]
+        except KeyError:
+            pass
+        value = words[word] = symtab[int(word)] if radix == 1 else symtab[unbase(word)] or word
+        return value
 
     payload = payload.replace("\\\\", "\\").replace("\\'", "'")
     p = re.search(r'eval\(function\(p,a,c,k,e.+?String\.fromCharCode\(([^)]+)', source)
@@ -80,14 +104,59 @@ def unpack(source):
         pnew = False
 
     if pnew:
-        for i in range(count - 1, -1, -1):
-            payload = payload.replace(getstring(i).decode('latin-1') if PY2 else getstring(i), symtab[i])
-        return _replacejsstrings((_replacestrings(payload)))
+        return _replacejsstrings((_replacestrings(_replacecodes(payload, symtab, radix, count))))
     else:
         source = re.sub(r"\b\w+\b", lookup, payload) if PY2 else re.sub(r"\b\w+\b", lookup, payload, flags=re.ASCII)
         return _replacestrings(source)
 
 
+def _getcodes(radix, count):
+    """
+    Returns the symbols of the String.fromCharCode(c+161) variant of the
+    encoder: digits are the characters chr(161) to chr(160 + radix).
+    """
+    digits = [chr(161 + i).decode('latin-1') if PY2 else chr(161 + i) for i in range(radix)]
+    codes = []
+    for c in range(count):
+        code = digits[c % radix]
+        c //= radix
+        while c:
+            code = digits[c % radix] + code
+            c //= radix
+        codes.append(code)
+    return codes, digits
+
+
+def _replacecodes(payload, symtab, radix, count):
+    """
+    Replaces the symbols of the String.fromCharCode(c+161) variant in one
+    pass over the payload. Symbols are made of characters that never occur
+    in plain js, so every run of them is one symbol; runs that are not, and
+    symtabs that contain such characters, fall back to replacing the symbols
+    one by one from the highest to the lowest.
+    """
+    codes, digits = _getcodes(radix, count)
+    digit_set = set(digits)
+    if any(char in digit_set for word in symtab for char in word):
+        for i in range(count - 1, -1, -1):
+            payload = payload.replace(codes[i], symtab[i])
+        return payload
+
+    table = dict(zip(codes, symtab))
+
+    def replace(match):
+        run = match.group(0)
+        try:
+            return table[run]
+        except KeyError:
+            for i in range(count - 1, -1, -1):
+                if codes[i] in run:
+                    run = run.replace(codes[i], symtab[i])
+            return run
+
+    return re.sub(u'[%s]+' % (re.escape(u''.join(digits))), replace, payload)
+
+
 def _filterargs(source):
     """Juice from a source file the four args needed by decoder."""
     argsregex = r"}\s*\('(.*)',\s*(.*?),\s*(\d+),\s*'(.*?)'\.split\('\|'\)"
@@ -109,26 +178,41 @@ def _replacestrings(source):
         varname, strings = match.groups()
         startpoint = len(match.group(0))
         lookup = strings.split('","')
-        variable = '%s[%%d]' % varname
         for index, value in enumerate(lookup):
             if '\\x' in value:
                 value = value.replace('\\x', '')
                 value = binascii.unhexlify(value).decode('ascii')
-            source = source.replace(variable % index, '"%s"' % value)
+            lookup[index] = '"%s"' % value
+
+        if any(varname in value for value in lookup):
+            # a value refers to the table itself, keep the original replacement order
+            variable = '%s[%%d]' % varname
+            for index, value in enumerate(lookup):
+                source = source.replace(variable % index, value)
+            return source[startpoint:]
+
+        def replace(m):
+            index = m.group(1)
+            if str(int(index)) == index and int(index) < len(lookup):
+                return lookup[int(index)]
+            return m.group(0)
+
+        source = re.sub(re.escape(varname) + r'\[(\d+)\]', replace, source)
         return source[startpoint:]
     return source
 
 
 def _replacejsstrings(source):
     """Strip JS string encodings and replace values in source."""
-    match = re.findall(r'\\x([0-7][0-9A-F])', source)
+    return re.sub(r'\\x([0-7][0-9A-F])', lambda m: binascii.unhexlify(m.group(1)).decode('ascii'), source)
 
-    if match:
-        match = set(match)
-        for value in match:
-            source = source.replace('\\x{0}'.format(value), binascii.unhexlify(value).decode('ascii'))
 
-    return source
+def get_unbaser(base):
+    """Returns the (shared) :class:`Unbaser` for `base`."""
+    unbaser = _unbasers.get(base)
+    if unbaser is None:
+        unbaser = _unbasers[base] = Unbaser(base)
+    return unbaser
 
 
 class Unbaser(object):
@@ -167,8 +251,8 @@ class Unbaser(object):
     def _dictunbaser(self, string):
         """Decodes a  value to an integer."""
         ret = 0
-        for index, cipher in enumerate(string[::-1]):
-            ret += (self.base ** index) * self.dictionary[cipher]
+        for cipher in string:
+            ret = ret * self.base + self.dictionary[cipher]
         return ret
 
 
@@ -22,16 +22,23 @@ import sys
 import os
 import re
 import time
+import threading
+from xml.etree import ElementTree
 from resolveurl.lib import strings
 from resolveurl.lib import CustomProgressDialog
 
 addon = xbmcaddon.Addon('script.module.resolveurl')
-get_setting = addon.getSetting
 show_settings = addon.openSettings
 sleep = xbmc.sleep
 _log = xbmc.log
 py_ver = sys.version
 py_info = sys.version_info
+# seconds between checks whether a settings file changed on disk
+SETTINGS_CHECK_INTERVAL = 1
+# number of times the user cancelled a progress or countdown dialog, see get_cancellations()
+_cancellations = 0
+# per thread flag set by QuietDialogs
+_quiet = threading.local()
 
 
 def get_path():
@@ -46,10 +53,154 @@ def translate_path(path):
     return xbmcvfs.translatePath(path) if six.PY3 else xbmc.translatePath(path)
 
 
+class SettingsSnapshot(object):
+    """
+    The add-on settings as a dict, so that the hundreds of enabled/priority
+    lookups of a resolve do not each call into Kodi. It is built from the
+    defaults in ``resources/settings.xml`` and the user values in the
+    profile's ``settings.xml`` and reloaded when either file changes (checked
+    at most every SETTINGS_CHECK_INTERVAL seconds) or :meth:`invalidate` is
+    called. Settings missing from both files, or all of them if the files
+    cannot be read, are asked from Kodi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._stamp = None
+        self._checked = 0
+        # bumped whenever any value may have changed
+        self._version = 0
+
+    def _files(self):
+        return [os.path.join(get_path(), 'resources', 'settings.xml'), os.path.join(translate_path(get_profile()), 'settings.xml')]
+
+    def _current(self):
+        now = time.time()
+        if now - self._checked < SETTINGS_CHECK_INTERVAL and self._values is not None:
+            return self._values
+        with self._lock:
+            stamp = []
+            for path in self._files():
+                try:
+                    st = os.stat(path)
+                    stamp.append((st.st_mtime, st.st_size))
+                except OSError:
+                    stamp.append(None)
+            if stamp != self._stamp or self._values is None:
+                self._values = self._load()
+                self._stamp = stamp
+                self._version += 1
+            self._checked = now
+            return self._values
+
+    def _load(self):
+        values = {}
+        defaults, user = self._files()
+        try:
+            if os.path.exists(defaults):
+                for setting in ElementTree.parse(defaults).iter('setting'):
+                    if setting.get('id'):
+                        values[setting.get('id')] = setting.get('default', '')
+            if os.path.exists(user):
+                for setting in ElementTree.parse(user).iter('setting'):
+                    if setting.get('id'):
+                        # <setting id="" value="" /> before Kodi 18, <setting id="">value</setting> since
+                        values[setting.get('id')] = setting.get('value') if 'value' in setting.attrib else (setting.text or '')
+        except Exception as e:
+            _log('ResolveURL: settings snapshot disabled: %s' % e, xbmc.LOGWARNING)
+            return {}
+        return values
+
+    def get(self, id):
+        values = self._current()
+        try:
+            return values[id]
+        except KeyError:
+            value = values[id] = addon.getSetting(id)
+            return value
+
+    def set(self, id, value):
+        addon.setSetting(id, value)
+        with self._lock:
+            if self._values is not None:
+                self._values[id] = value
+            self._version += 1
+
+    def get_version(self):
+        """Returns a number that changes whenever a setting may have changed."""
+        self._current()
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+
+
+settings = SettingsSnapshot()
+
+
+def get_setting(id):
+    return settings.get(id)
+
+
 def set_setting(id, value):
     if not isinstance(value, six.string_types):
         value = str(value)
-    addon.setSetting(id, value)
+    settings.set(id, value)
+
+
+def invalidate_settings():
+    settings.invalidate()
+
+
+def _note_canceled(canceled):
+    global _cancellations
+    if canceled:
+        _cancellations += 1
+    return canceled
+
+
+class DialogSuppressed(Exception):
+    pass
+
+
+class QuietDialogs(object):
+    """
+    Keeps the current thread from showing dialogs, e.g. while it resolves a
+    link in the background. :class:`ProgressDialog` and :class:`CountdownDialog`
+    raise :class:`DialogSuppressed` instead of opening and notifications are
+    dropped::
+
+        with QuietDialogs():
+            ...
+    """
+
+    def __enter__(self):
+        self.previous = getattr(_quiet, 'active', False)
+        _quiet.active = True
+        return self
+
+    def __exit__(self, type, value, traceback):
+        _quiet.active = self.previous
+
+
+def _check_quiet(heading):
+    if getattr(_quiet, 'active', False):
+        raise DialogSuppressed('Dialog not shown: %s' % heading)
+
+
+def get_cancellations():
+    """
+    Returns how often the user cancelled a :class:`ProgressDialog` or
+    :class:`CountdownDialog` so far; a change tells that an operation was
+    cancelled, whatever error (or None) the code returned for it.
+    """
+    return _cancellations
+
+
+def get_settings_version():
+    return settings.get_version()
 
 
 def get_version():
@@ -64,6 +215,10 @@ def get_name():
     return addon.getAddonInfo('name')
 
 
+def get_language():
+    return xbmc.getLanguage()
+
+
 def kodi_version():
 
     """
@@ -83,7 +238,9 @@ def supported_video_extensions():
 
 
 def open_settings():
-    return addon.openSettings()
+    result = addon.openSettings()
+    invalidate_settings()
+    return result
 
 
 def get_keyboard_legacy(heading, default='', hide_input=False):
@@ -200,6 +357,8 @@ def parse_query(query):
 
 
 def notify(header=None, msg='', duration=2000, sound=None):
+    if getattr(_quiet, 'active', False):
+        return
     if header is None:
         header = get_name()
     if sound is None:
@@ -242,6 +401,10 @@ def yesnoDialog(heading=get_name(), line1='', line2='', line3='', nolabel='', ye
     return xbmcgui.Dialog().yesno(heading, line1 + '[CR]' + line2 + '[CR]' + line3, nolabel=nolabel, yeslabel=yeslabel)
 
 
+def textviewer(heading, text):
+    xbmcgui.Dialog().textviewer(heading, text)
+
+
 class WorkingDialog(object):
     def __init__(self):
         xbmc.executebuiltin('ActivateWindow(busydialog)')
@@ -259,6 +422,8 @@ def has_addon(addon_id):
 
 class ProgressDialog(object):
     def __init__(self, heading, line1='', line2='', line3='', background=False, active=True, timer=0):
+        if active:
+            _check_quiet(heading)
         self.line1 = line1
         self.line2 = line2
         self.line3 = line3
@@ -301,7 +466,7 @@ class ProgressDialog(object):
 
     def is_canceled(self):
         if self.pd is not None and not self.background:
-            return self.pd.iscanceled()
+            return _note_canceled(self.pd.iscanceled())
         else:
             return False
 
@@ -333,6 +498,8 @@ class CountdownDialog(object):
     __INTERVALS = 5
 
     def __init__(self, heading, line1='', line2='', line3='', active=True, countdown=60, interval=5):
+        if active:
+            _check_quiet(heading)
         self.heading = heading
         self.countdown = countdown
         self.interval = interval
@@ -399,7 +566,7 @@ class CountdownDialog(object):
         if self.pd is None:
             return False
         else:
-            return self.pd.iscanceled()
+            return _note_canceled(self.pd.iscanceled())
 
     def update(self, percent, line1='', line2='', line3=''):
         if not line1:
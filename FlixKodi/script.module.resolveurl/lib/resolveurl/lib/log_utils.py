@@ -16,14 +16,20 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import json
+import threading
+import time
 import xbmc
 import xbmcaddon
+import xbmcgui
 import six
 
 LOGDEBUG = xbmc.LOGDEBUG
 LOGERROR = xbmc.LOGERROR
 LOGWARNING = xbmc.LOGWARNING
 LOGINFO = xbmc.LOGINFO if six.PY3 else xbmc.LOGNOTICE
+# seconds the Kodi debug logging setting is trusted before it is checked again in the background
+DEBUG_TTL = 60
+DEBUG_PROPERTY = 'script.module.resolveurl.debug_logging'
 
 addonsmr = xbmcaddon.Addon('script.module.resolveurl')
 
@@ -45,11 +51,68 @@ def _is_debugging():
     return False
 
 
+class _DebugFlag(object):
+    """
+    Whether Kodi's debug logging is on. The (synchronous) JSON-RPC call that
+    answers this only ever runs in a background thread: its answer is
+    shared with later invocations of the add-on through a home window
+    property and checked again once it is older than DEBUG_TTL. Until the
+    first answer of a Kodi session arrives, debug logging counts as off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked = 0
+        self._refreshing = False
+
+    def get(self):
+        if self._value is None:
+            self._load()
+        if time.time() - self._checked > DEBUG_TTL:
+            with self._lock:
+                if self._refreshing:
+                    return bool(self._value)
+                self._refreshing = True
+            thread = threading.Thread(target=self._refresh)
+            thread.daemon = True
+            thread.start()
+        return bool(self._value)
+
+    def _load(self):
+        try:
+            value, checked = xbmcgui.Window(10000).getProperty(DEBUG_PROPERTY).split('|')
+            self._value, self._checked = value == 'true', float(checked)
+            return True
+        except Exception:
+            return False
+
+    def _refresh(self):
+        try:
+            value = bool(_is_debugging())
+        except Exception:
+            value = bool(self._value)
+        self._value, self._checked = value, time.time()
+        self._refreshing = False
+        try:
+            xbmcgui.Window(10000).setProperty(DEBUG_PROPERTY, '%s|%s' % ('true' if value else 'false', self._checked))
+        except Exception:
+            pass
+
+
+_debug_flag = _DebugFlag()
+
+
 class Logger(object):
+    """
+    Messages can be passed as a format string with arguments, e.g.
+    ``logger.log_debug('Found %s', sources)``, so that nothing is formatted
+    when the message is not logged. Use :meth:`is_enabled_for` to skip
+    preparing expensive arguments.
+    """
     __loggers = {}
     __name = addonsmr.getAddonInfo('name')
     __addon_debug = addonsmr.getSetting('addon_debug') == 'true'
-    __debug_on = _is_debugging()
     __disabled = set()
 
     @staticmethod
@@ -67,18 +130,31 @@ class Logger(object):
         if self in Logger.__disabled:
             Logger.__disabled.remove(self)
 
-    def log(self, msg, level=LOGDEBUG):
-        # if debug isn't on, skip disabled loggers unless addon_debug is on
-        if not self.__debug_on:
-            if self in self.__disabled:
-                return
-            elif level == LOGDEBUG:
-                if self.__addon_debug:
-                    level = LOGINFO
-                else:
-                    return
+    def is_enabled_for(self, level=LOGDEBUG):
+        """
+        Returns True if a message of ``level`` would be logged.
+        """
+        return self._level(level) is not None
+
+    def _level(self, level):
+        # debug messages are logged if Kodi's debug logging is on, or as info if addon_debug is on;
+        # other messages unless the logger is disabled and Kodi's debug logging is off
+        if self in self.__disabled:
+            return level if _debug_flag.get() else None
+        if level == LOGDEBUG:
+            if _debug_flag.get():
+                return level
+            return LOGINFO if self.__addon_debug else None
+        return level
+
+    def log(self, msg, level=LOGDEBUG, args=()):
+        level = self._level(level)
+        if level is None:
+            return
 
         try:
+            if args:
+                msg = msg % args
             if isinstance(msg, six.text_type) and six.PY2:
                 msg = '%s (ENCODED)' % (msg.encode('utf-8'))
 
@@ -90,14 +166,14 @@ class Logger(object):
             except:
                 pass  # just give up
 
-    def log_debug(self, msg):
-        self.log(msg, level=LOGDEBUG)
+    def log_debug(self, msg, *args):
+        self.log(msg, LOGDEBUG, args)
 
-    def log_notice(self, msg):
-        self.log(msg, level=LOGINFO)
+    def log_notice(self, msg, *args):
+        self.log(msg, LOGINFO, args)
 
-    def log_warning(self, msg):
-        self.log(msg, level=LOGWARNING)
+    def log_warning(self, msg, *args):
+        self.log(msg, LOGWARNING, args)
 
-    def log_error(self, msg):
-        self.log(msg, level=LOGERROR)
+    def log_error(self, msg, *args):
+        self.log(msg, LOGERROR, args)
@@ -0,0 +1,131 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Picks the fastest of several equivalent mirrors of a stream.
+
+With the ``auto_fastest`` setting on, :func:`resolveurl.lib.helpers.pick_source`
+hands the sources to :func:`pick_fastest` instead of taking the first one.
+The first MAX_CANDIDATES sources with the same quality as the first source
+(the quality floor) are measured concurrently with a small range request
+(the first segment for HLS). Each source is scored by the time it would take
+to buffer BUFFER_BYTES from its CDN host. Scores are kept per host in the
+function cache, so a CDN that was slow before stays behind even when a
+single measurement was lucky.
+"""
+import re
+import time
+from six.moves import urllib_parse
+from resolveurl import common
+from resolveurl.lib import cache
+from resolveurl.lib.stream_probe import prober
+from resolveurl.lib.workers import futures
+
+MAX_CANDIDATES = 3
+RACE_TIMEOUT = 4
+BUFFER_BYTES = 2 * 1024 * 1024
+# weight of a new measurement in the stored score of a host
+SMOOTHING = 0.5
+# what a mirror that did not answer counts as (seconds to buffer)
+FAILED_SCORE = 60.0
+SCORE_TTL = 7 * 24 * 60 * 60
+SCORE_CACHE = 'mirror_score'
+QUALITY = re.compile(r'(?<!\d)(\d{3,4})(?:p|\b)', re.I)
+
+
+def enabled():
+    return common.get_setting('auto_fastest') == 'true'
+
+
+def quality(label):
+    """Returns the vertical resolution named in ``label`` (e.g. 720 for '720p HD'), or None."""
+    match = QUALITY.search(str(label or ''))
+    return int(match.group(1)) if match else None
+
+
+def candidates(sources):
+    """
+    Returns the first MAX_CANDIDATES of the ``(label, url)`` sources with
+    the quality of the first one. Sources without a quality in the label
+    are only equivalent to each other.
+    """
+    floor = quality(sources[0][0])
+    return [source for source in sources if quality(source[0]) == floor][:MAX_CANDIDATES]
+
+
+def _host(stream_url):
+    return urllib_parse.urlsplit(stream_url.split('|', 1)[0]).netloc.lower()
+
+
+def get_score(host):
+    in_cache, score = cache._get_func(SCORE_CACHE, [host], cache_limit=SCORE_TTL / 3600.0)
+    return score if in_cache else None
+
+
+def save_score(host, seconds):
+    """Blends ``seconds`` (to buffer BUFFER_BYTES) into the stored score of ``host`` and returns the result."""
+    old = get_score(host)
+    score = seconds if old is None else SMOOTHING * seconds + (1 - SMOOTHING) * old
+    cache._save_func(SCORE_CACHE, [host], result=score, cache_limit=SCORE_TTL / 3600.0)
+    return score
+
+
+def _measure(stream_url):
+    result = prober.measure(stream_url)
+    if result is None:
+        return FAILED_SCORE
+    ttfb, throughput = result
+    return ttfb + BUFFER_BYTES / throughput
+
+
+def pick_fastest(sources):
+    """
+    Returns the url of the source among the :func:`candidates` that scores
+    best, or that of the first source if none could be measured in
+    RACE_TIMEOUT seconds.
+    """
+    race = candidates(sources)
+    if len(race) < 2:
+        return sources[0][1]
+
+    start = time.time()
+    seconds = {}
+    if futures is None:
+        for label, stream_url in race:
+            if time.time() - start < RACE_TIMEOUT:
+                seconds[stream_url] = _measure(stream_url)
+    else:
+        executor = futures.ThreadPoolExecutor(max_workers=len(race))
+        try:
+            running = dict((executor.submit(_measure, stream_url), stream_url) for label, stream_url in race)
+            done, _ = futures.wait(list(running), timeout=RACE_TIMEOUT)
+            for future in done:
+                seconds[running[future]] = future.result()
+        finally:
+            executor.shutdown(wait=False)
+
+    best = None
+    scores = []
+    for label, stream_url in race:
+        if stream_url not in seconds:
+            # too slow to even finish the measurement
+            seconds[stream_url] = FAILED_SCORE
+        score = save_score(_host(stream_url), seconds[stream_url])
+        scores.append('%s (%s): %.2fs' % (label, _host(stream_url), score))
+        if seconds[stream_url] < FAILED_SCORE and (best is None or score < best[0]):
+            best = (score, stream_url)
+    common.logger.log_debug('Mirror race in %.2fs: %s', time.time() - start, scores)
+    return best[1] if best else sources[0][1]
@@ -16,7 +16,7 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import gzip
+import codecs
 import json
 import random
 import re
@@ -24,8 +24,16 @@ import six
 from six.moves import urllib_request, urllib_parse, urllib_error, urllib_response, http_cookiejar
 import socket
 import sys
+import threading
 import time
+import zlib
 from resolveurl.lib import kodi
+from resolveurl.lib.pool import ConnectionPool
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Set Global timeout - Useful for slow connections and Putlocker.
 socket.setdefaulttimeout(10)
@@ -44,6 +52,13 @@ RAND_UAS = ['Mozilla/5.0 ({win_ver}{feature}; rv:{br_ver}) Gecko/20100101 Firefo
             'Mozilla/5.0 ({win_ver}{feature}; Trident/7.0; rv:{br_ver}) like Gecko',
             'Mozilla/5.0 (compatible; MSIE {br_ver}; {win_ver}{feature}; Trident/6.0)']
 CERT_FILE = kodi.translate_path('special://xbmc/system/certs/cacert.pem')
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+CHUNK_SIZE = 16 * 1024
+POOL_SIZE = 4
+POOL_IDLE_TIMEOUT = 30
+
+_pools = {}
+_pools_lock = threading.Lock()
 
 
 def get_ua():
@@ -76,6 +91,81 @@ class NoRedirection(urllib_request.HTTPRedirectHandler):
     http_error_307 = http_error_302
 
 
+def get_pool(ssl_verify=True, http_debug=False, size=POOL_SIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+    """
+    Returns the shared connection pool for the given SSL, debug and limit
+    settings, creating it on first use.
+    """
+    try:
+        import platform
+        node = platform.node().lower()
+    except:
+        node = ''
+    ssl_verify = ssl_verify and node != 'xboxone'
+    key = (ssl_verify, http_debug, size, idle_timeout)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(size, idle_timeout, _ssl_context(ssl_verify), debuglevel=1 if http_debug else 0)
+    return pool
+
+
+def _ssl_context(ssl_verify):
+    try:
+        import ssl
+        if ssl_verify:
+            ctx = ssl.create_default_context(cafile=CERT_FILE)
+        else:
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        ctx.set_alpn_protocols(['http/1.1'])
+        return ctx
+    except:
+        return None
+
+
+class _PooledHandlerMixin(object):
+    """
+    Sends urllib requests over the keep-alive connections of a
+    :class:`ConnectionPool` instead of opening a new connection (and closing
+    it again) for every request.
+    """
+
+    def _pool_open(self, req):
+        headers = dict(req.unredirected_hdrs)
+        headers.update((k, v) for k, v in req.headers.items() if k not in headers)
+        headers = dict((name.title(), val) for name, val in headers.items())
+        timeout = req.timeout if isinstance(req.timeout, (float,) + six.integer_types) else socket.getdefaulttimeout()
+        proxy = proxy_auth = None
+        if req.has_proxy() or getattr(req, '_tunnel_host', None):
+            # set by ProxyHandler, which points req.host at the proxy
+            proxy = '%s://%s' % ((req.type, req.host) if six.PY3 else (req.get_type(), req.get_host()))
+            proxy_auth = headers.pop('Proxy-Authorization', None)
+        try:
+            return self._pool.urlopen(req.get_method(), req.get_full_url(), headers=headers, body=req.data, timeout=timeout, proxy=proxy, proxy_auth=proxy_auth)
+        except (socket.error, ValueError) as err:
+            raise urllib_error.URLError(err)
+
+
+class PooledHTTPHandler(_PooledHandlerMixin, urllib_request.HTTPHandler):
+    def __init__(self, pool):
+        urllib_request.HTTPHandler.__init__(self)
+        self._pool = pool
+
+    def http_open(self, req):
+        return self._pool_open(req)
+
+
+class PooledHTTPSHandler(_PooledHandlerMixin, urllib_request.HTTPSHandler):
+    def __init__(self, pool):
+        urllib_request.HTTPSHandler.__init__(self)
+        self._pool = pool
+
+    def https_open(self, req):
+        return self._pool_open(req)
+
+
 class Net:
     """
     This class wraps :mod:`urllib2` and provides an easy way to make http
@@ -95,7 +185,7 @@ class Net:
     _user_agent = 'Mozilla/5.0 (Windows NT 6.3; rv:36.0) Gecko/20100101 Firefox/36.0'
     _http_debug = False
 
-    def __init__(self, cookie_file='', proxy='', user_agent='', ssl_verify=True, http_debug=False):
+    def __init__(self, cookie_file='', proxy='', user_agent='', ssl_verify=True, http_debug=False, pool_size=POOL_SIZE, pool_idle_timeout=POOL_IDLE_TIMEOUT):
         """
         Kwargs:
             cookie_file (str): Full path to a file to be used to load and save
@@ -109,15 +199,23 @@ class Net:
 
             http_debug (bool): Set ``True`` to have HTTP header info written to
             the XBMC log for all requests.
+
+            pool_size (int): Maximum number of idle keep-alive connections
+            kept per host.
+
+            pool_idle_timeout (int): Seconds after which an idle connection
+            is closed instead of reused.
         """
+        self._ssl_verify = ssl_verify
+        self._http_debug = http_debug
+        self._pool_size = pool_size
+        self._pool_idle_timeout = pool_idle_timeout
         if cookie_file:
             self.set_cookies(cookie_file)
         if proxy:
             self.set_proxy(proxy)
         if user_agent:
             self.set_user_agent(user_agent)
-        self._ssl_verify = ssl_verify
-        self._http_debug = http_debug
         self._update_opener()
 
     def set_cookies(self, cookie_file):
@@ -177,52 +275,20 @@ class Net:
 
     def _update_opener(self):
         """
-        Builds and installs a new opener to be used by all future calls to
-        :func:`urllib2.urlopen`.
+        Builds the opener used by this :class:`Net`. Requests go over the
+        shared keep-alive :class:`ConnectionPool` matching the SSL, debug and
+        pool settings, with the cookie jar and proxy of this instance.
         """
-        handlers = [urllib_request.HTTPCookieProcessor(self._cj), urllib_request.HTTPBasicAuthHandler()]
+        pool = get_pool(self._ssl_verify, self._http_debug, self._pool_size, self._pool_idle_timeout)
 
-        if self._http_debug:
-            handlers += [urllib_request.HTTPHandler(debuglevel=1)]
-        else:
-            handlers += [urllib_request.HTTPHandler()]
-
-        if self._proxy:
-            handlers += [urllib_request.ProxyHandler({'http': self._proxy})]
-
-        try:
-            import platform
-            node = platform.node().lower()
-        except:
-            node = ''
-
-        if not self._ssl_verify or node == 'xboxone':
-            try:
-                import ssl
-                ctx = ssl.create_default_context()
-                ctx.set_alpn_protocols(['http/1.1'])
-                ctx.check_hostname = False
-                ctx.verify_mode = ssl.CERT_NONE
-                if self._http_debug:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx, debuglevel=1)]
-                else:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx)]
-            except:
-                pass
-        else:
-            try:
-                import ssl
-                ctx = ssl.create_default_context(cafile=CERT_FILE)
-                ctx.set_alpn_protocols(['http/1.1'])
-                if self._http_debug:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx, debuglevel=1)]
-                else:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx)]
-            except:
-                pass
+        def handlers():
+            handlers = [urllib_request.HTTPCookieProcessor(self._cj), urllib_request.HTTPBasicAuthHandler(), PooledHTTPHandler(pool), PooledHTTPSHandler(pool)]
+            if self._proxy:
+                handlers += [urllib_request.ProxyHandler({'http': self._proxy})]
+            return handlers
 
-        opener = urllib_request.build_opener(*handlers)
-        urllib_request.install_opener(opener)
+        self._opener = urllib_request.build_opener(*handlers())
+        self._noredirect_opener = urllib_request.build_opener(NoRedirection(), *handlers())
 
     def http_GET(self, url, headers={}, compression=True, redirect=True, timeout=20):
         """
@@ -235,8 +301,8 @@ class Net:
             headers (dict): A dictionary describing any headers you would like
             to add to the request. (eg. ``{'X-Test': 'testing'}``)
 
-            compression (bool): If ``True`` (default), try to use gzip
-            compression.
+            compression (bool): If ``True`` (default), try to use gzip,
+            deflate or brotli compression.
 
         Returns:
             An :class:`HttpResponse` object containing headers and other
@@ -257,8 +323,8 @@ class Net:
             headers (dict): A dictionary describing any headers you would like
             to add to the request. (eg. ``{'X-Test': 'testing'}``)
 
-            compression (bool): If ``True`` (default), try to use gzip
-            compression.
+            compression (bool): If ``True`` (default), try to use gzip,
+            deflate or brotli compression.
 
         Returns:
             An :class:`HttpResponse` object containing headers and other
@@ -286,7 +352,7 @@ class Net:
         request.add_header('User-Agent', self._user_agent)
         for key in headers:
             request.add_header(key, headers[key])
-        response = urllib_request.urlopen(request)
+        response = self._opener.open(request)
         return HttpResponse(response)
 
     def http_DELETE(self, url, headers={}):
@@ -309,7 +375,7 @@ class Net:
         request.add_header('User-Agent', self._user_agent)
         for key in headers:
             request.add_header(key, headers[key])
-        response = urllib_request.urlopen(request)
+        response = self._opener.open(request)
         return HttpResponse(response)
 
     def _fetch(self, url, form_data={}, headers={}, compression=True, jdata=False, redirect=True, timeout=20):
@@ -326,8 +392,8 @@ class Net:
             headers (dict): A dictionary describing any headers you would like
             to add to the request. (eg. ``{'X-Test': 'testing'}``)
 
-            compression (bool): If ``True`` (default), try to use gzip
-            compression.
+            compression (bool): If ``True`` (default), try to use gzip,
+            deflate or brotli compression.
 
         Returns:
             An :class:`HttpResponse` object containing headers and other
@@ -347,17 +413,16 @@ class Net:
         for key in headers:
             req.add_header(key, headers[key])
         if compression:
-            req.add_header('Accept-Encoding', 'gzip')
+            req.add_header('Accept-Encoding', ACCEPT_ENCODING)
         if jdata:
             req.add_header('Content-Type', 'application/json')
         host = req.host if six.PY3 else req.get_host()
         req.add_unredirected_header('Host', host)
         try:
             if not redirect:
-                opener = urllib_request.build_opener(NoRedirection())
-                response = opener.open(req, timeout=timeout)
+                response = self._noredirect_opener.open(req, timeout=timeout)
             else:
-                response = urllib_request.urlopen(req, timeout=timeout)
+                response = self._opener.open(req, timeout=timeout)
         except urllib_error.HTTPError as e:
             if e.code == 403 and 'cloudflare' in e.hdrs.get('server', ''):
                 import ssl
@@ -387,6 +452,53 @@ class Net:
         return HttpResponse(response)
 
 
+class _Decompressor(object):
+    """
+    Incrementally decompresses a response body sent with the given
+    Content-Encoding. Unknown encodings, and bodies that turn out not to be
+    compressed after all, are passed through unchanged.
+    """
+
+    def __init__(self, encoding):
+        encoding = (encoding or '').strip().lower()
+        self._obj = None
+        self._brotli = False
+        self._deflate = False
+        if encoding in ('gzip', 'x-gzip'):
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            # servers send either zlib wrapped or raw deflate data, try the former first
+            self._obj = zlib.decompressobj(zlib.MAX_WBITS)
+            self._deflate = True
+        elif encoding == 'br' and brotli is not None:
+            self._obj = brotli.Decompressor()
+            self._brotli = True
+        self._started = False
+
+    def decompress(self, data):
+        if self._obj is None or not data:
+            return data
+        try:
+            if self._brotli:
+                result = self._obj.process(data) if hasattr(self._obj, 'process') else self._obj.decompress(data)
+            else:
+                result = self._obj.decompress(data)
+        except Exception:
+            if self._deflate and not self._started:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+                self._deflate = False
+                return self.decompress(data)
+            self._obj = None
+            return data
+        self._started = True
+        return result
+
+    def flush(self):
+        if self._obj is None or self._brotli:
+            return six.b('')
+        return self._obj.flush()
+
+
 class HttpResponse:
     """
     This class represents a resoponse from an HTTP request.
@@ -394,6 +506,9 @@ class HttpResponse:
     The content is examined and every attempt is made to properly decode it to
     Unicode unless the nodecode property flag is set to True.
 
+    The body is only downloaded when it is asked for. :meth:`stream` and
+    :meth:`iter_content` hand it out chunk by chunk as it arrives.
+
     .. seealso::
         :meth:`Net.http_GET`, :meth:`Net.http_HEAD` and :meth:`Net.http_POST`
     """
@@ -409,20 +524,96 @@ class HttpResponse:
         """
         self._response = response
         self._nodecode = False
+        self._chunks = []
+        self._body = None
+        self._decompressor = None
 
     @property
     def content(self):
-        html = self._response.read()
-        encoding = None
+        html = self._read_body()
+        if self._nodecode:
+            return html
+
+        encoding = self._get_encoding(html)
+        if encoding is not None:
+            html = html.decode(encoding, errors='ignore')
+        else:
+            html = html.decode('ascii', errors='ignore') if six.PY3 else html
+        return html
+
+    def stream(self, chunk_size=CHUNK_SIZE):
+        """
+        Yields the decompressed body as it is downloaded, in chunks of up to
+        ``chunk_size`` bytes of the raw response. Chunks already read by an
+        earlier call are yielded again first, so :attr:`content` and further
+        calls still see the whole body.
+        """
+        for chunk in self._chunks:
+            yield chunk
+        if self._body is not None:
+            return
+
+        if self._decompressor is None:
+            self._decompressor = _Decompressor(self._response.headers.get('content-encoding'))
+        while True:
+            data = self._response.read(chunk_size)
+            chunk = self._decompressor.decompress(data) if data else self._decompressor.flush()
+            if chunk:
+                self._chunks.append(chunk)
+                yield chunk
+            if not data:
+                break
+        self._body = six.b('').join(self._chunks)
+        self._chunks = [self._body] if self._body else []
+        self.close()
+
+    def iter_content(self, chunk_size=CHUNK_SIZE, decode_unicode=False):
+        """
+        Like :meth:`stream`, but with ``decode_unicode`` the chunks are
+        decoded with the charset of the response, as :attr:`content` does.
+        """
+        if not decode_unicode:
+            for chunk in self.stream(chunk_size):
+                yield chunk
+            return
+
+        decoder = None
+        for chunk in self.stream(chunk_size):
+            if decoder is None:
+                encoding = self._get_encoding(chunk)
+                if encoding is None and not six.PY3:
+                    decoder = False
+                else:
+                    try:
+                        decoder = codecs.getincrementaldecoder(encoding or 'ascii')(errors='ignore')
+                    except LookupError:
+                        decoder = codecs.getincrementaldecoder('ascii')(errors='ignore')
+            yield decoder.decode(chunk) if decoder else chunk
+        if decoder:
+            tail = decoder.decode(six.b(''), final=True)
+            if tail:
+                yield tail
+
+    def close(self):
+        """
+        Stops downloading the body and releases the connection. Whatever has
+        been read so far stays available as :attr:`content`.
+        """
+        if self._body is None:
+            self._body = six.b('').join(self._chunks)
         try:
-            if self._response.headers['content-encoding'].lower() == 'gzip':
-                html = gzip.GzipFile(fileobj=six.BytesIO(html)).read()
-        except:
+            self._response.close()
+        except Exception:
             pass
 
-        if self._nodecode:
-            return html
+    def _read_body(self):
+        if self._body is None:
+            for _chunk in self.stream():
+                pass
+        return self._body
 
+    def _get_encoding(self, html):
+        encoding = None
         try:
             content_type = self._response.headers['content-type']
             if 'charset=' in content_type:
@@ -436,12 +627,7 @@ class HttpResponse:
             r = re.search(epattern, html, re.IGNORECASE)
             if r:
                 encoding = r.group(1).decode('utf8') if six.PY3 else r.group(1)
-
-        if encoding is not None:
-            html = html.decode(encoding, errors='ignore')
-        else:
-            html = html.decode('ascii', errors='ignore') if six.PY3 else html
-        return html
+        return encoding
 
     def get_headers(self, as_dict=False):
         """Returns headers returned by the server.
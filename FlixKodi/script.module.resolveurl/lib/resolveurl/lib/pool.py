@@ -0,0 +1,232 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    usage:
+
+    pool = ConnectionPool(maxsize=4, idle_timeout=30)
+    response = pool.urlopen('GET', 'https://example.com/video.mp4', headers={'Range': 'bytes=0-1023'})
+    data = response.read()
+    response.close()  # the connection goes back to the pool once the body has been read
+
+"""
+import base64
+import socket
+import threading
+import time
+import six
+from six.moves import http_client, urllib_parse
+
+MAX_SIZE = 4
+IDLE_TIMEOUT = 30
+DRAIN_SIZE = 64 * 1024
+# errors raised when a kept-alive connection was closed by the server in the meantime
+if six.PY3:
+    STALE_ERRORS = (http_client.BadStatusLine, http_client.CannotSendRequest, ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+else:
+    STALE_ERRORS = (http_client.BadStatusLine, http_client.CannotSendRequest, socket.error)
+
+
+class ConnectionPool(object):
+    """
+    Keeps up to ``maxsize`` idle keep-alive connections per (scheme, host,
+    port, proxy) so that consecutive requests to the same host skip the
+    TCP and TLS handshakes. Connections idle for more than ``idle_timeout``
+    seconds are discarded. The pool is safe to share between threads; each
+    connection is only used by one request at a time.
+    """
+
+    def __init__(self, maxsize=MAX_SIZE, idle_timeout=IDLE_TIMEOUT, ssl_context=None, debuglevel=0):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context
+        self.debuglevel = debuglevel
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def urlopen(self, method, url, headers=None, body=None, timeout=15, proxy=None, proxy_auth=None):
+        """
+        Sends a request without following redirects and returns a
+        :class:`PooledResponse`. A reused connection that turns out to be
+        closed by the server is transparently replaced by a new one.
+
+        ``proxy`` is a proxy URL (credentials in it are used for
+        ``Proxy-Authorization`` unless ``proxy_auth`` is given). Plain http
+        requests are sent to the proxy, https requests are tunneled.
+        """
+        parts = urllib_parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError('unknown url type: %s' % (scheme))
+        selector = urllib_parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+        if proxy and not proxy_auth:
+            proxy_auth = _proxy_auth(proxy)
+        key = (scheme, parts.hostname, parts.port, proxy, proxy_auth)
+        headers = dict(headers or {})
+        if not any(k.lower() == 'host' for k in headers):
+            headers['Host'] = parts.netloc.split('@')[-1]
+        if proxy and scheme == 'http':
+            selector = url
+            if proxy_auth:
+                headers['Proxy-Authorization'] = proxy_auth
+
+        start = time.time()
+        conn, reused = self.get_connection(key, timeout)
+        try:
+            try:
+                conn.request(method, selector, body, headers)
+                response = conn.getresponse()
+            except STALE_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                conn, reused = self._new_connection(key, timeout), False
+                conn.request(method, selector, body, headers)
+                response = conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+        return PooledResponse(self, key, conn, response, url, time.time() - start)
+
+    def get_connection(self, key, timeout):
+        """
+        Returns (connection, reused) for ``key``, preferring the most recently
+        used idle connection.
+        """
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self.idle_timeout and conn.sock is not None:
+                    conn.timeout = timeout
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+        return self._new_connection(key, timeout), False
+
+    def release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if conn.sock is not None and len(idle) < self.maxsize:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _last_used in conns:
+                conn.close()
+
+    def _new_connection(self, key, timeout):
+        scheme, host, port, proxy, proxy_auth = key
+        if proxy:
+            proxy_parts = urllib_parse.urlsplit(proxy if '://' in proxy else 'http://%s' % (proxy))
+            conn_host, conn_port = proxy_parts.hostname, proxy_parts.port
+        else:
+            conn_host, conn_port = host, port
+
+        if scheme == 'https':
+            conn = http_client.HTTPSConnection(conn_host, conn_port, timeout=timeout, context=self.ssl_context)
+            if proxy:
+                conn.set_tunnel(host, port, headers={'Proxy-Authorization': proxy_auth} if proxy_auth else None)
+        else:
+            conn = http_client.HTTPConnection(conn_host, conn_port, timeout=timeout)
+        conn.set_debuglevel(self.debuglevel)
+        return conn
+
+
+def _proxy_auth(proxy):
+    parts = urllib_parse.urlsplit(proxy if '://' in proxy else 'http://%s' % (proxy))
+    if not parts.username:
+        return None
+    credentials = '%s:%s' % (urllib_parse.unquote(parts.username), urllib_parse.unquote(parts.password or ''))
+    return 'Basic %s' % (base64.b64encode(credentials.encode('utf-8')).decode('ascii'))
+
+
+class PooledResponse(object):
+    """
+    A file-like wrapper around :class:`httplib.HTTPResponse` that hands its
+    connection back to the pool when it is closed after being read to the
+    end. ``elapsed`` is the time in seconds until the response headers were
+    received.
+    """
+
+    def __init__(self, pool, key, conn, response, url, elapsed):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.elapsed = elapsed
+        self.status = self.code = response.status
+        self.reason = self.msg = response.reason
+        self.headers = response.msg
+
+    def read(self, amt=None):
+        data = self._response.read() if amt is None else self._response.read(amt)
+        if self._response.isclosed():
+            # the body has been read to the end, so the connection can be reused right away
+            self.close()
+        return data
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def getheader(self, name, default=None):
+        return self._response.getheader(name, default)
+
+    def fileno(self):
+        return self._response.fileno()
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        length = self._response.length
+        if not self._response.isclosed() and length is not None and length <= DRAIN_SIZE:
+            # cheaper to read a short remainder (e.g. an empty redirect body) than to reconnect
+            try:
+                self._response.read()
+            except Exception:
+                pass
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(self._key, conn)
+        else:
+            # unread data left on the socket; it can not be reused
+            self._response.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,153 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Finds the ``file``/``src``/``url``/``label`` candidates used by
+:func:`resolveurl.lib.helpers.scrape_sources`.
+
+Instead of letting every generic pattern try to match at every position of
+the page, the page is scanned once for the keywords the patterns start
+with and each pattern is only tried where one of its keywords (plus the
+quotes or whitespace the pattern allows in front of it) can start a match.
+The matches are exactly the ones ``re.finditer(pattern, html, re.DOTALL)``
+returns.
+
+Benchmark mode compares both approaches over saved pages::
+
+    python source_scanner.py page1.html page2.html ...
+"""
+import re
+import sys
+import time
+
+# prefixes a pattern allows in front of its keyword
+NO_PREFIX = 0
+OPT_QUOTE = 1
+OPT_QUOTE_SPACE = 2
+QUOTE = 3
+
+# (pattern, keywords, prefix), in the order scrape_sources applies them
+GENERIC_PATTERNS = [
+    (r'''["']?label\s*["']?\s*[:=]\s*["']?(?P<label>[^"',]+)["']?(?:[^}\]]+)["']?\s*file\s*["']?\s*[:=,]?\s*["'](?P<url>[^"']+)''', ('label',), OPT_QUOTE),
+    (r'''["']?\s*(?:file|src)\s*["']?\s*[:=,]?\s*["'](?P<url>[^"']+)(?:[^}>\]]+)["']?\s*label\s*["']?\s*[:=]\s*["']?(?P<label>[^"',]+)''', ('file', 'src'), OPT_QUOTE_SPACE),
+    (r'''video[^><]+src\s*[=:]\s*['"](?P<url>[^'"]+)''', ('video',), NO_PREFIX),
+    (r'''source\s+src\s*=\s*['"](?P<url>[^'"]+)['"](?:.*?res\s*=\s*['"](?P<label>[^'"]+))?''', ('source',), NO_PREFIX),
+    (r'''["'](?:file|url)["']\s*[:=]\s*["'](?P<url>[^"']+)''', ('file', 'url'), QUOTE),
+    (r'''param\s+name\s*=\s*"src"\s*value\s*=\s*"(?P<url>[^"]+)''', ('param',), NO_PREFIX),
+]
+_compiled = [(re.compile(pattern, re.DOTALL), keywords, prefix) for pattern, keywords, prefix in GENERIC_PATTERNS]
+KEYWORDS = ['label', 'file', 'src', 'url', 'video', 'source', 'param']
+_is_space = re.compile(r'\s').match
+QUOTES = '"\''
+
+
+def generic_matches(html):
+    """
+    Yields ``(pattern, matches)`` for every generic pattern, in order, where
+    ``matches`` is the list of match objects ``re.finditer`` would produce.
+    """
+    # str.find also reports overlapping keywords (e.g. "urlabel")
+    positions = {}
+    for keyword in KEYWORDS:
+        found = positions[keyword] = []
+        i = html.find(keyword)
+        while i != -1:
+            found.append(i)
+            i = html.find(keyword, i + 1)
+
+    for regex, keywords, prefix in _compiled:
+        if len(keywords) == 1:
+            starts = positions[keywords[0]]
+        else:
+            starts = sorted(i for keyword in keywords for i in positions[keyword])
+        yield regex.pattern, _match_at(regex, html, starts, prefix)
+
+
+def _match_at(regex, html, starts, prefix):
+    matches = []
+    last_end = 0
+    for i in starts:
+        if i < last_end:
+            continue
+        first = last = i
+        if prefix == QUOTE:
+            if i == 0 or html[i - 1] not in QUOTES:
+                continue
+            first = last = i - 1
+        elif prefix == OPT_QUOTE:
+            if i > 0 and html[i - 1] in QUOTES:
+                first = i - 1
+        elif prefix == OPT_QUOTE_SPACE:
+            first = i
+            while first > 0 and _is_space(html, first - 1):
+                first -= 1
+            if first > 0 and html[first - 1] in QUOTES:
+                first -= 1
+
+        # finditer would have tried the earliest position not covered by the previous match
+        start = max(first, last_end)
+        if start > last:
+            continue
+        match = regex.match(html, start)
+        if match:
+            matches.append(match)
+            last_end = match.end()
+    return matches
+
+
+def legacy_matches(html):
+    """
+    The matches of the generic patterns as found by re.finditer, for
+    comparison with :func:`generic_matches`.
+    """
+    for regex, _, _ in _compiled:
+        yield regex.pattern, list(regex.finditer(html))
+
+
+def benchmark(pages, repeat=3):
+    """
+    Times :func:`legacy_matches` against :func:`generic_matches` over
+    ``pages`` (a list of page texts) and checks that both find the same
+    matches. Returns (legacy seconds, scanner seconds, mismatching page
+    indexes).
+    """
+    def run(func):
+        best = None
+        for _ in range(repeat):
+            start = time.time()
+            for html in pages:
+                for _pattern, _matches in func(html):
+                    pass
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def spans(func, html):
+        return [(pattern, [(m.span(), m.groupdict()) for m in matches]) for pattern, matches in func(html)]
+
+    mismatches = [i for i, html in enumerate(pages) if spans(legacy_matches, html) != spans(generic_matches, html)]
+    return run(legacy_matches), run(generic_matches), mismatches
+
+
+if __name__ == '__main__':
+    texts = []
+    for path in sys.argv[1:]:
+        with open(path, 'rb') as f:
+            texts.append(f.read().decode('utf-8', 'ignore').replace(r'\/', '/'))
+    legacy, scanner, bad = benchmark(texts)
+    print('%d pages: legacy %.4fs, scanner %.4fs (%.1fx)' % (len(texts), legacy, scanner, legacy / scanner if scanner else 0))
+    for i in bad:
+        print('MISMATCH: %s' % (sys.argv[1 + i]))
@@ -0,0 +1,125 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Remembers which stream a resolver returned for a web page, for as long as
+the stream URL is expected to stay valid. Entries live in the function
+cache, so they are also disabled by the ``use_cache`` setting and cleared by
+"reset cache".
+"""
+import time
+import calendar
+from email.utils import parsedate
+from six.moves import urllib_parse
+from resolveurl.lib import cache
+from resolveurl.lib import kodi
+
+# query parameters hosts use to sign stream URLs with an expiry timestamp
+EXPIRY_PARAMS = ['expires', 'expire', 'expiry', 'exp', 'e', 'validto', 'valid_to', 'deadline', 'ttl_end']
+DEFAULT_TTL = 15 * 60
+MIN_TTL = 60
+MAX_TTL = 6 * 60 * 60
+SAFETY_MARGIN = 120
+CACHE_NAME = 'resolved_stream'
+
+
+def enabled():
+    return kodi.get_setting('cache_streams') != 'false'
+
+
+def normalize_url(url):
+    """
+    Returns ``url`` with a lower case scheme and host, without default
+    ports, fragments or a leading ``www.`` and with sorted query arguments.
+    """
+    parts = urllib_parse.urlparse(url.strip())
+    scheme = parts.scheme.lower() or 'http'
+    netloc = parts.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = urllib_parse.urlencode(sorted(urllib_parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib_parse.urlunparse(('', netloc, parts.path or '/', parts.params, query, ''))
+
+
+def infer_ttl(stream_url, headers=None, now=None):
+    """
+    Returns how many seconds ``stream_url`` can be reused for, based on an
+    expiry timestamp in its query string, else on the ``Expires`` or
+    ``Cache-Control: max-age`` response headers, else DEFAULT_TTL. The result
+    is capped at MAX_TTL and 0 means the stream should not be cached.
+    """
+    if now is None:
+        now = time.time()
+    ttl = None
+
+    query = urllib_parse.parse_qs(urllib_parse.urlparse(stream_url.split('|')[0]).query)
+    for param in EXPIRY_PARAMS:
+        for value in query.get(param, []):
+            if value.isdigit():
+                timestamp = int(value)
+                if timestamp > 10 ** 12:
+                    timestamp = timestamp / 1000.0
+                # only trust values that look like a unix timestamp in the near future
+                if now - 86400 < timestamp < now + 30 * 86400:
+                    ttl = timestamp - now
+                    break
+        if ttl is not None:
+            break
+
+    if ttl is None and headers:
+        headers = dict((key.lower(), value) for key, value in headers.items())
+        for directive in headers.get('cache-control', '').split(','):
+            directive = directive.strip().lower()
+            if directive.startswith('max-age='):
+                try:
+                    ttl = int(directive[8:])
+                except ValueError:
+                    pass
+            elif directive in ('no-store', 'no-cache'):
+                ttl = 0
+        if ttl is None and headers.get('expires'):
+            expires = parsedate(headers['expires'])
+            if expires:
+                ttl = calendar.timegm(expires) - now
+
+    if ttl is None:
+        return DEFAULT_TTL
+
+    ttl -= SAFETY_MARGIN
+    if ttl < MIN_TTL:
+        return 0
+    return min(ttl, MAX_TTL)
+
+
+def get(resolver, web_url, options):
+    """
+    Returns the cached (host, media_id, result) tuple for ``web_url`` as
+    resolved by ``resolver``, or None.
+    """
+    if not enabled():
+        return None
+    in_cache, attempt = cache._get_func(CACHE_NAME, [type(resolver).__name__, normalize_url(web_url)], options, cache_limit=MAX_TTL / 3600.0)
+    return tuple(attempt) if in_cache else None
+
+
+def save(resolver, web_url, options, attempt, stream_url, headers=None):
+    if not enabled():
+        return
+    ttl = infer_ttl(stream_url, headers)
+    if ttl:
+        cache._save_func(CACHE_NAME, [type(resolver).__name__, normalize_url(web_url)], options, list(attempt), cache_limit=ttl / 3600.0)
@@ -0,0 +1,279 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Checks that a resolved stream URL answers before it is handed to Kodi.
+
+Probes go through a shared keep-alive :class:`ConnectionPool`, so playing a
+stream right after resolving it (or resolving several links from the same
+CDN) does not pay for a new TCP and TLS handshake. Passing verdicts that only
+depend on the host (a CDN that answers every probe with 403 or lets it time
+out) are remembered for VERDICT_TTL seconds. Failures are not, so one reset
+connection does not fail every other stream on that host.
+"""
+import re
+import ssl
+import threading
+import time
+import zlib
+import six
+from six.moves import urllib_parse
+from resolveurl import common
+from resolveurl.lib.pool import ConnectionPool
+
+PROBE_TIMEOUT = 15
+VERDICT_TTL = 120
+MAX_REDIRECTS = 5
+MAX_MANIFEST_SIZE = 64 * 1024
+# hosts that reject probes but play fine
+TOLERATED_CODES = [403, 405, 472]
+HLS_HINTS = ['.m3u8', '/hls/', '/playlist/']
+# bytes fetched by StreamProber.measure, enough to estimate the throughput of a CDN
+MEASURE_SIZE = 256 * 1024
+EXTM3U = re.compile(six.b(r'^(?:\xef\xbb\xbf)?\s*#EXTM3U'))
+
+
+class ProbeResult(object):
+    """
+    The outcome of a probe. ``latency`` is the number of seconds until the
+    (last) response headers arrived and ``cached`` is True when the verdict
+    was taken from the per-host cache.
+    """
+
+    def __init__(self, ok, status, mimetype='', headers=None, latency=0.0, cached=False, msg=''):
+        self.ok = ok
+        self.status = status
+        self.mimetype = mimetype
+        self.headers = headers or {}
+        self.latency = latency
+        self.cached = cached
+        self.msg = msg
+
+    def __repr__(self):
+        return '<ProbeResult ok=%s status=%s latency=%.3f cached=%s>' % (self.ok, self.status, self.latency, self.cached)
+
+
+class StreamProber(object):
+    def __init__(self, pool=None, verdict_ttl=VERDICT_TTL, timeout=PROBE_TIMEOUT):
+        if pool is None:
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+            try:
+                ssl_context.set_alpn_protocols(['http/1.1'])
+            except NotImplementedError:
+                pass
+            pool = ConnectionPool(ssl_context=ssl_context)
+        self.pool = pool
+        self.verdict_ttl = verdict_ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._verdicts = {}
+
+    def probe(self, stream_url):
+        """
+        Returns a :class:`ProbeResult` for ``stream_url`` (which may carry
+        Kodi style ``|Header=value`` suffixes). The stream is considered
+        playable on any status below 400, on the codes in TOLERATED_CODES and
+        on timeouts. ``.m3u8`` urls and responses with an ``mpegurl`` type
+        must also start with ``#EXTM3U``.
+        """
+        url, headers = self._split_url(stream_url)
+        scheme = urllib_parse.urlsplit(url).scheme.lower()
+        if scheme not in ('http', 'https'):
+            # treat an unhandled url type (rtmp, plugin://, ...) as success
+            return ProbeResult(True, 200)
+
+        verdict = self._get_verdict(url)
+        if verdict is not None:
+            return verdict
+
+        hls = any(x in url for x in HLS_HINTS)
+        headers['Accept-Encoding'] = 'gzip'
+        if not hls:
+            headers['Range'] = 'bytes=0-1023'
+        common.logger.log_debug('Setting Headers on Stream Probe: %s', headers)
+
+        host_level = False
+        start = time.time()
+        try:
+            response = self._open(url, headers)
+            try:
+                status = response.status
+                mimetype = response.getheader('Content-Type', '') or ''
+                resp_headers = dict(response.headers.items())
+                latency = response.elapsed
+                msg = response.reason
+                # /hls/ and /playlist/ paths only skip the Range header, they may well serve plain video files
+                if status < 400 and ('.m3u8' in url or 'mpegurl' in mimetype.lower()):
+                    if not self._is_playlist(response):
+                        status, msg = 415, 'Not an HLS playlist'
+                elif status < 400:
+                    response.read(2048)
+            finally:
+                response.close()
+            if status in TOLERATED_CODES:
+                host_level = True
+        except Exception as e:
+            mimetype = ''
+            resp_headers = {}
+            latency = time.time() - start
+            msg = str(e)
+            host_level = True
+            if msg == "''" or 'timed out' in msg:
+                status = 504
+            else:
+                status = 500
+
+        ok = status < 400 or status in TOLERATED_CODES or status == 504
+        if not ok:
+            common.logger.log_warning('Stream UrlOpen Failed: Url: %s HTTP Code: %s Msg: %s' % (stream_url, status, msg))
+        common.logger.log_debug('Stream probe: %s -> %s in %.3fs', url, status, latency)
+
+        result = ProbeResult(ok, status, mimetype, resp_headers, latency, msg=msg)
+        # a failure may be down to this one url or a passing glitch, so only verdicts that let streams through are shared
+        if host_level and ok:
+            self._save_verdict(url, result)
+        return result
+
+    def measure(self, stream_url, size=MEASURE_SIZE):
+        """
+        Downloads the first ``size`` bytes of ``stream_url`` (of its first
+        segment for HLS) and returns ``(ttfb, throughput)``: the seconds
+        until the first media response headers arrived, including any
+        playlists fetched on the way, and the bytes per second of the body.
+        Returns None if the stream could not be read.
+        """
+        url, headers = self._split_url(stream_url)
+        if urllib_parse.urlsplit(url).scheme.lower() not in ('http', 'https'):
+            return None
+        ttfb = 0.0
+        try:
+            # a master playlist points at a media playlist, which points at the segments
+            for _ in range(3):
+                if not any(x in url for x in HLS_HINTS):
+                    break
+                response = self._open(url, dict(headers, **{'Accept-Encoding': 'gzip'}))
+                try:
+                    ttfb += response.elapsed
+                    if response.status >= 400:
+                        return None
+                    playlist = self._read_playlist(response)
+                finally:
+                    response.close()
+                if playlist is None or EXTM3U.match(playlist) is None:
+                    break
+                uri = self._first_uri(playlist)
+                if uri is None:
+                    return None
+                url = urllib_parse.urljoin(response.url, uri)
+
+            response = self._open(url, dict(headers, Range='bytes=0-%d' % (size - 1)))
+            try:
+                if response.status >= 400:
+                    return None
+                ttfb += response.elapsed
+                start = time.time()
+                received = 0
+                while received < size:
+                    data = response.read(min(65536, size - received))
+                    if not data:
+                        break
+                    received += len(data)
+                elapsed = time.time() - start
+            finally:
+                response.close()
+        except Exception as e:
+            common.logger.log_debug('Stream measure failed: %s: %s', url, e)
+            return None
+        if not received:
+            return None
+        common.logger.log_debug('Stream measure: %s -> ttfb %.3fs, %d bytes in %.3fs', url, ttfb, received, elapsed)
+        return ttfb, received / max(elapsed, 0.001)
+
+    def clear(self):
+        with self._lock:
+            self._verdicts.clear()
+        self.pool.clear()
+
+    def _open(self, url, headers):
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.pool.urlopen('GET', url, headers=headers, timeout=self.timeout)
+            location = response.getheader('Location')
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                return response
+            response.close()
+            url = urllib_parse.urljoin(url, location)
+            headers.pop('Host', None)
+        return response
+
+    def _read_playlist(self, response):
+        data = response.read(MAX_MANIFEST_SIZE)
+        if (response.getheader('Content-Encoding') or '').lower() in ('gzip', 'deflate'):
+            try:
+                data = zlib.decompressobj(zlib.MAX_WBITS | 32).decompress(data, MAX_MANIFEST_SIZE)
+            except zlib.error:
+                return None
+        return data
+
+    def _is_playlist(self, response):
+        data = self._read_playlist(response)
+        return data is not None and EXTM3U.match(data) is not None
+
+    def _first_uri(self, playlist):
+        if not playlist:
+            return None
+        for line in playlist.splitlines():
+            line = line.strip()
+            if line and not line.startswith(six.b('#')):
+                return six.ensure_str(line)
+        return None
+
+    def _split_url(self, stream_url):
+        # parse_qsl doesn't work because it splits elements by ';' which can be in a non-quoted UA
+        if '|' in stream_url:
+            url, header_str = stream_url.split('|', 1)
+            headers = dict([item.split('=', 1) for item in header_str.split('&') if '=' in item])
+        else:
+            url = stream_url
+            headers = {'User-Agent': common.FF_USER_AGENT}
+        for header in headers:
+            headers[header] = urllib_parse.unquote_plus(headers[header])
+        headers.pop('verifypeer', None)
+        return url, headers
+
+    def _host(self, url):
+        return urllib_parse.urlsplit(url).netloc.lower()
+
+    def _get_verdict(self, url):
+        host = self._host(url)
+        with self._lock:
+            verdict = self._verdicts.get(host)
+            if verdict is None:
+                return None
+            if verdict[0] < time.time():
+                del self._verdicts[host]
+                return None
+        result = verdict[1]
+        common.logger.log_debug('Using cached stream probe verdict for %s: %s' % (host, result.status))
+        return ProbeResult(result.ok, result.status, result.mimetype, result.headers, 0.0, cached=True, msg=result.msg)
+
+    def _save_verdict(self, url, result):
+        with self._lock:
+            self._verdicts[self._host(url)] = (time.time() + self.verdict_ttl, result)
+
+
+prober = StreamProber()
@@ -120,5 +120,18 @@ STRINGS = {
     'cl_background': 33103,
     'not_premium': 33099,
     'clean_settings': 33101,
-    'settings_cleaned': 33102
+    'settings_cleaned': 33102,
+    'race_resolvers': 33104,
+    'race_workers': 33105,
+    'cache_streams': 33106,
+    'transfer_ready': 33107,
+    'transfer_failed': 33108,
+    'telemetry': 33109,
+    'adaptive_order': 33110,
+    'telemetry_report': 33111,
+    'reset_telemetry': 33112,
+    'telemetry_reset': 33113,
+    'domains': 33114,
+    'last_error': 33115,
+    'auto_fastest': 33116
 }
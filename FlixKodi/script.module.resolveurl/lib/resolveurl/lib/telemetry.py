@@ -0,0 +1,235 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Success and latency counters of the resolver plugins.
+
+Every resolve attempt made by :class:`resolveurl.HostedMediaFile` is
+recorded per resolver and per link domain: attempts, successes, the latency
+of the last LATENCY_SAMPLES attempts (for p50/p95) and the last error. The
+counters are rows of their own table in the function cache database
+(:mod:`resolveurl.lib.cache`), so each attempt only updates the two rows it
+touches and concurrent invocations do not overwrite each other.
+
+With the ``adaptive_order`` setting, :func:`order_key` uses them to demote
+resolvers that failed on each of their last DEMOTE_STREAK attempts, and to
+order resolvers of equal priority by success rate and latency.
+"""
+import os
+import json
+import time
+import threading
+from resolveurl import common
+from resolveurl.lib import cache, kodi
+
+# counters of older versions, replaced by the stats table
+LEGACY_STATS_FILE = os.path.join(common.profile_path, 'resolver_stats.json')
+LATENCY_SAMPLES = 20
+MAX_DOMAINS = 500
+PRUNE_EVERY = 50
+DEMOTE_STREAK = 3
+# a demoted resolver gets another chance once its last failure is this old
+DEMOTE_EXPIRY = 6 * 60 * 60
+RESOLVER = 'resolver'
+DOMAIN = 'domain'
+COLUMNS = ('attempts', 'successes', 'streak', 'last_error', 'last_failure', 'last', 'latencies')
+
+_lock = threading.Lock()
+_created = False
+_records = 0
+
+
+def enabled():
+    return kodi.get_setting('telemetry') != 'false' and cache.sqlite3 is not None
+
+
+def adaptive():
+    return enabled() and kodi.get_setting('adaptive_order') == 'true'
+
+
+def _get_db():
+    global _created
+    db = cache._get_db()
+    with _lock:
+        if not _created:
+            with db:
+                db.execute('CREATE TABLE IF NOT EXISTS resolver_stats (kind TEXT, name TEXT, attempts INTEGER, successes INTEGER, streak INTEGER, '
+                           'last_error TEXT, last_failure INTEGER, last INTEGER, latencies TEXT, PRIMARY KEY (kind, name))')
+            try:
+                os.remove(LEGACY_STATS_FILE)
+            except OSError:
+                pass
+            _created = True
+    return db
+
+
+def _entry(row):
+    entry = dict(zip(COLUMNS, row))
+    for column in ('attempts', 'successes', 'streak', 'last_failure', 'last'):
+        entry[column] = entry[column] or 0
+    entry['latencies'] = json.loads(entry['latencies'] or '[]')
+    return entry
+
+
+def _get_entry(db, kind, name):
+    row = db.execute('SELECT %s FROM resolver_stats WHERE kind=? AND name=?' % ', '.join(COLUMNS), (kind, name)).fetchone()
+    return _entry(row) if row else None
+
+
+def _get_entries(kind):
+    db = _get_db()
+    rows = db.execute('SELECT name, %s FROM resolver_stats WHERE kind=?' % ', '.join(COLUMNS), (kind,)).fetchall()
+    return dict((row[0], _entry(row[1:])) for row in rows)
+
+
+def _get(kind, name):
+    if not enabled():
+        return None
+    try:
+        return _get_entry(_get_db(), kind, name)
+    except Exception as e:
+        common.logger.log_warning('Failed to read resolver stats: %s' % e)
+        return None
+
+
+def _update(db, kind, name, success, latency, error, now):
+    entry = _get_entry(db, kind, name) or {}
+    entry['attempts'] = entry.get('attempts', 0) + 1
+    if success:
+        entry['successes'] = entry.get('successes', 0) + 1
+        entry['streak'] = 0
+    else:
+        entry['streak'] = entry.get('streak', 0) + 1
+        entry['last_error'] = error
+        entry['last_failure'] = int(now)
+    latencies = entry.get('latencies', [])
+    latencies.append(int(latency * 1000))
+    entry['latencies'] = json.dumps(latencies[-LATENCY_SAMPLES:])
+    entry['last'] = int(now)
+    db.execute('INSERT OR REPLACE INTO resolver_stats (kind, name, %s) VALUES (?, ?, %s)' % (', '.join(COLUMNS), ', '.join('?' * len(COLUMNS))),
+               [kind, name] + [entry.get(column) for column in COLUMNS])
+
+
+def record(resolver, domain, success, latency, error=None):
+    """
+    Records one resolve attempt of ``resolver`` for a link on ``domain``
+    that took ``latency`` seconds. ``error`` is the name of the exception
+    class of a failed attempt.
+    """
+    global _records
+    if not enabled():
+        return
+    now = time.time()
+    try:
+        db = _get_db()
+        with db:
+            # read and write the rows in one go, other invocations may be recording too
+            db.execute('BEGIN IMMEDIATE')
+            _update(db, RESOLVER, type(resolver).__name__, success, latency, error, now)
+            if domain:
+                _update(db, DOMAIN, domain, success, latency, error, now)
+                _records += 1
+                if _records % PRUNE_EVERY == 1:
+                    db.execute('DELETE FROM resolver_stats WHERE kind=? AND name NOT IN '
+                               '(SELECT name FROM resolver_stats WHERE kind=? ORDER BY last DESC LIMIT ?)', (DOMAIN, DOMAIN, MAX_DOMAINS))
+    except Exception as e:
+        common.logger.log_warning('Failed to save resolver stats: %s' % e)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summary(entry):
+    """
+    Returns the counters of a stats entry as a dict with attempts,
+    successes, success_rate, p50 and p95 (ms), last_error and streak.
+    """
+    attempts = entry.get('attempts', 0)
+    successes = entry.get('successes', 0)
+    return {
+        'attempts': attempts,
+        'successes': successes,
+        'success_rate': float(successes) / attempts if attempts else None,
+        'p50': _percentile(entry.get('latencies'), 0.5),
+        'p95': _percentile(entry.get('latencies'), 0.95),
+        'last_error': entry.get('last_error'),
+        'streak': entry.get('streak', 0)
+    }
+
+
+def get_stats(klass):
+    """
+    Returns the :func:`summary` of a resolver class, or None if it was
+    never used.
+    """
+    entry = _get(RESOLVER, klass.__name__)
+    return summary(entry) if entry else None
+
+
+def is_demoted(entry, now=None):
+    if now is None:
+        now = time.time()
+    return entry.get('streak', 0) >= DEMOTE_STREAK and now - entry.get('last_failure', 0) < DEMOTE_EXPIRY
+
+
+def order_key(klass):
+    """
+    Sort key for resolver classes: demoted resolvers last, then by the
+    priority setting, then by success rate and p50 latency.
+    """
+    entry = _get(RESOLVER, klass.__name__)
+    if not entry:
+        return (False, klass._get_priority(), 0, 0)
+    stats = summary(entry)
+    return (is_demoted(entry), klass._get_priority(), -stats['success_rate'], stats['p50'] or 0)
+
+
+def report():
+    """
+    Returns the counters as text for the report view, resolvers first and
+    then the link domains, most used first.
+    """
+    try:
+        sections = [(common.i18n('resolvers'), _get_entries(RESOLVER)), (common.i18n('domains'), _get_entries(DOMAIN))]
+    except Exception as e:
+        common.logger.log_warning('Failed to read resolver stats: %s' % e)
+        sections = []
+    lines = []
+    for title, entries in sections:
+        lines.append('[B]%s[/B]' % title)
+        for name in sorted(entries, key=lambda x: -entries[x].get('attempts', 0)):
+            s = summary(entries[name])
+            line = '%s: %d/%d ok (%d%%), p50 %sms, p95 %sms' % (name, s['successes'], s['attempts'], 100 * (s['success_rate'] or 0), s['p50'], s['p95'])
+            if s['last_error']:
+                line += ', %s: %s' % (common.i18n('last_error'), s['last_error'])
+            if is_demoted(entries[name]):
+                line = '[COLOR red]%s[/COLOR]' % line
+            lines.append(line)
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def reset():
+    try:
+        db = _get_db()
+        with db:
+            db.execute('DELETE FROM resolver_stats')
+    except Exception as e:
+        common.logger.log_warning('Failed to reset resolver stats: %s' % e)
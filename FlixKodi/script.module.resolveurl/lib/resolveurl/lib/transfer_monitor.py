@@ -0,0 +1,261 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Polling helpers for debrid cloud transfers.
+
+* :class:`PollSchedule` picks the next poll interval from the reported ETA,
+  speed or progress instead of a fixed interval: short while a transfer is
+  about to finish, backing off while it is queued or stalled.
+* :func:`wait` sleeps for that interval but returns as soon as the progress
+  dialog is cancelled.
+* :class:`StatusBoard` answers the status polls of all transfers of one
+  service with a single list call, for services whose list endpoint
+  returns every transfer.
+* :func:`continue_in_background` queues a transfer the user chose to keep
+  after cancelling. The add-on's service (``lib/service.py``) runs
+  :func:`run_service`, which polls the queued transfers through
+  ``get_transfer_state`` of their resolver and notifies the user once one
+  is ready or has failed.
+
+    usage:
+
+    schedule = PollSchedule()
+    while not done:
+        wait(schedule.next(progress=progress, eta=eta), pd)  # returns early when pd is cancelled
+        ...
+
+"""
+import json
+import threading
+import time
+from kodi_six import xbmc
+from resolveurl import common
+from resolveurl.lib import cache, kodi
+from resolveurl.resolver import ResolverError
+
+MIN_INTERVAL = 1
+MAX_INTERVAL = 30
+BACKOFF = 1.5
+# share of the remaining time to wait before the next poll
+ETA_FRACTION = 0.25
+WAIT_STEP = 0.25
+BOARD_MAX_AGE = 2
+BACKGROUND_MIN_INTERVAL = 15
+BACKGROUND_MAX_INTERVAL = 60
+# queued transfers that are not done by then are forgotten
+BACKGROUND_TIMEOUT = 3 * 60 * 60
+# how often the service looks for newly queued transfers
+SERVICE_INTERVAL = 5
+
+_boards_lock = threading.Lock()
+_boards = {}
+_queue_created = False
+
+
+class PollSchedule(object):
+    """
+    Returns how long to wait before the next status poll of a transfer. The
+    remaining time is taken from ``eta`` if the service reports one, else
+    from ``remaining`` bytes and ``speed``, else it is extrapolated from how
+    fast ``progress`` (0-100) moved since the previous poll. Without any of
+    those (queued, converting a magnet, stalled) the interval grows by
+    BACKOFF per poll.
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._last = None
+
+    def next(self, progress=None, eta=None, speed=None, remaining=None):
+        now = time.time()
+        if not eta and speed and remaining:
+            eta = float(remaining) / speed
+        if not eta and progress is not None and self._last is not None:
+            last_time, last_progress = self._last
+            rate = (progress - last_progress) / max(now - last_time, 0.001)
+            if rate > 0:
+                eta = (100 - progress) / rate
+        if progress is not None:
+            self._last = (now, progress)
+
+        if eta and eta > 0:
+            interval = eta * ETA_FRACTION
+        else:
+            interval = self.interval * BACKOFF
+        self.interval = max(self.min_interval, min(self.max_interval, interval))
+        return self.interval
+
+
+def wait(seconds, dialog=None):
+    """
+    Sleeps for ``seconds``. Returns True early if ``dialog`` (a
+    :class:`kodi.ProgressDialog`) gets cancelled and raises ResolverError if
+    Kodi is shutting down.
+    """
+    monitor = xbmc.Monitor()
+    end = time.time() + seconds
+    while True:
+        if monitor.abortRequested():
+            raise ResolverError('Kodi is shutting down')
+        if dialog is not None and dialog.is_canceled():
+            return True
+        left = end - time.time()
+        if left <= 0:
+            return False
+        kodi.sleep(int(1000 * min(WAIT_STEP, left)))
+
+
+class StatusBoard(object):
+    """
+    Caches the result of a "list all transfers" call for ``max_age``
+    seconds, so that several transfers being waited for at the same time
+    (e.g. by :func:`resolveurl.resolve_many` or a background transfer) cost
+    one request per poll instead of one each. ``fetch_all`` returns a dict
+    of transfer id -> status.
+    """
+
+    def __init__(self, fetch_all, max_age=BOARD_MAX_AGE):
+        self.fetch_all = fetch_all
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._fetched = 0
+        self._statuses = {}
+
+    def get(self, transfer_id):
+        with self._lock:
+            if time.time() - self._fetched >= self.max_age or transfer_id not in self._statuses:
+                self._statuses = self.fetch_all() or {}
+                self._fetched = time.time()
+            return self._statuses.get(transfer_id)
+
+
+def board(name, fetch_all, max_age=BOARD_MAX_AGE):
+    """
+    Returns the shared :class:`StatusBoard` of the service ``name``, fetching
+    with the most recently passed ``fetch_all`` (e.g. after a token refresh).
+    """
+    with _boards_lock:
+        status_board = _boards.get(name)
+        if status_board is None:
+            status_board = _boards[name] = StatusBoard(fetch_all, max_age)
+        status_board.fetch_all = fetch_all
+        return status_board
+
+
+def _get_db():
+    global _queue_created
+    db = cache._get_db()
+    with _boards_lock:
+        if not _queue_created:
+            with db:
+                db.execute('CREATE TABLE IF NOT EXISTS background_transfers (module TEXT, klass TEXT, transfer_id TEXT, label TEXT, added REAL, '
+                           'PRIMARY KEY (module, klass, transfer_id))')
+            _queue_created = True
+    return db
+
+
+def continue_in_background(resolver, transfer_id, label=''):
+    """
+    Queues a transfer of ``resolver`` for the service to keep polling, and
+    returns whether that worked. The resolver has to implement
+    ``get_transfer_state``.
+    """
+    try:
+        db = _get_db()
+        with db:
+            db.execute('INSERT OR REPLACE INTO background_transfers (module, klass, transfer_id, label, added) VALUES (?, ?, ?, ?, ?)',
+                       (type(resolver).__module__, type(resolver).__name__, json.dumps(transfer_id), label or '', time.time()))
+    except Exception as e:
+        common.logger.log_warning('%s: failed to queue background transfer %s: %s' % (resolver.name, transfer_id, e))
+        return False
+    common.logger.log_debug('%s: queued background transfer %s' % (resolver.name, transfer_id))
+    return True
+
+
+def _get_queued():
+    return _get_db().execute('SELECT module, klass, transfer_id, label, added FROM background_transfers').fetchall()
+
+
+def _dequeue(module, klass, transfer_id):
+    try:
+        db = _get_db()
+        with db:
+            db.execute('DELETE FROM background_transfers WHERE module=? AND klass=? AND transfer_id=?', (module, klass, transfer_id))
+    except Exception as e:
+        common.logger.log_warning('%s: failed to remove background transfer %s: %s' % (klass, transfer_id, e))
+
+
+def _get_class(module, klass):
+    return getattr(__import__(module, fromlist=[klass]), klass)
+
+
+def _poll(module, klass, transfer_id):
+    # a fresh instance picks up tokens refreshed since the transfer was queued
+    resolver = _get_class(module, klass)()
+    with kodi.QuietDialogs():
+        return resolver.get_transfer_state(json.loads(transfer_id))
+
+
+def run_service():
+    """
+    Polls the transfers queued by :func:`continue_in_background` until
+    Kodi shuts down. Each transfer gets its own :class:`PollSchedule` and
+    is dropped from the queue once it is ready, has failed or is older than
+    BACKGROUND_TIMEOUT.
+    """
+    monitor = xbmc.Monitor()
+    schedules = {}
+    while not monitor.abortRequested():
+        now = time.time()
+        try:
+            queued = _get_queued()
+        except Exception as e:
+            common.logger.log_warning('Failed to read background transfers: %s' % e)
+            queued = []
+        for module, klass, transfer_id, label, added in queued:
+            key = (module, klass, transfer_id)
+            if key not in schedules:
+                schedule = PollSchedule(BACKGROUND_MIN_INTERVAL, BACKGROUND_MAX_INTERVAL)
+                schedules[key] = [schedule, now + schedule.next()]
+            schedule, due = schedules[key]
+            if now - added > BACKGROUND_TIMEOUT:
+                common.logger.log_debug('%s: stopped tracking background transfer %s' % (klass, transfer_id))
+                _dequeue(*key)
+                continue
+            if now < due:
+                continue
+
+            try:
+                done, failed, progress, eta = _poll(module, klass, transfer_id)
+            except Exception as e:
+                common.logger.log_warning('%s: background transfer %s poll failed: %s' % (klass, transfer_id, e))
+                done = failed = False
+                progress = eta = None
+            if done or failed:
+                msg = common.i18n('transfer_ready') if done else common.i18n('transfer_failed')
+                common.logger.log_debug('%s: background transfer %s: %s' % (klass, transfer_id, msg))
+                kodi.notify('%s %s' % (_get_class(module, klass).name, common.i18n('transfer')), '%s: %s' % (msg, label) if label else msg, duration=5000)
+                _dequeue(*key)
+            else:
+                schedules[key][1] = time.time() + schedule.next(progress=progress, eta=eta)
+
+        for key in set(schedules) - set(row[:3] for row in queued):
+            del schedules[key]
+        if monitor.waitForAbort(SERVICE_INTERVAL):
+            break
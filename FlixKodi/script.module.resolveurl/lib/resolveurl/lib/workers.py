@@ -0,0 +1,70 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Shared helpers for running resolver work concurrently. ``futures`` is None
+when :mod:`concurrent.futures` is not available (Python 2), in which case
+callers fall back to doing the work serially.
+"""
+import threading
+
+try:
+    from concurrent import futures
+except ImportError:
+    futures = None
+
+
+class _NoLimit(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+
+_no_limit = _NoLimit()
+
+
+class KeyedLimiter(object):
+    """
+    Caps the number of threads holding a slot for the same key (a host, a
+    debrid API, ...)::
+
+        limiter = KeyedLimiter(2)
+        with limiter.slot('real-debrid.com'):
+            ...
+
+    A key of None is never limited.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def slot(self, key):
+        if key is None:
+            return _no_limit
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = self._semaphores[key] = threading.BoundedSemaphore(self.limit)
+        return semaphore
+
+
+# concurrent calls into the same debrid API, across all threads
+API_LIMIT = 2
+api_limiter = KeyedLimiter(API_LIMIT)
@@ -0,0 +1,193 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2026 script.module.resolveurl
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+This module keeps a manifest of the built-in resolver plugins so that
+:mod:`resolveurl` can pick resolvers for a URL without importing every
+plugin module. The manifest is generated by importing all plugins once and
+is cached in the add-on profile until a plugin file, the add-on version or
+the Kodi language changes.
+"""
+import os
+import json
+import hashlib
+import importlib
+import six
+from resolveurl import common
+from resolveurl import plugins
+from resolveurl.lib import kodi
+from resolveurl.resolver import ResolveUrl
+
+MANIFEST_VERSION = 1
+manifest_file = os.path.join(common.profile_path, 'plugin_manifest.json')
+plugins_dir = os.path.dirname(os.path.abspath(plugins.__file__))
+
+_entries = None
+_modules = None
+_fingerprint = None
+
+
+class PluginEntry(object):
+    """
+    Describes a resolver class as recorded in the manifest. The class itself
+    is only imported by :meth:`load`.
+    """
+
+    def __init__(self, info, klass=None):
+        self.class_name = info['class_name']
+        self.module = info['module']
+        self.name = info['name']
+        self.domains = info['domains']
+        self.pattern = info['pattern']
+        self.universal = info['universal']
+        self.popup = info['popup']
+        self.custom_enabled = info['custom_enabled']
+        self.settings = info['settings']
+        self._klass = klass
+
+    @classmethod
+    def from_class(cls, klass):
+        return cls(describe(klass), klass)
+
+    def load(self):
+        if self._klass is None:
+            module = importlib.import_module(self.module)
+            self._klass = getattr(module, self.class_name)
+        return self._klass
+
+    def is_enabled(self):
+        # every built-in _is_enabled override also requires <Class>_enabled, so check that before importing
+        if self._klass is None and common.get_setting('%s_enabled' % self.class_name) != 'true':
+            return False
+        if self.custom_enabled or self._klass is not None:
+            return bool(self.load()._is_enabled())
+        return common.get_setting('%s_login' % self.class_name) in ['', 'true']
+
+    def __repr__(self):
+        return '<PluginEntry %s.%s>' % (self.module, self.class_name)
+
+
+def describe(klass):
+    """
+    Returns the manifest record of a resolver class.
+    """
+    return {
+        'class_name': klass.__name__,
+        'module': klass.__module__,
+        'name': klass.name,
+        'domains': list(klass.domains),
+        'pattern': klass.pattern,
+        'universal': bool(klass.isUniversal()),
+        'popup': bool(klass.isPopup()),
+        'custom_enabled': klass._is_enabled.__func__ is not ResolveUrl._is_enabled.__func__,
+        'settings': klass.get_settings_xml()
+    }
+
+
+def get_fingerprint():
+    """
+    Returns a hash of the add-on version, the Kodi language and the name,
+    size and mtime of every plugin file.
+    """
+    global _fingerprint
+    if _fingerprint is None:
+        fp = hashlib.md5()
+        fp.update(six.b('%s|%s|%s' % (MANIFEST_VERSION, common.addon_version, kodi.get_language())))
+        for filename in sorted(os.listdir(plugins_dir)):
+            if filename.endswith('.py'):
+                stat = os.stat(os.path.join(plugins_dir, filename))
+                fp.update(six.b('|%s:%d:%d' % (filename, stat.st_mtime, stat.st_size)))
+        _fingerprint = fp.hexdigest()
+    return _fingerprint
+
+
+def get_entries():
+    """
+    Returns a :class:`PluginEntry` for every built-in resolver class, reading
+    the cached manifest when it is still current and regenerating it
+    otherwise.
+    """
+    global _entries
+    if _entries is None:
+        fingerprint = get_fingerprint()
+        infos = _read_manifest(fingerprint)
+        if infos is None:
+            common.logger.log_debug('Generating plugin manifest')
+            infos = _build_manifest()
+            _write_manifest(fingerprint, infos)
+        _entries = [PluginEntry(info) for info in infos]
+    return _entries
+
+
+def get_modules():
+    global _modules
+    if _modules is None:
+        _modules = set(entry.module for entry in get_entries())
+    return _modules
+
+
+def _read_manifest(fingerprint):
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('fingerprint') == fingerprint:
+            return manifest['plugins']
+    except Exception:
+        pass
+    return None
+
+
+def _write_manifest(fingerprint, infos):
+    manifest = {'fingerprint': fingerprint, 'plugins': infos}
+    tmp_file = '%s.%s.tmp' % (manifest_file, os.getpid())
+    try:
+        if not os.path.exists(common.profile_path):
+            os.makedirs(common.profile_path)
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        if six.PY3:
+            os.replace(tmp_file, manifest_file)
+        else:
+            if os.path.exists(manifest_file):
+                os.remove(manifest_file)
+            os.rename(tmp_file, manifest_file)
+    except Exception as e:
+        common.logger.log_warning('Failed to write plugin manifest: %s' % (e))
+
+
+def _build_manifest():
+    from resolveurl.plugins.__resolve_generic__ import ResolveGeneric
+
+    infos = []
+    for filename in sorted(os.listdir(plugins_dir)):
+        if filename == '__init__.py' or not filename.endswith('.py'):
+            continue
+
+        mod_name = 'resolveurl.plugins.%s' % filename[:-3]
+        try:
+            module = importlib.import_module(mod_name)
+        except Exception as e:
+            common.logger.log_warning('Failed to load plugin %s: %s' % (mod_name, e))
+            continue
+
+        klasses = [obj for obj in vars(module).values()
+                   if isinstance(obj, type) and obj.__module__ == mod_name and (ResolveUrl in obj.__bases__ or ResolveGeneric in obj.__bases__)]
+        for klass in sorted(klasses, key=lambda x: x.__name__):
+            try:
+                infos.append(describe(klass))
+            except Exception as e:
+                common.logger.log_warning('Failed to describe plugin %s: %s' % (klass.__name__, e))
+    return infos
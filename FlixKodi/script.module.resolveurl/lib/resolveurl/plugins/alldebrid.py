@@ -19,7 +19,7 @@
 import re
 from six.moves import urllib_error
 import json
-from resolveurl.lib import helpers
+from resolveurl.lib import helpers, hoster_match, transfer_monitor
 from resolveurl import common
 from resolveurl.common import i18n
 from resolveurl.resolver import ResolveUrl, ResolverError
@@ -165,8 +165,9 @@ class AllDebridResolver(ResolveUrl):
                 line2 = i18n('ad_uptobox')
                 line3 = transfer_info.get('status')
                 with common.kodi.ProgressDialog('ResolveURL AllDebrid {0}'.format(i18n('transfer')), line1, line2, line3) as pd:
+                    schedule = transfer_monitor.PollSchedule()
                     while not transfer_info.get('statusCode') == 4:
-                        common.kodi.sleep(1000 * interval)
+                        transfer_monitor.wait(schedule.next(eta=self.__eta(transfer_info)), pd)
                         transfer_info = self.__list_transfer(transfer_id)
                         file_size = transfer_info.get('size')
                         file_size2 = round(float(file_size) / (1000 ** 3), 2)
@@ -195,7 +196,9 @@ class AllDebridResolver(ResolveUrl):
                                 heading='ResolveURL AllDebrid {0}'.format(i18n('transfer')),
                                 line1=i18n('ad_background')
                             )
-                            if not keep_transfer:
+                            if keep_transfer:
+                                transfer_monitor.continue_in_background(self, transfer_id, line1)
+                            else:
                                 self.__delete_transfer(transfer_id)
                             logger.log_debug('ResolveURL AllDebrid {0} ID {1} :: {2}'.format(i18n('transfer'), transfer_id, i18n('user_cancelled')))
                             return
@@ -211,6 +214,37 @@ class AllDebridResolver(ResolveUrl):
             self.__delete_transfer(transfer_id)
             raise ResolverError('Transfer ID {0} :: {1}'.format(transfer_id, e))
 
+    def __eta(self, transfer_info):
+        # statusCode 1 is downloading to the AllDebrid cloud, 3 is uploading to the file host
+        if transfer_info.get('statusCode') == 1:
+            speed, done = transfer_info.get('downloadSpeed'), transfer_info.get('downloaded')
+        elif transfer_info.get('statusCode') == 3:
+            speed, done = transfer_info.get('uploadSpeed'), transfer_info.get('uploaded')
+        else:
+            return None
+        size = float(transfer_info.get('size') or 0)
+        if speed and size:
+            return (size - float(done or 0)) / float(speed)
+        return None
+
+    def __list_transfers(self):
+        try:
+            url = api_url + '.1/magnet/status'
+            data = {'status': 'active'}
+            result = json.loads(self.net.http_POST(url, form_data=data, headers=self.headers).content)
+            if result.get('status', False) == "success":
+                return dict((magnet.get('id'), magnet) for magnet in result.get('data').get('magnets'))
+        except Exception as e:
+            logger.log_debug('AllDebrid: failed to list transfers: {0}'.format(e))
+
+        return {}
+
+    def get_transfer_state(self, transfer_id):
+        # one call answers the polls of every active transfer, finished or failed ones are looked up by id
+        transfer_info = transfer_monitor.board(self.name, self.__list_transfers).get(transfer_id) or self.__list_transfer(transfer_id)
+        status_code = transfer_info.get('statusCode') or 0
+        return status_code == 4, 5 <= status_code <= 10, None, self.__eta(transfer_info)
+
     def __delete_transfer(self, transfer_id):
         try:
             url = api_url + '/magnet/delete'
@@ -283,17 +317,16 @@ class AllDebridResolver(ResolveUrl):
             if url.lower().startswith('magnet:') and self.get_setting('torrents') == 'true':
                 return True
             if self.hosters is None:
-                self.hosters = self.get_all_hosters()
+                self.hosters = hoster_match.regex_set(self.get_all_hosters())
 
-            for regexp in self.hosters:
-                if re.search(regexp, url):
-                    logger.log_debug('AllDebrid Match found')
-                    return True
+            if self.hosters.search(url):
+                logger.log_debug('AllDebrid Match found')
+                return True
         elif host:
             if self.hosts is None:
-                self.hosts = self.get_hosts()
+                self.hosts = hoster_match.host_set(self.get_hosts())
 
-            if any(host in item for item in self.hosts):
+            if self.hosts.contains(host):
                 return True
 
         return False
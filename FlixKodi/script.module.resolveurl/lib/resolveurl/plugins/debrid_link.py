@@ -20,6 +20,7 @@ import re
 import json
 from six.moves import urllib_error
 from resolveurl import common
+from resolveurl.lib import hoster_match
 from resolveurl.common import i18n
 from resolveurl.resolver import ResolveUrl, ResolverError
 
@@ -195,6 +196,10 @@ class DebridLinkResolver(ResolveUrl):
     def get_host_and_id(self, url):
         return 'debrid-link.fr', url
 
+    def _unrestrict(self, link):
+        # the links of a return_all result are already direct download links
+        return link
+
     @common.cache.cache_method(cache_limit=8)
     def get_all_hosters(self, retry=False):
         hosters = []
@@ -259,17 +264,16 @@ class DebridLinkResolver(ResolveUrl):
                 return True
 
             if self.hosters is None:
-                self.hosters = self.get_all_hosters()
+                self.hosters = hoster_match.regex_set(self.get_all_hosters())
 
-            for regexp in self.hosters:
-                if re.search(regexp, url):
-                    logger.log_debug('Debrid-Link Match found')
-                    return True
+            if self.hosters.search(url):
+                logger.log_debug('Debrid-Link Match found')
+                return True
         elif host:
             if self.hosts is None:
-                self.hosts = self.get_hosts()
+                self.hosts = hoster_match.host_set(self.get_hosts())
 
-            if any(host in item for item in self.hosts):
+            if self.hosts.contains(host):
                 return True
 
         return False
@@ -18,10 +18,9 @@
 
 import json
 import six
-from resolveurl.lib import helpers
+from resolveurl.lib import crypto, helpers
 from resolveurl import common
 from resolveurl.resolver import ResolveUrl, ResolverError
-from resolveurl.lib.pyaes import AESModeOfOperationCBC, Encrypter, Decrypter
 from six.moves import urllib_parse
 
 
@@ -67,15 +66,11 @@ class DembedResolver(ResolveUrl):
         return 'https://{0}/encrypt-ajax.php?{1}'.format(host, urllib_parse.urlencode(params))
 
     def _encrypt(self, msg):
-        encrypter = Encrypter(AESModeOfOperationCBC(self.key, self.iv))
-        ciphertext = encrypter.feed(msg)
-        ciphertext += encrypter.feed()
+        ciphertext = crypto.aes_cbc_encrypt(self.key, self.iv, msg)
         ciphertext = helpers.b64encode(ciphertext)
         return ciphertext
 
     def _decrypt(self, msg):
         ct = helpers.b64decode(msg, binary=True)
-        decrypter = Decrypter(AESModeOfOperationCBC(self.key, self.iv))
-        decrypted = decrypter.feed(ct)
-        decrypted += decrypter.feed()
+        decrypted = crypto.aes_cbc_decrypt(self.key, self.iv, ct)
         return six.ensure_str(decrypted)
@@ -19,10 +19,9 @@
 import json
 import six
 import re
-from resolveurl.lib import helpers
+from resolveurl.lib import crypto, helpers
 from resolveurl import common
 from resolveurl.resolver import ResolveUrl, ResolverError
-from resolveurl.lib.pyaes import AESModeOfOperationCBC, Encrypter, Decrypter
 
 
 class GoloadResolver(ResolveUrl):
@@ -69,16 +68,12 @@ class GoloadResolver(ResolveUrl):
 
     def _encrypt(self, msg, keyid=0):
         key = six.ensure_binary(self.keys[keyid])
-        encrypter = Encrypter(AESModeOfOperationCBC(key, self.iv))
-        ciphertext = encrypter.feed(msg)
-        ciphertext += encrypter.feed()
+        ciphertext = crypto.aes_cbc_encrypt(key, self.iv, msg)
         ciphertext = helpers.b64encode(ciphertext)
         return ciphertext
 
     def _decrypt(self, msg, keyid=0):
         ct = helpers.b64decode(msg, binary=True)
         key = six.ensure_binary(self.keys[keyid])
-        decrypter = Decrypter(AESModeOfOperationCBC(key, self.iv))
-        decrypted = decrypter.feed(ct)
-        decrypted += decrypter.feed()
+        decrypted = crypto.aes_cbc_decrypt(key, self.iv, ct)
         return six.ensure_str(decrypted)
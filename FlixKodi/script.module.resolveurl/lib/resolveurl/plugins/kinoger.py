@@ -18,7 +18,7 @@
 
 import binascii
 import json
-from resolveurl.lib import helpers, pyaes
+from resolveurl.lib import crypto, helpers
 from resolveurl.resolver import ResolveUrl, ResolverError
 from resolveurl import common
 from six.moves import urllib_parse
@@ -50,9 +50,7 @@ class KinoGerResolver(ResolveUrl):
             edata = binascii.unhexlify(edata[:-1])
             key = b'\x6b\x69\x65\x6d\x74\x69\x65\x6e\x6d\x75\x61\x39\x31\x31\x63\x61'
             iv = b'\x31\x32\x33\x34\x35\x36\x37\x38\x39\x30\x6f\x69\x75\x79\x74\x72'
-            decrypter = pyaes.Decrypter(pyaes.AESModeOfOperationCBC(key, iv))
-            ddata = decrypter.feed(edata)
-            ddata += decrypter.feed()
+            ddata = crypto.aes_cbc_decrypt(key, iv, edata)
             ddata = ddata.decode('utf-8')
             ddata = json.loads(ddata)
             # r = ddata.get('cf')  # Plays with xbmc Player
@@ -25,7 +25,7 @@ from six.moves import urllib_parse
 from os.path import join, exists
 from os import remove
 from datetime import datetime
-from resolveurl.lib import helpers
+from resolveurl.lib import helpers, hoster_match
 from resolveurl.lib import kodi
 from resolveurl import common
 from resolveurl.common import i18n
@@ -302,25 +302,23 @@ class LinkSnappyResolver(ResolveUrl):
 
             if self.patterns is None:
 
-                self.patterns = self.get_regexes()
+                self.patterns = hoster_match.regex_set(self.get_regexes())
 
-            for p in self.patterns:
+            if self.patterns.search(url):
 
-                if p.search(url):
-
-                    return True
+                return True
 
         elif host:
 
             if self.hosts is None:
 
-                self.hosts = self.get_hosts()[0]
+                self.hosts = hoster_match.host_set(self.get_hosts()[0])
 
             if host.startswith('www.'):
 
                 host = host.replace('www.', '')
 
-            if any(item in host for item in self.hosts):
+            if self.hosts.within(host):
 
                 return True
 
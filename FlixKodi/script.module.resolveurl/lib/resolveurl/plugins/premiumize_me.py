@@ -19,7 +19,7 @@
 import re
 from six.moves import urllib_parse, urllib_error
 import json
-from resolveurl.lib import helpers
+from resolveurl.lib import debrid_cache, helpers, hoster_match, transfer_monitor
 from resolveurl import common
 from resolveurl.common import i18n
 from resolveurl.resolver import ResolveUrl, ResolverError
@@ -61,8 +61,12 @@ class PremiumizeMeResolver(ResolveUrl):
 
     def get_media_url(self, host, media_id, cached_only=False, return_all=False):
         torrent = False
-        cached = self.__check_cache(media_id)
         media_id_lc = media_id.lower()
+        btih = debrid_cache.info_hash(media_id) if media_id_lc.startswith('magnet:') else None
+        if btih:
+            cached = self.check_cached([btih]).get(btih, False)
+        else:
+            cached = self.__check_cache(media_id)
         if cached:
             logger.log_debug('Premiumize.me: %s is readily available to stream' % media_id)
             if media_id_lc.endswith('.torrent') or media_id_lc.startswith('magnet:'):
@@ -93,6 +97,10 @@ class PremiumizeMeResolver(ResolveUrl):
     def get_host_and_id(self, url):
         return 'premiumize.me', url
 
+    def _unrestrict(self, link):
+        # the links of a return_all result are already direct download links
+        return link + helpers.append_headers(self.headers)
+
     @common.cache.cache_method(cache_limit=8)
     def get_all_hosters(self):
         try:
@@ -126,22 +134,33 @@ class PremiumizeMeResolver(ResolveUrl):
                 return True
 
         if not self.patterns or not self.hosts:
-            self.hosts, self.patterns = self.get_all_hosters()
+            hosts, patterns = self.get_all_hosters()
+            self.hosts, self.patterns = hoster_match.host_set(hosts), hoster_match.regex_set(patterns)
 
         if url:
             if not url.endswith('/'):
                 url += '/'
-            for pattern in self.patterns:
-                if pattern.findall(url):
-                    return True
+            if self.patterns.search(url):
+                return True
         elif host:
             if host.startswith('www.'):
                 host = host.replace('www.', '')
-            if any(host in item for item in self.hosts):
+            if self.hosts.contains(host):
                 return True
 
         return False
 
+    def check_cached(self, hashes):
+        return debrid_cache.check(self, hashes, self.__check_hashes)
+
+    def __check_hashes(self, hashes):
+        query = urllib_parse.urlencode([('items[]', btih) for btih in hashes])
+        result = json.loads(self.net.http_GET('%s?%s' % (check_cache_path, query), headers=self.headers).content)
+        response = result.get('response')
+        if result.get('status') == 'success' and isinstance(response, list) and len(response) == len(hashes):
+            return dict(zip(hashes, response))
+        return {}
+
     def __check_cache(self, media_id):
         try:
             url = '%s?items[]=%s' % (check_cache_path, media_id)
@@ -175,19 +194,29 @@ class PremiumizeMeResolver(ResolveUrl):
 
     def __list_transfer(self, transfer_id):
         if not transfer_id == "":
-            try:
-                response = self.net.http_GET(list_transfers_path, headers=self.headers).content
-                result = json.loads(response)
-                if 'status' in result:
-                    if result.get('status') == 'success':
-                        for item in result.get("transfers"):
-                            if item.get('id') == transfer_id:
-                                return item
-            except:
-                pass
+            # one transfer/list call answers the polls of every transfer in progress
+            return transfer_monitor.board(self.name, self.__list_transfers).get(transfer_id) or {}
 
         return {}
 
+    def __list_transfers(self):
+        try:
+            response = self.net.http_GET(list_transfers_path, headers=self.headers).content
+            result = json.loads(response)
+            if 'status' in result:
+                if result.get('status') == 'success':
+                    return dict((item.get('id'), item) for item in result.get("transfers"))
+        except:
+            pass
+
+        return {}
+
+    def get_transfer_state(self, transfer_id):
+        transfer_info = self.__list_transfer(transfer_id)
+        status = transfer_info.get('status')
+        progress = float(transfer_info.get('progress') or 0) * 100
+        return status in ['seeding', 'finished'], status in ['error', 'banned', 'timeout', 'deleted', 'stalled'], progress, None
+
     def __delete_transfer(self, transfer_id):
         if not transfer_id == "":
             try:
@@ -214,8 +243,9 @@ class PremiumizeMeResolver(ResolveUrl):
                 'ResolveURL Premiumize {0}'.format(i18n('transfer')),
                 line1, line2, line3
             ) as pd:
+                schedule = transfer_monitor.PollSchedule()
                 while not transfer_info.get('status') == 'seeding':
-                    common.kodi.sleep(1000 * interval)
+                    transfer_monitor.wait(schedule.next(progress=float(transfer_info.get('progress') or 0) * 100), pd)
                     transfer_info = self.__list_transfer(transfer_id)
                     line1 = transfer_info.get('name')
                     line3 = transfer_info.get('message')
@@ -226,7 +256,9 @@ class PremiumizeMeResolver(ResolveUrl):
                             heading='ResolveURL Premiumize {0}'.format(i18n('transfer')),
                             line1=i18n('pm_background')
                         )
-                        if not keep_transfer:
+                        if keep_transfer:
+                            transfer_monitor.continue_in_background(self, transfer_id, line1)
+                        else:
                             self.__delete_transfer(transfer_id)
                         raise ResolverError('Transfer ID {0} :: {1}'.format(transfer_id, i18n('user_cancelled')))
                     elif transfer_info.get('status') == 'stalled':  # not sure on this value
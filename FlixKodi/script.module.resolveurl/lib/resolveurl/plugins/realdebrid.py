@@ -19,7 +19,7 @@
 import re
 from six.moves import urllib_error
 import json
-from resolveurl.lib import helpers
+from resolveurl.lib import helpers, hoster_match, transfer_monitor
 from resolveurl import common
 from resolveurl.common import i18n
 from resolveurl.resolver import ResolveUrl, ResolverError
@@ -29,7 +29,7 @@ logger.disable()
 
 CLIENT_ID = 'X245A4XAIBGVM'
 USER_AGENT = 'ResolveURL/%s' % common.addon_version
-INTERVALS = 5  # seconds
+INTERVALS = 5  # seconds, longest wait between polls of a magnet conversion
 FORMATS = common.VIDEO_FORMATS
 STALLED = ['magnet_error', 'error', 'virus', 'dead']
 
@@ -43,6 +43,7 @@ credentials_endpoint_path = 'device/credentials'
 hosts_regexes_path = 'hosts/regex'
 hosts_domains_path = 'hosts/domains'
 add_magnet_path = 'torrents/addMagnet'
+torrents_path = 'torrents'
 torrents_info_path = 'torrents/info'
 select_files_path = 'torrents/selectFiles'
 torrents_delete_path = 'torrents/delete'
@@ -75,6 +76,7 @@ class RealDebridResolver(ResolveUrl):
                         line2 = i18n('rd_save')
                         line3 = '{0} seeders'.format(torrent_info.get('seeders'))
                         _TIMEOUT = 100  # seconds
+                        schedule = transfer_monitor.PollSchedule(max_interval=INTERVALS)
                         with common.kodi.ProgressDialog(heading, line1, line2, line3) as cd:
                             while status == 'magnet_conversion' and _TIMEOUT > 0:
                                 cd.update(_TIMEOUT, line1=line1, line3=line3)
@@ -90,8 +92,9 @@ class RealDebridResolver(ResolveUrl):
                                 elif any(x in status for x in STALLED):
                                     self.__delete_torrent(torrent_id)
                                     raise ResolverError('Real-Debrid: Torrent ID %s has stalled | REASON: %s' % (torrent_id, status))
-                                _TIMEOUT -= INTERVALS
-                                common.kodi.sleep(1000 * INTERVALS)
+                                interval = schedule.next()
+                                transfer_monitor.wait(interval, cd)
+                                _TIMEOUT -= interval
                                 torrent_info = self.__torrent_info(torrent_id)
                                 status = torrent_info.get('status')
                                 line1 = torrent_info.get('filename')
@@ -131,9 +134,10 @@ class RealDebridResolver(ResolveUrl):
                                 else:
                                     line2 = i18n('rd_get')
                                 line3 = status
+                                schedule = transfer_monitor.PollSchedule()
                                 with common.kodi.ProgressDialog(heading, line1, line2, line3) as pd:
                                     while not status == 'downloaded':
-                                        common.kodi.sleep(1000 * INTERVALS)
+                                        transfer_monitor.wait(schedule.next(**self.__poll_hint(torrent_info)), pd)
                                         torrent_info = self.__torrent_info(torrent_id)
                                         line1 = torrent_info.get('filename')
                                         status = torrent_info.get('status')
@@ -152,7 +156,9 @@ class RealDebridResolver(ResolveUrl):
                                                 heading,
                                                 i18n('rd_background')
                                             )
-                                            if not keep_transfer:
+                                            if keep_transfer:
+                                                transfer_monitor.continue_in_background(self, torrent_id, line1)
+                                            else:
                                                 self.__delete_torrent(torrent_id)
                                             logger.log_debug('Real-Debrid: Torrent ID {0} :: {1}'.format(torrent_id, i18n('user_cancelled')))
                                             return
@@ -221,6 +227,29 @@ class RealDebridResolver(ResolveUrl):
             common.logger.log_warning("Real-Debrid Error: TORRENT INFO | %s" % e)
             raise
 
+    def __poll_hint(self, torrent_info):
+        progress = float(torrent_info.get('progress') or 0)
+        hint = {'progress': progress}
+        if torrent_info.get('status') == 'downloading':
+            hint['speed'] = torrent_info.get('speed')
+            hint['remaining'] = float(torrent_info.get('bytes') or 0) * (100 - progress) / 100
+        return hint
+
+    def __list_torrents(self):
+        try:
+            url = '%s/%s' % (rest_base_url, torrents_path)
+            result = self.net.http_GET(url, headers=self.headers).content
+            return dict((item.get('id'), item) for item in json.loads(result))
+        except Exception as e:
+            common.logger.log_warning("Real-Debrid Error: TORRENTS LIST | %s" % e)
+            return {}
+
+    def get_transfer_state(self, torrent_id):
+        # one torrents list call answers the polls of every torrent in progress, older ones are looked up by id
+        torrent_info = transfer_monitor.board(self.name, self.__list_torrents).get(torrent_id) or self.__torrent_info(torrent_id)
+        status = torrent_info.get('status') or ''
+        return status == 'downloaded', any(x in status for x in STALLED), self.__poll_hint(torrent_info)['progress'], None
+
     def __add_magnet(self, media_id):
         try:
             url = '%s/%s' % (rest_base_url, add_magnet_path)
@@ -366,20 +395,18 @@ class RealDebridResolver(ResolveUrl):
             if url.lower().startswith('magnet:') and self.get_setting('torrents') == 'true':
                 return True
             if self.hosters is None:
-                self.hosters = self.get_all_hosters()
+                self.hosters = hoster_match.regex_set(self.get_all_hosters())
 
-            for host in self.hosters:
-                # logger.log_debug('RealDebrid checking host : %s' %str(host))
-                if re.search(host, url):
-                    logger.log_debug('RealDebrid Match found')
-                    return True
+            if self.hosters.search(url):
+                logger.log_debug('RealDebrid Match found')
+                return True
         elif host:
             if self.hosts is None:
-                self.hosts = self.get_hosts()
+                self.hosts = hoster_match.host_set(self.get_hosts())
 
             if host.startswith('www.'):
                 host = host.replace('www.', '')
-            if any(host in item for item in self.hosts):
+            if self.hosts.contains(host):
                 return True
         return False
 
@@ -25,7 +25,7 @@ from resolveurl import common
 from resolveurl.lib import helpers
 from resolveurl.resolver import ResolveUrl, ResolverError
 
-from resolveurl.lib import pyaes
+from resolveurl.lib import crypto
 
 
 class StreamUpResolver(ResolveUrl):
@@ -54,9 +54,7 @@ class StreamUpResolver(ResolveUrl):
             iv = encrypted_data[:16]
             ciphertext = encrypted_data[16:]
 
-            decrypter = pyaes.Decrypter(pyaes.AESModeOfOperationCBC(key, iv))
-            decrypted_data = decrypter.feed(ciphertext)
-            decrypted_data += decrypter.feed()
+            decrypted_data = crypto.aes_cbc_decrypt(key, iv, ciphertext)
 
             stream_info = json.loads(six.ensure_str(decrypted_data))
             stream_url = stream_info.get("streaming_url")
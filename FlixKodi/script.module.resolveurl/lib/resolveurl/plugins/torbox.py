@@ -18,11 +18,13 @@
 
 import json
 import re
+import threading
 
 from resolveurl import common
 from resolveurl.common import i18n
-from resolveurl.lib import helpers
-from resolveurl.resolver import ResolverError, ResolveUrl
+from resolveurl.lib import debrid_cache, helpers, hoster_match
+from resolveurl.lib.workers import api_limiter
+from resolveurl.resolver import ResolverError, ResolveUrl, UNRESTRICT_WORKERS
 from six.moves import urllib_error, urllib_parse
 
 logger = common.log_utils.Logger.get_logger(__name__)
@@ -42,6 +44,9 @@ class TorBoxResolver(ResolveUrl):
     def __init__(self):
         self.hosters = None
         self.hosts = None
+        # magnet or url -> (kind, id) of the transfers an unrestrict_all batch is working on
+        self.__batch = {}
+        self.__batch_lock = threading.Lock()
         self.headers = {
             "User-Agent": USER_AGENT,
             "Authorization": "Bearer %s" % self.__get_token(),
@@ -84,12 +89,15 @@ class TorBoxResolver(ResolveUrl):
     def __post(self, endpoint, data, empty=None, json_data=False):
         return self.__api(endpoint, data=data, empty=empty, json_data=json_data)
 
-    def __check_torrent_cached(self, btih):
+    def __check_hashes(self, hashes):
         result = self.__get(
             "torrents/checkcached",
-            {"hash": btih, "format": "list", "list_files": False},
+            {"hash": ",".join(hashes), "format": "list", "list_files": False},
         )
-        return bool(result)
+        if result is None:
+            return {}
+        cached = set(item.get("hash", "").lower() for item in result if isinstance(item, dict))
+        return dict((btih, btih in cached) for btih in hashes)
 
     def __create_torrent(self, magnet):
         result = self.__post(
@@ -165,7 +173,7 @@ class TorBoxResolver(ResolveUrl):
             btih = self.__get_hash(media_id)
 
             d.update(0, line1="Checking cache...")
-            cached = self.__check_torrent_cached(btih)
+            cached = bool(btih) and self.check_cached([btih]).get(btih.lower(), False)
             cached_only = self.get_setting("cached_only") == "true" or cached_only
             if not cached and cached_only:
                 raise ResolverError("TorBox: {0}".format(i18n("cached_torrents_only")))
@@ -291,6 +299,64 @@ class TorBoxResolver(ResolveUrl):
         else:
             return self.__get_media_url_webdl(host, media_id, cached_only, return_all)
 
+    def unrestrict_all(self, sources, max_workers=UNRESTRICT_WORKERS):
+        # every link of a return_all result is a file of the same transfer: look it up once,
+        # request each file from it and only delete it when the whole batch is done
+        transfers = {}
+        for source in sources:
+            media_id = self.__get_file_id(source["link"])[1]
+            if media_id in transfers:
+                continue
+            kind = "torrent" if media_id.startswith("magnet:") else "webdl"
+            # a failed lookup is recorded too, so its links fail instead of each taking the full path
+            transfers[media_id] = (kind, None)
+            try:
+                with api_limiter.slot(type(self).__name__):
+                    if kind == "torrent":
+                        transfers[media_id] = (kind, self.__create_torrent(media_id).get("torrent_id"))
+                    else:
+                        transfers[media_id] = (kind, self.__create_webdl(media_id).get("webdownload_id"))
+            except Exception as e:
+                logger.log_warning("TorBox: failed to look up %s: %s" % (media_id, e))
+        with self.__batch_lock:
+            self.__batch.update(transfers)
+        try:
+            return super(TorBoxResolver, self).unrestrict_all(sources, max_workers)
+        finally:
+            with self.__batch_lock:
+                for media_id in transfers:
+                    self.__batch.pop(media_id, None)
+            if self.get_setting("clear_finished") == "true":
+                for kind, transfer_id in transfers.values():
+                    if not transfer_id:
+                        continue
+                    try:
+                        with api_limiter.slot(type(self).__name__):
+                            if kind == "torrent":
+                                self.__delete_torrent(transfer_id)
+                            else:
+                                self.__delete_webdl(transfer_id)
+                    except Exception as e:
+                        logger.log_warning("TorBox: failed to delete %s %s: %s" % (kind, transfer_id, e))
+
+    def _unrestrict(self, link):
+        (file_id, media_id) = self.__get_file_id(link)
+        with self.__batch_lock:
+            transfer = self.__batch.get(media_id)
+        if transfer is None:
+            return super(TorBoxResolver, self)._unrestrict(link)
+        kind, transfer_id = transfer
+        if not transfer_id:
+            raise ResolverError("TorBox: could not add the %s" % kind)
+        if file_id is None:
+            raise ResolverError("TorBox: no file id in %s" % link)
+        if kind == "torrent":
+            return self.__request_torrent_download(transfer_id, file_id)
+        return self.__request_webdl_download(transfer_id, file_id)
+
+    def check_cached(self, hashes):
+        return debrid_cache.check(self, hashes, self.__check_hashes)
+
     def get_url(self, host, media_id):
         return media_id
 
@@ -299,7 +365,7 @@ class TorBoxResolver(ResolveUrl):
 
     def valid_url(self, url, host):
         if not self.hosts:
-            self.hosts = self.get_all_hosters()
+            self.hosts = hoster_match.host_set(self.get_all_hosters())
 
         if url:
             # handle multi-file hack
@@ -321,12 +387,12 @@ class TorBoxResolver(ResolveUrl):
                 host = "unknown"
 
             host = host.replace("www.", "")
-            if any(host in item for item in self.hosts):
+            if self.hosts.contains(host):
                 return True
 
         elif host:
             host = host.replace("www.", "")
-            if any(host in item for item in self.hosts):
+            if self.hosts.contains(host):
                 return True
 
         return False
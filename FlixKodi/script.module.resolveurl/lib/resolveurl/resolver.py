@@ -23,9 +23,25 @@ import os
 import re
 import abc
 from resolveurl import common
+from resolveurl.lib.workers import futures, api_limiter
 import six
 
 abstractstaticmethod = abc.abstractmethod
+UNRESTRICT_WORKERS = 4
+_compiled_patterns = {}
+
+
+def compile_pattern(pattern):
+    """
+    Returns ``pattern`` compiled case-insensitively. Each pattern is compiled
+    once per process so that hundreds of resolver patterns do not thrash the
+    small internal cache of :mod:`re`.
+    """
+    try:
+        return _compiled_patterns[pattern]
+    except KeyError:
+        regex = _compiled_patterns[pattern] = re.compile(pattern, re.I)
+        return regex
 
 
 class abstractclassmethod(classmethod):
@@ -93,7 +109,7 @@ class ResolveUrl(object):
             host (str): the host the link is on
             media_id (str): the media_id the can be returned by get_host_and_id
         """
-        r = re.search(self.pattern, url, re.I)
+        r = compile_pattern(self.pattern).search(url)
         if r:
             return r.groups()
         else:
@@ -112,7 +128,7 @@ class ResolveUrl(object):
             host = host.lower()
 
         if url:
-            return re.search(self.pattern, url, re.I) is not None
+            return compile_pattern(self.pattern).search(url) is not None
         else:
             return any(host in domain.lower() for domain in self.domains)
 
@@ -124,6 +140,82 @@ class ResolveUrl(object):
         """
         return False
 
+    def check_cached(self, hashes):
+        """
+        Universal resolvers whose service can tell which torrents are ready
+        to stream should override this, preferably asking about many hashes
+        per request (see :mod:`resolveurl.lib.debrid_cache`).
+
+        Args:
+            hashes (list): info hashes or magnet links
+
+        Returns:
+            A dict mapping the lower case info hash to True (cached) or False
+            (not cached). Hashes the service could not answer for are left
+            out, so the default implementation returns an empty dict.
+        """
+        return {}
+
+    def get_transfer_state(self, transfer_id):
+        """
+        Universal resolvers that offer to keep a cloud transfer going after
+        the user cancelled its progress dialog must override this, see
+        :func:`resolveurl.lib.transfer_monitor.continue_in_background`. It is
+        called from the add-on's service, so it must not show dialogs.
+
+        Args:
+            transfer_id: the id the service gave the transfer
+
+        Returns:
+            A tuple (done, failed, progress, eta); progress (0-100) and eta
+            (seconds) may be None.
+        """
+        raise NotImplementedError
+
+    def unrestrict_all(self, sources, max_workers=UNRESTRICT_WORKERS):
+        """
+        Resolves the links of a ``return_all`` result to stream urls, up to
+        ``max_workers`` at a time and never more than
+        :data:`resolveurl.lib.workers.API_LIMIT` calls into this resolver's
+        API at once.
+
+        Args:
+            sources (list): dicts with ``name`` and ``link`` keys, as returned
+            by ``get_media_url(host, media_id, return_all=True)``
+
+        Returns:
+            The same dicts in the same order, each with the stream url under
+            ``url`` or, if that link failed, the reason under ``error``.
+        """
+        def unrestrict(source):
+            source = dict(source)
+            try:
+                with api_limiter.slot(type(self).__name__):
+                    source['url'] = self._unrestrict(source['link'])
+                if not source['url']:
+                    raise ResolverError('No stream url')
+            except Exception as e:
+                common.logger.log_warning('%s: failed to unrestrict %s: %s' % (self.name, source.get('name'), e))
+                source.pop('url', None)
+                source['error'] = str(e)
+            return source
+
+        if futures is None or len(sources) < 2:
+            return [unrestrict(source) for source in sources]
+        executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            return list(executor.map(unrestrict, sources))
+        finally:
+            executor.shutdown(wait=False)
+
+    def _unrestrict(self, link):
+        """
+        Returns the stream url of one link of a ``return_all`` result.
+        Override when those links can be played as they are.
+        """
+        host, media_id = self.get_host_and_id(link)
+        return self.get_media_url(host, media_id)
+
     @classmethod
     def isPopup(cls):
         """
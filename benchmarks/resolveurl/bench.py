@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of script.module.resolveurl.
+
+Runs resolver plugins against the recorded responses in fixtures/ (served
+by fixture_server.py) with the Kodi modules stubbed out (kodi_stubs.py),
+and reports for each case the median wall time and CPU time of
+``get_media_url`` plus the requests and bytes it fetched. It also times
+``import resolveurl`` in fresh processes (the first one with an empty
+profile, the others with the profile that run left behind), the
+construction of HostedMediaFile objects and the source scanner over the
+fixture pages.
+
+    usage:
+
+    python3 benchmarks/resolveurl/bench.py                       # all cases, table on stdout
+    python3 benchmarks/resolveurl/bench.py --json before.json    # also save the results
+    python3 benchmarks/resolveurl/bench.py --compare before.json # show the change against a saved run
+    python3 benchmarks/resolveurl/bench.py --case mixdrop --repeat 50
+
+Needs python 3 with ``six`` installed (the other add-on dependencies are
+stubbed or optional).
+
+A case in fixtures/cases.json names the plugin module and class, the url to
+resolve, a string the result must contain and the responses to serve (see
+fixture_server.py). Cases can set resolver settings such as API tokens.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(os.path.dirname(HERE))
+ADDON = os.path.join(REPO, 'FlixKodi', 'script.module.resolveurl')
+CASES_FILE = os.path.join(HERE, 'fixtures', 'cases.json')
+CONTROL_HOST = 'bench.control'
+
+
+def make_home():
+    """
+    Returns (home, addon_path) of a scratch Kodi home whose add-on folder
+    links to the real lib/ and addon.xml, so that generated files (e.g.
+    resources/settings.xml) do not end up in the repository.
+    """
+    home = tempfile.mkdtemp(prefix='resolveurl-bench-')
+    addon_path = os.path.join(home, 'addon')
+    os.makedirs(os.path.join(addon_path, 'resources'))
+    for name in ['lib', 'addon.xml']:
+        source = os.path.join(ADDON, name)
+        target = os.path.join(addon_path, name)
+        try:
+            os.symlink(source, target)
+        except (OSError, NotImplementedError):
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy(source, target)
+    return home, addon_path
+
+
+def setup(addon_path, profile_path, settings=None):
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.join(addon_path, 'lib'))
+    import kodi_stubs
+    return kodi_stubs.install(addon_path, profile_path, settings)
+
+
+def import_probe(addon_path, profile_path):
+    """Runs in a child process: times the first ``import resolveurl``."""
+    setup(addon_path, profile_path)
+    wall, cpu = time.perf_counter(), time.process_time()
+    import resolveurl  # noqa: F401
+    print(json.dumps({'wall': time.perf_counter() - wall, 'cpu': time.process_time() - cpu}))
+
+
+def time_imports(runs, addon_path, profile_path):
+    results = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--import-probe', addon_path, profile_path])
+        results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+    warm = results[1:] or results
+    return {
+        'cold_wall': results[0]['wall'], 'cold_cpu': results[0]['cpu'],
+        'warm_wall': statistics.median(r['wall'] for r in warm), 'warm_cpu': statistics.median(r['cpu'] for r in warm)
+    }
+
+
+class FixtureServer(object):
+    def __init__(self, cases_file):
+        self.process = subprocess.Popen([sys.executable, os.path.join(HERE, 'fixture_server.py'), cases_file], stdout=subprocess.PIPE)
+        self.port = int(self.process.stdout.readline())
+
+    def control(self, path):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            conn.request('GET', path, headers={'Host': CONTROL_HOST})
+            return json.loads(conn.getresponse().read().decode('utf-8'))
+        finally:
+            conn.close()
+
+    def route(self):
+        """Sends every connection ResolveURL opens to this server."""
+        from resolveurl.lib import pool
+        port = self.port
+
+        def _new_connection(self, key, timeout):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+            conn.set_debuglevel(self.debuglevel)
+            return conn
+
+        pool.ConnectionPool._new_connection = _new_connection
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def timed(func, repeat):
+    walls, cpus = [], []
+    result = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    return result, statistics.median(walls), statistics.median(cpus)
+
+
+def run_case(case, server, repeat, settings):
+    import importlib
+    module = importlib.import_module('resolveurl.plugins.%s' % case['module'])
+    resolver = getattr(module, case['class'])()
+    settings.update(dict(('%s_%s' % (case['class'], key), value) for key, value in case.get('settings', {}).items()))
+    host, media_id = resolver.get_host_and_id(case['url'])
+
+    row = {'ok': False, 'error': None}
+    try:
+        resolver.get_media_url(host, media_id)  # warm up lazy imports and compiled patterns
+        server.control('/reset')
+        result, row['wall'], row['cpu'] = timed(lambda: resolver.get_media_url(host, media_id), repeat)
+        row['ok'] = case['expect'] in str(result)
+        if not row['ok']:
+            row['error'] = 'unexpected result: %s' % result
+    except Exception as e:
+        row['error'] = '%s: %s' % (type(e).__name__, e)
+        row['wall'] = row['cpu'] = None
+    stats = server.control('/stats')
+    row['requests'] = stats['requests'] // repeat if row['wall'] is not None else stats['requests']
+    row['bytes'] = stats['bytes'] // repeat if row['wall'] is not None else stats['bytes']
+    row['misses'] = sorted(set(stats['misses']))
+    return row
+
+
+def time_hmf(cases, repeat):
+    from resolveurl.hmf import HostedMediaFile
+    urls = [case['url'] for case in cases if not case.get('universal')]
+    _, wall, cpu = timed(lambda: [HostedMediaFile(url=url) for url in urls], repeat)
+    return {'urls': len(urls), 'wall': wall, 'cpu': cpu}
+
+
+def time_scanner(cases, repeat):
+    from resolveurl.lib import source_scanner
+    pages = []
+    for case in cases:
+        for response in case.get('responses', []):
+            if response.get('file', '').endswith('.html'):
+                with open(os.path.join(os.path.dirname(CASES_FILE), response['file']), 'rb') as f:
+                    pages.append(f.read().decode('utf-8', 'ignore'))
+    legacy, scanner, mismatches = source_scanner.benchmark(pages, repeat)
+    return {'pages': len(pages), 'legacy': legacy, 'scanner': scanner, 'mismatches': mismatches}
+
+
+def fmt(seconds):
+    return '-' if seconds is None else '%.2fms' % (seconds * 1000)
+
+
+def change(new, old):
+    if not new or not old:
+        return ''
+    return ' (%+.0f%%)' % (100.0 * (new - old) / old)
+
+
+def print_report(results, baseline=None):
+    old = baseline or {}
+    imports = results['import']
+    old_imports = old.get('import', {})
+    print('import resolveurl: cold %s%s, warm %s%s' % (
+        fmt(imports['cold_wall']), change(imports['cold_wall'], old_imports.get('cold_wall')),
+        fmt(imports['warm_wall']), change(imports['warm_wall'], old_imports.get('warm_wall'))))
+    hmf = results['hmf']
+    print('HostedMediaFile x%d: %s wall, %s cpu%s' % (hmf['urls'], fmt(hmf['wall']), fmt(hmf['cpu']), change(hmf['cpu'], old.get('hmf', {}).get('cpu'))))
+    scanner = results['scanner']
+    print('source scanner over %d pages: legacy %s, scanner %s, %d mismatches' % (
+        scanner['pages'], fmt(scanner['legacy']), fmt(scanner['scanner']), len(scanner['mismatches'])))
+    print('')
+    print('%-14s %4s %12s %12s %5s %9s' % ('case', 'ok', 'wall', 'cpu', 'reqs', 'bytes'))
+    for name, row in sorted(results['cases'].items()):
+        old_row = old.get('cases', {}).get(name, {})
+        print('%-14s %4s %12s %12s %5d %9d' % (name, 'yes' if row['ok'] else 'NO', fmt(row['wall']), fmt(row['cpu']), row['requests'], row['bytes'])
+              + change(row['cpu'], old_row.get('cpu')))
+        if row['error']:
+            print('    %s' % row['error'])
+        for miss in row['misses']:
+            print('    no fixture for %s' % miss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the ResolveURL resolvers')
+    parser.add_argument('--case', action='append', help='only run this case (repeatable)')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per case (default 20)')
+    parser.add_argument('--import-runs', type=int, default=5, help='processes used to time the import (default 5)')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='show the change against the results in this file')
+    parser.add_argument('--import-probe', nargs=2, metavar=('ADDON', 'PROFILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.import_probe:
+        return import_probe(*args.import_probe)
+
+    with open(CASES_FILE, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    if args.case:
+        cases = [case for case in cases if case['name'] in args.case]
+
+    home, addon_path = make_home()
+    server = FixtureServer(CASES_FILE)
+    try:
+        results = {'python': platform.python_version(), 'repeat': args.repeat, 'time': int(time.time())}
+        results['import'] = time_imports(args.import_runs, addon_path, os.path.join(home, 'profile'))
+
+        settings = setup(addon_path, os.path.join(home, 'bench-profile'))
+        import resolveurl  # noqa: F401
+        server.route()
+        results['hmf'] = time_hmf(cases, args.repeat)
+        results['scanner'] = time_scanner(cases, max(1, args.repeat // 5))
+        results['cases'] = dict((case['name'], run_case(case, server, args.repeat, settings)) for case in cases)
+    finally:
+        server.stop()
+        shutil.rmtree(home, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0 if all(row['ok'] for row in results['cases'].values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-in that answers with the recorded responses of the
+benchmark cases.
+
+The benchmark sends every request of ResolveURL here over plain HTTP,
+whatever its original host or scheme, and keeps the original ``Host``
+header. A response is picked by the first ``responses`` entry of a case
+whose ``method`` matches and whose ``url`` regex matches
+``//<host><path>?<query>``. Requests without a fixture get a 404 and are
+reported by the benchmark as misses.
+
+Requests to the host ``bench.control`` are not counted: ``/stats`` returns
+the request count, bytes sent and misses since the last ``/reset``.
+
+    usage: fixture_server.py <cases.json>   (prints the port it listens on)
+"""
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTROL_HOST = 'bench.control'
+
+
+def load_routes(cases_file):
+    base = os.path.dirname(os.path.abspath(cases_file))
+    with open(cases_file, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    routes = []
+    for case in cases:
+        for response in case.get('responses', []):
+            if 'file' in response:
+                with open(os.path.join(base, response['file']), 'rb') as f:
+                    body = f.read()
+            elif isinstance(response.get('body'), (dict, list)):
+                body = json.dumps(response['body']).encode('utf-8')
+            else:
+                body = response.get('body', '').encode('utf-8')
+            routes.append((response.get('method', 'GET'), re.compile(response['url']), response.get('status', 200),
+                           response.get('headers', {}), body))
+    return routes
+
+
+class Stats(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+        self.misses = []
+
+    def as_dict(self):
+        return {'requests': self.requests, 'bytes': self.bytes, 'misses': self.misses}
+
+
+def make_handler(routes, stats):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # headers and body are written separately, without this every response waits for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, headers, body):
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def _control(self):
+            with stats.lock:
+                if self.path == '/reset':
+                    stats.reset()
+                body = json.dumps(stats.as_dict()).encode('utf-8')
+            self._reply(200, {'Content-Type': 'application/json'}, body)
+
+        def _serve(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            host = self.headers.get('Host', '')
+            if host == CONTROL_HOST:
+                return self._control()
+
+            url = '//%s%s' % (host, self.path)
+            for method, regex, status, headers, body in routes:
+                if method == self.command and regex.search(url):
+                    break
+            else:
+                method, status, headers, body = self.command, 404, {}, b'no fixture'
+                with stats.lock:
+                    stats.misses.append('%s %s' % (self.command, url))
+            with stats.lock:
+                stats.requests += 1
+                stats.bytes += len(body)
+            self._reply(status, headers, body)
+
+        do_GET = do_POST = do_HEAD = do_PUT = do_DELETE = _serve
+
+    return FixtureHandler
+
+
+def main(argv):
+    routes = load_routes(argv[1])
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(routes, Stats()))
+    server.daemon_threads = True
+    sys.stdout.write('%d\n' % server.server_address[1])
+    sys.stdout.flush()
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,202 @@
+(function(){var _0x1f=function(a){return a};var z=['@$','^^','~@','%?','*~','!!','#&'];window.__voe=_0x1f(z);})();
+/* player runtime */
+function _0x0000(a,b){return a^b}
+function _0x0001(a,b){return a^b}
+function _0x0002(a,b){return a^b}
+function _0x0003(a,b){return a^b}
+function _0x0004(a,b){return a^b}
+function _0x0005(a,b){return a^b}
+function _0x0006(a,b){return a^b}
+function _0x0007(a,b){return a^b}
+function _0x0008(a,b){return a^b}
+function _0x0009(a,b){return a^b}
+function _0x000a(a,b){return a^b}
+function _0x000b(a,b){return a^b}
+function _0x000c(a,b){return a^b}
+function _0x000d(a,b){return a^b}
+function _0x000e(a,b){return a^b}
+function _0x000f(a,b){return a^b}
+function _0x0010(a,b){return a^b}
+function _0x0011(a,b){return a^b}
+function _0x0012(a,b){return a^b}
+function _0x0013(a,b){return a^b}
+function _0x0014(a,b){return a^b}
+function _0x0015(a,b){return a^b}
+function _0x0016(a,b){return a^b}
+function _0x0017(a,b){return a^b}
+function _0x0018(a,b){return a^b}
+function _0x0019(a,b){return a^b}
+function _0x001a(a,b){return a^b}
+function _0x001b(a,b){return a^b}
+function _0x001c(a,b){return a^b}
+function _0x001d(a,b){return a^b}
+function _0x001e(a,b){return a^b}
+function _0x001f(a,b){return a^b}
+function _0x0020(a,b){return a^b}
+function _0x0021(a,b){return a^b}
+function _0x0022(a,b){return a^b}
+function _0x0023(a,b){return a^b}
+function _0x0024(a,b){return a^b}
+function _0x0025(a,b){return a^b}
+function _0x0026(a,b){return a^b}
+function _0x0027(a,b){return a^b}
+function _0x0028(a,b){return a^b}
+function _0x0029(a,b){return a^b}
+function _0x002a(a,b){return a^b}
+function _0x002b(a,b){return a^b}
+function _0x002c(a,b){return a^b}
+function _0x002d(a,b){return a^b}
+function _0x002e(a,b){return a^b}
+function _0x002f(a,b){return a^b}
+function _0x0030(a,b){return a^b}
+function _0x0031(a,b){return a^b}
+function _0x0032(a,b){return a^b}
+function _0x0033(a,b){return a^b}
+function _0x0034(a,b){return a^b}
+function _0x0035(a,b){return a^b}
+function _0x0036(a,b){return a^b}
+function _0x0037(a,b){return a^b}
+function _0x0038(a,b){return a^b}
+function _0x0039(a,b){return a^b}
+function _0x003a(a,b){return a^b}
+function _0x003b(a,b){return a^b}
+function _0x003c(a,b){return a^b}
+function _0x003d(a,b){return a^b}
+function _0x003e(a,b){return a^b}
+function _0x003f(a,b){return a^b}
+function _0x0040(a,b){return a^b}
+function _0x0041(a,b){return a^b}
+function _0x0042(a,b){return a^b}
+function _0x0043(a,b){return a^b}
+function _0x0044(a,b){return a^b}
+function _0x0045(a,b){return a^b}
+function _0x0046(a,b){return a^b}
+function _0x0047(a,b){return a^b}
+function _0x0048(a,b){return a^b}
+function _0x0049(a,b){return a^b}
+function _0x004a(a,b){return a^b}
+function _0x004b(a,b){return a^b}
+function _0x004c(a,b){return a^b}
+function _0x004d(a,b){return a^b}
+function _0x004e(a,b){return a^b}
+function _0x004f(a,b){return a^b}
+function _0x0050(a,b){return a^b}
+function _0x0051(a,b){return a^b}
+function _0x0052(a,b){return a^b}
+function _0x0053(a,b){return a^b}
+function _0x0054(a,b){return a^b}
+function _0x0055(a,b){return a^b}
+function _0x0056(a,b){return a^b}
+function _0x0057(a,b){return a^b}
+function _0x0058(a,b){return a^b}
+function _0x0059(a,b){return a^b}
+function _0x005a(a,b){return a^b}
+function _0x005b(a,b){return a^b}
+function _0x005c(a,b){return a^b}
+function _0x005d(a,b){return a^b}
+function _0x005e(a,b){return a^b}
+function _0x005f(a,b){return a^b}
+function _0x0060(a,b){return a^b}
+function _0x0061(a,b){return a^b}
+function _0x0062(a,b){return a^b}
+function _0x0063(a,b){return a^b}
+function _0x0064(a,b){return a^b}
+function _0x0065(a,b){return a^b}
+function _0x0066(a,b){return a^b}
+function _0x0067(a,b){return a^b}
+function _0x0068(a,b){return a^b}
+function _0x0069(a,b){return a^b}
+function _0x006a(a,b){return a^b}
+function _0x006b(a,b){return a^b}
+function _0x006c(a,b){return a^b}
+function _0x006d(a,b){return a^b}
+function _0x006e(a,b){return a^b}
+function _0x006f(a,b){return a^b}
+function _0x0070(a,b){return a^b}
+function _0x0071(a,b){return a^b}
+function _0x0072(a,b){return a^b}
+function _0x0073(a,b){return a^b}
+function _0x0074(a,b){return a^b}
+function _0x0075(a,b){return a^b}
+function _0x0076(a,b){return a^b}
+function _0x0077(a,b){return a^b}
+function _0x0078(a,b){return a^b}
+function _0x0079(a,b){return a^b}
+function _0x007a(a,b){return a^b}
+function _0x007b(a,b){return a^b}
+function _0x007c(a,b){return a^b}
+function _0x007d(a,b){return a^b}
+function _0x007e(a,b){return a^b}
+function _0x007f(a,b){return a^b}
+function _0x0080(a,b){return a^b}
+function _0x0081(a,b){return a^b}
+function _0x0082(a,b){return a^b}
+function _0x0083(a,b){return a^b}
+function _0x0084(a,b){return a^b}
+function _0x0085(a,b){return a^b}
+function _0x0086(a,b){return a^b}
+function _0x0087(a,b){return a^b}
+function _0x0088(a,b){return a^b}
+function _0x0089(a,b){return a^b}
+function _0x008a(a,b){return a^b}
+function _0x008b(a,b){return a^b}
+function _0x008c(a,b){return a^b}
+function _0x008d(a,b){return a^b}
+function _0x008e(a,b){return a^b}
+function _0x008f(a,b){return a^b}
+function _0x0090(a,b){return a^b}
+function _0x0091(a,b){return a^b}
+function _0x0092(a,b){return a^b}
+function _0x0093(a,b){return a^b}
+function _0x0094(a,b){return a^b}
+function _0x0095(a,b){return a^b}
+function _0x0096(a,b){return a^b}
+function _0x0097(a,b){return a^b}
+function _0x0098(a,b){return a^b}
+function _0x0099(a,b){return a^b}
+function _0x009a(a,b){return a^b}
+function _0x009b(a,b){return a^b}
+function _0x009c(a,b){return a^b}
+function _0x009d(a,b){return a^b}
+function _0x009e(a,b){return a^b}
+function _0x009f(a,b){return a^b}
+function _0x00a0(a,b){return a^b}
+function _0x00a1(a,b){return a^b}
+function _0x00a2(a,b){return a^b}
+function _0x00a3(a,b){return a^b}
+function _0x00a4(a,b){return a^b}
+function _0x00a5(a,b){return a^b}
+function _0x00a6(a,b){return a^b}
+function _0x00a7(a,b){return a^b}
+function _0x00a8(a,b){return a^b}
+function _0x00a9(a,b){return a^b}
+function _0x00aa(a,b){return a^b}
+function _0x00ab(a,b){return a^b}
+function _0x00ac(a,b){return a^b}
+function _0x00ad(a,b){return a^b}
+function _0x00ae(a,b){return a^b}
+function _0x00af(a,b){return a^b}
+function _0x00b0(a,b){return a^b}
+function _0x00b1(a,b){return a^b}
+function _0x00b2(a,b){return a^b}
+function _0x00b3(a,b){return a^b}
+function _0x00b4(a,b){return a^b}
+function _0x00b5(a,b){return a^b}
+function _0x00b6(a,b){return a^b}
+function _0x00b7(a,b){return a^b}
+function _0x00b8(a,b){return a^b}
+function _0x00b9(a,b){return a^b}
+function _0x00ba(a,b){return a^b}
+function _0x00bb(a,b){return a^b}
+function _0x00bc(a,b){return a^b}
+function _0x00bd(a,b){return a^b}
+function _0x00be(a,b){return a^b}
+function _0x00bf(a,b){return a^b}
+function _0x00c0(a,b){return a^b}
+function _0x00c1(a,b){return a^b}
+function _0x00c2(a,b){return a^b}
+function _0x00c3(a,b){return a^b}
+function _0x00c4(a,b){return a^b}
+function _0x00c5(a,b){return a^b}
+function _0x00c6(a,b){return a^b}
+function _0x00c7(a,b){return a^b}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-ins for the Kodi python modules (xbmc, xbmcaddon, xbmcgui,
+xbmcplugin, xbmcvfs and kodi_six), enough to import script.module.resolveurl
+and run its resolvers outside of Kodi.
+
+Dialogs never block: yes/no questions answer "no", selects pick the first
+item and progress dialogs are never cancelled.
+"""
+import json
+import os
+import sys
+import time
+import types
+
+ADDON_ID = 'script.module.resolveurl'
+DEFAULT_SETTINGS = {
+    'allow_universal': 'true',
+    'allow_popups': 'false',
+    'auto_pick': 'true',
+    # every run should hit the fixtures, not the function cache
+    'use_cache': 'false',
+    'cache_streams': 'false',
+    'telemetry': 'false',
+}
+LOG_LEVELS = {'LOGDEBUG': 0, 'LOGINFO': 1, 'LOGNOTICE': 1, 'LOGWARNING': 2, 'LOGERROR': 3, 'LOGFATAL': 4}
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+class _Anything(object):
+    """Accepts any constructor arguments and method calls."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def install(addon_path, profile_path, settings=None, log=None):
+    """
+    Registers the stub modules in ``sys.modules``. ``addon_path`` is what
+    ``getAddonInfo('path')`` returns, ``profile_path`` the add-on profile and
+    ``settings`` overrides DEFAULT_SETTINGS. Log lines at or above ``log``
+    (a LOG* level) are printed to stderr.
+    """
+    values = dict(DEFAULT_SETTINGS)
+    values.update(settings or {})
+
+    def _log(msg, level=0):
+        if log is not None and level >= log:
+            sys.stderr.write('%s\n' % msg)
+
+    class Monitor(object):
+        def abortRequested(self):
+            return False
+
+        def waitForAbort(self, timeout=0):
+            time.sleep(timeout)
+            return False
+
+    def _json_rpc(request):
+        return json.dumps({'id': 1, 'jsonrpc': '2.0', 'result': {'settings': [], 'value': False}})
+
+    xbmc = _module(
+        'xbmc', log=_log, Monitor=Monitor, Keyboard=_Anything, executeJSONRPC=_json_rpc,
+        sleep=lambda ms: time.sleep(ms / 1000.0), translatePath=lambda path: path,
+        getSupportedMedia=lambda kind: '.mp4|.mkv|.avi|.webm|.flv|.m3u8|.ts|.mov|.wmv',
+        getCondVisibility=lambda condition: False, executebuiltin=lambda *args: None,
+        getInfoLabel=lambda label: '', getLanguage=lambda *args: 'English', **LOG_LEVELS)
+
+    class Addon(object):
+        def __init__(self, id=ADDON_ID):
+            self.id = id
+
+        def getSetting(self, key):
+            if key in values:
+                return values[key]
+            if key.endswith('_enabled'):
+                return 'true'
+            if key.endswith('_priority'):
+                return '100'
+            return ''
+
+        def setSetting(self, key, value):
+            values[key] = value
+
+        def getAddonInfo(self, key):
+            return {'path': addon_path, 'profile': profile_path, 'id': self.id, 'name': 'ResolveURL',
+                    'version': '20.0' if self.id == 'xbmc.addon' else '0.0.0'}.get(key, '')
+
+        def getLocalizedString(self, string_id):
+            return 'String %d' % string_id
+
+        def openSettings(self):
+            pass
+
+    xbmcaddon = _module('xbmcaddon', Addon=Addon)
+
+    class Dialog(_Anything):
+        def select(self, *args, **kwargs):
+            return 0
+
+        def yesno(self, *args, **kwargs):
+            return False
+
+        def ok(self, *args, **kwargs):
+            return True
+
+        def input(self, *args, **kwargs):
+            return ''
+
+    class DialogProgress(_Anything):
+        def iscanceled(self):
+            return False
+
+    class Window(object):
+        properties = {}
+
+        def __init__(self, window_id=0):
+            self.window_id = window_id
+
+        def getProperty(self, key):
+            return self.properties.get((self.window_id, key), '')
+
+        def setProperty(self, key, value):
+            self.properties[(self.window_id, key)] = value
+
+        def clearProperty(self, key):
+            self.properties.pop((self.window_id, key), None)
+
+    xbmcgui = _module(
+        'xbmcgui', Window=Window, Dialog=Dialog, DialogProgress=DialogProgress, DialogProgressBG=DialogProgress,
+        WindowDialog=_Anything, WindowXMLDialog=_Anything, ListItem=_Anything, ControlImage=_Anything,
+        ControlButton=_Anything, ControlLabel=_Anything, ControlFadeLabel=_Anything, ALPHANUM_HIDE_INPUT=1,
+        ACTION_SELECT_ITEM=7, ACTION_NAV_BACK=92, ACTION_MOVE_UP=3, ACTION_MOVE_DOWN=4,
+        ACTION_MOVE_LEFT=1, ACTION_MOVE_RIGHT=2)
+
+    def _listdir(path):
+        entries = os.listdir(path)
+        return ([e for e in entries if os.path.isdir(os.path.join(path, e))],
+                [e for e in entries if os.path.isfile(os.path.join(path, e))])
+
+    def _mkdirs(path):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        return True
+
+    xbmcvfs = _module('xbmcvfs', translatePath=lambda path: path, exists=os.path.exists, mkdirs=_mkdirs,
+                      listdir=_listdir, File=open)
+    xbmcplugin = _module('xbmcplugin', setContent=lambda *args: None, endOfDirectory=lambda *args, **kwargs: None,
+                         addDirectoryItem=lambda *args, **kwargs: True)
+
+    modules = {'xbmc': xbmc, 'xbmcaddon': xbmcaddon, 'xbmcgui': xbmcgui, 'xbmcvfs': xbmcvfs, 'xbmcplugin': xbmcplugin}
+    modules['kodi_six'] = _module('kodi_six', __path__=[], **modules)
+    for name, module in modules.items():
+        sys.modules[name] = module
+    return values